@@ -0,0 +1,276 @@
+import argparse
+import json
+import platform
+import random
+import sys
+from pathlib import Path
+from time import perf_counter
+
+from games.connect4.bitboard_state import BitboardConnect4State
+from games.connect4.players.greedy import GreedyConnect4Player
+from games.connect4.players.random import RandomConnect4Player
+from games.connect4.simulator import Connect4Simulator
+from games.hlpoker.players.always_call import AlwaysCallHLPokerPlayer
+from games.hlpoker.players.always_raise import AlwaysRaiseHLPokerPlayer
+from games.hlpoker.players.random import RandomHLPokerPlayer
+from games.hlpoker.simulator import HLPokerSimulator
+from games.minesweeper.players.random import RandomMinesweeperPlayer
+from games.minesweeper.players.safe import PlaySafeMinesweeperPlayer
+from games.minesweeper.simulator import MinesweeperSimulator
+
+"""
+The fixed workloads: for each game, the simulator and the bundled players used to play the games
+"""
+WORKLOADS = {
+    "connect4": lambda: Connect4Simulator([RandomConnect4Player("random"), GreedyConnect4Player("greedy")]),
+    "connect4_bitboard": lambda: Connect4Simulator([RandomConnect4Player("random"), GreedyConnect4Player("greedy")],
+                                                   state_type=BitboardConnect4State),
+    "connect4_large": lambda: Connect4Simulator([RandomConnect4Player("random"), GreedyConnect4Player("greedy")],
+                                                num_rows=20, num_cols=30),
+    "hlpoker": lambda: HLPokerSimulator([RandomHLPokerPlayer("random"), AlwaysCallHLPokerPlayer("call")]),
+    "hlpoker_raise": lambda: HLPokerSimulator([AlwaysRaiseHLPokerPlayer("raise"), AlwaysCallHLPokerPlayer("call")]),
+    "minesweeper": lambda: MinesweeperSimulator([RandomMinesweeperPlayer("random"), PlaySafeMinesweeperPlayer("safe")]),
+}
+
+SEED = 1234
+
+"""
+The baseline committed with the source, compared with every run unless another baseline is given (see --baseline).
+It was recorded on another machine, so its regressions are only reported. It is refreshed with --output when a change
+makes the games faster on purpose
+"""
+BASELINE_PATH = Path(__file__).parent / "bench_baseline.json"
+
+
+def bench_calibration(iterations):
+    # A fixed pure-python loop that measures the speed of the machine, so that a baseline recorded on another machine
+    # can be scaled to this one
+    total = 0
+    values = list(range(64))
+    for i in range(iterations):
+        total += values[i & 63] * 3 % 7
+    return total
+
+
+def bench_games(make_simulator, num_games):
+    simulator = make_simulator()
+    simulator.set_seed(SEED, "bench")
+    for _ in range(num_games):
+        simulator.run_simulation()
+        simulator.change_player_positions()
+
+
+def sample_positions(make_simulator, num_games):
+    # Play random games and keep every intermediate state, together with the action played from it
+    simulator = make_simulator()
+    rng = random.Random(SEED)
+    positions = []
+    for _ in range(num_games):
+        state = simulator.create_state(rng)
+        while not state.is_finished():
+            action = rng.choice(list(state.get_possible_actions()))
+            positions.append((state.clone(), action))
+            state.update(action)
+    return positions
+
+
+def bench_clone(positions):
+    for state, _ in positions:
+        state.clone()
+
+
+def bench_update(positions):
+    for state, action in positions:
+        state.clone().update(action)
+
+
+def bench_update_undo(positions):
+    # Playing and undoing a move on the same state, as searches do instead of cloning
+    for state, action in positions:
+        state.update(action)
+        state.undo()
+
+
+def bench_validate_action(positions):
+    for state, action in positions:
+        state.validate_action(action)
+
+
+def bench_possible_actions(positions):
+    for state, _ in positions:
+        list(state.get_possible_actions())
+
+
+def bench_win_detection(positions):
+    # Only the moves that end the game, where the winner is detected
+    for state, action in positions:
+        final_state = state.clone()
+        final_state.update(action)
+        final_state.is_finished()
+        final_state.get_result(0)
+
+
+"""
+The minimum time of a measurement, in seconds. The workloads that are faster are run several times in a row, so that
+the timer resolution and the noise of the machine are small against the measured time
+"""
+MIN_MEASURE_TIME = 0.2
+
+"""
+Calls a function until it took at least MIN_MEASURE_TIME
+:returns: the mean time of a call, in seconds
+"""
+def time_calls(function, args):
+    calls = 0
+    start = perf_counter()
+    while True:
+        function(*args)
+        calls += 1
+        elapsed = perf_counter() - start
+        if elapsed >= MIN_MEASURE_TIME:
+            return elapsed / calls
+
+
+"""
+Runs a benchmark several times and keeps the fastest run. Each run calls the benchmark until it took at least
+MIN_MEASURE_TIME. The noise is the slowdown of the slowest run against the fastest one, so that a comparison with a
+baseline does not report the noise of the machine as a regression
+:returns: the number of operations per second and the noise
+"""
+def measure(function, args, operations, repeat):
+    times = [time_calls(function, args) for _ in range(repeat)]
+    best = min(times)
+    return {
+        'operations': operations,
+        'seconds': best,
+        'ops_per_sec': operations / best if best > 0 else float('inf'),
+        'noise': 1 - best / max(times) if best > 0 else 0.0
+    }
+
+
+def run_benchmarks(scale, repeat, selected):
+    results = {}
+    for game, make_simulator in WORKLOADS.items():
+        if selected and game not in selected:
+            continue
+
+        num_games = max(1, int(200 * scale))
+        print(f"[{game}] {num_games} games")
+        results[f"{game}.games"] = measure(bench_games, (make_simulator, num_games), num_games, repeat)
+
+        positions = sample_positions(make_simulator, max(1, int(50 * scale)))
+        final_positions = [(state, action) for state, action in positions if is_final(state, action)]
+        results[f"{game}.clone"] = measure(bench_clone, (positions,), len(positions), repeat)
+        results[f"{game}.update"] = measure(bench_update, (positions,), len(positions), repeat)
+        if hasattr(positions[0][0], 'undo'):
+            results[f"{game}.update_undo"] = measure(bench_update_undo, (positions,), len(positions), repeat)
+        results[f"{game}.validate_action"] = measure(bench_validate_action, (positions,), len(positions), repeat)
+        results[f"{game}.get_possible_actions"] = measure(bench_possible_actions, (positions,), len(positions), repeat)
+        results[f"{game}.win_detection"] = measure(bench_win_detection, (final_positions,), len(final_positions),
+                                                   repeat)
+    return results
+
+
+def is_final(state, action):
+    final_state = state.clone()
+    final_state.update(action)
+    return final_state.is_finished()
+
+
+"""
+Compares the results with a baseline. The baseline is first scaled by the ratio of the calibrations of both runs, so
+that a baseline recorded on a faster or a slower machine can be used. A benchmark regressed when it is slower than the
+baseline by more than the threshold plus the noise measured in both runs (see measure)
+:param threshold: the maximum accepted slowdown (e.g. 0.1 for 10%)
+:param speed: the calibration of this run divided by the one of the baseline (1 when one of them is missing)
+:returns: the names of the benchmarks that regressed
+"""
+def compare(results, baseline, threshold, speed=1.0):
+    regressions = []
+    if speed != 1.0:
+        print(f"\nThe baseline is scaled by {speed:.2f} (the speed of this machine against the one of the baseline)")
+    print(f"\n{'Benchmark':<36} {'Baseline':>14} {'Current':>14} {'Change':>9} {'Accepted':>9}")
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:<36} {'-':>14} {result['ops_per_sec']:>14.1f} {'new':>9}")
+            continue
+        before = baseline[name]['ops_per_sec'] * speed
+        change = (result['ops_per_sec'] - before) / before if before > 0 else 0
+        accepted = threshold + result.get('noise', 0.0) + baseline[name].get('noise', 0.0)
+        flag = ""
+        if change < -accepted:
+            regressions.append(name)
+            flag = " REGRESSION"
+        print(f"{name:<36} {before:>14.1f} {result['ops_per_sec']:>14.1f} {change:>+8.1%} {-accepted:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the game engines and the simulator throughput.')
+
+    parser.add_argument('--output', default=None,
+                        help='Write the results to a JSON file (it can be used later as a baseline).')
+
+    parser.add_argument('--baseline', default=None,
+                        help='Compare the results with a baseline JSON file, and fail if any benchmark regressed. '
+                             'Defaults to the committed baseline (bench_baseline.json), which is only reported.')
+
+    parser.add_argument('--no-baseline', action='store_true', default=False,
+                        help='Only print the results, without comparing them with a baseline.')
+
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Maximum accepted slowdown against the baseline (0.1 = 10%%), on top of the noise '
+                             'measured in both runs. Defaults to 0.1.')
+
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiplies the size of the workloads. Defaults to 1.')
+
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of runs of each benchmark (the fastest one is kept). Defaults to 5.')
+
+    parser.add_argument('--game', action='append', choices=WORKLOADS.keys(),
+                        help='Only run the workloads of a game. Can be specified more than once.')
+
+    args = parser.parse_args()
+
+    calibration = measure(bench_calibration, (1000000,), 1000000, args.repeat)['ops_per_sec']
+    results = run_benchmarks(args.scale, args.repeat, args.game)
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'scale': args.scale,
+        'calibration': calibration,
+        'results': results
+    }
+
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    baseline_path = args.baseline
+    if baseline_path is None and not args.no_baseline and BASELINE_PATH.exists() and \
+            Path(args.output or "").resolve() != BASELINE_PATH.resolve():
+        baseline_path = BASELINE_PATH
+    if baseline_path is None or args.no_baseline:
+        for name, result in results.items():
+            print(f"{name:<36} {result['ops_per_sec']:>14.1f} ops/s")
+        return
+
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+
+    if baseline.get('scale', 1.0) != args.scale:
+        print(f"The baseline was recorded with --scale {baseline.get('scale', 1.0)}, the operations per second may "
+              f"not be comparable", file=sys.stderr)
+    speed = calibration / baseline['calibration'] if 'calibration' in baseline else 1.0
+    regressions = compare(results, baseline['results'], args.threshold, speed)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed more than the accepted slowdown: {', '.join(regressions)}")
+        # the committed baseline was recorded on another machine, so it only fails the run when it is given explicitly
+        if args.baseline is not None:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
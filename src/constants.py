@@ -1,58 +1,59 @@
-import importlib
-import os
-import pkgutil
-from inspect import isclass, getfile, getmodule
-from pathlib import Path
+from collections.abc import Mapping
 
-from games.connect4.simulator import Connect4Simulator
-from games.hlpoker.simulator import HLPokerSimulator
-from games.minesweeper.simulator import MinesweeperSimulator
+from registry import GAMES, PlayerRegistry, import_attribute
 
-AVAILABLE_GAME_TYPES = {
-    "hlpoker":      HLPokerSimulator,
-    "connect4":     Connect4Simulator,
-    "minesweeper":  MinesweeperSimulator
-}
 
+class LazyMapping(Mapping):
+    """
+    a read-only dictionary with a fixed set of keys, whose values are only computed (and imported) when they are
+    first read
+    """
 
-def __get_player_types(base_class):
-    subclasses = []
+    def __init__(self, keys, load):
+        self.__keys = list(keys)
+        self.__load = load
+        self.__values = {}
 
-    # Find the directory of the module where the base_class is defined
-    base_class_module = getmodule(base_class)
-    if not base_class_module:
-        raise ValueError("Base class module could not be found")
+    def __getitem__(self, key):
+        if key not in self.__keys:
+            raise KeyError(key)
+        if key not in self.__values:
+            self.__values[key] = self.__load(key)
+        return self.__values[key]
 
-    base_class_dir = Path(getfile(base_class_module)).parent
-    base_module_name = base_class_module.__name__.rsplit('.', 1)[0]
-    players_dir = base_class_dir / 'players'
+    def __contains__(self, key):
+        return key in self.__keys
 
-    # Check if the players subfolder exists
-    if not players_dir.is_dir():
-        raise ValueError(f"No 'players' subfolder found in {base_class_dir}")
+    def __iter__(self):
+        return iter(self.__keys)
 
-    # Recursively walk through the players directory and import modules
-    for importer, modname, ispkg in pkgutil.walk_packages(path=[str(players_dir)], prefix=base_module_name + '.players.'):
-        try:
-            module = importlib.import_module(modname)
-            for attribute_name in dir(module):
-                attribute = getattr(module, attribute_name)
-                if isclass(attribute) and issubclass(attribute, base_class) and attribute is not base_class:
-                    subclasses.append(attribute)
-        except ImportError:
-            continue  # Skip modules that can't be imported
+    def __len__(self):
+        return len(self.__keys)
 
-    return subclasses
 
-def __build_available_player_types():
-    ret = {}
-    for game_type in AVAILABLE_GAME_TYPES:
-        simulator_type = AVAILABLE_GAME_TYPES[game_type]
-        ret[game_type] = __get_player_types(simulator_type.get_player_type())
-    return ret
+"""
+The manifest of the player classes of every game (see registry.py)
+"""
+PLAYER_REGISTRY = PlayerRegistry()
 
+"""
+The available simulator classes, by game. A simulator is only imported when its game is read
+"""
+AVAILABLE_GAME_TYPES = LazyMapping(GAMES.keys(), lambda game_type: import_attribute(GAMES[game_type]['simulator']))
+
+"""
+The available player classes, by game. Reading a game imports all its players, so prefer get_player_type
+"""
+AVAILABLE_PLAYER_TYPES = LazyMapping(GAMES.keys(), PLAYER_REGISTRY.get_player_types)
 
 """
-The available player classes
+Finds the player class with the given name among the available player types of a game. Only the module of that
+player is imported
+:param game_type: the key of the game in AVAILABLE_GAME_TYPES
+:param type_name: the name of the player class
+:returns: the player class or None if no player type matches
 """
-AVAILABLE_PLAYER_TYPES = __build_available_player_types()
\ No newline at end of file
+def get_player_type(game_type, type_name):
+    if game_type not in GAMES:
+        return None
+    return PLAYER_REGISTRY.get_player_type(game_type, type_name)
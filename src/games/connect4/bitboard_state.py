@@ -0,0 +1,313 @@
+from termcolor import colored
+
+from games.connect4.action import Connect4Action
+from games.connect4.result import Connect4Result
+from games.connect4.state import Connect4State
+from games.connect4.zobrist import get_canonical_hash, get_zobrist_keys
+from games.state import State
+
+
+class BitboardConnect4State(State):
+    """
+    a connect 4 state with the same behaviour as Connect4State, stored in two bitboards (one integer per player)
+    and the height of each column. the board is stored column by column, from the bottom, with an empty bit on top
+    of each column so that lines never wrap to the next column: the cell (row, col), where row 0 is the top row as in
+    the grid, is the bit col * (num_rows + 1) + (num_rows - 1 - row).
+    dropping a checker, checking for a winner and cloning the state are a few integer operations, whatever the size
+    of the board. the grid is only built when a player asks for it, and then kept up to date by each update
+    """
+
+    EMPTY_CELL = Connect4State.EMPTY_CELL
+
+    """
+    the actions of each column, by number of columns. actions can not be changed, so they are shared by all states
+    """
+    __ACTIONS = {}
+
+    def __init__(self, num_rows: int = 6, num_cols: int = 7):
+        super().__init__()
+
+        if num_rows < 4:
+            raise Exception("the number of rows must be 4 or over")
+        if num_cols < 4:
+            raise Exception("the number of cols must be 4 or over")
+
+        """
+        the dimensions of the board
+        """
+        self.__num_rows = num_rows
+        self.__num_cols = num_cols
+
+        """
+        the checkers of each player
+        """
+        self.__boards = [0, 0]
+
+        """
+        the bit of the next checker of each column
+        """
+        self.__heights = [col * (num_rows + 1) for col in range(num_cols)]
+
+        """
+        counts the number of turns in the current game
+        """
+        self.__turns_count = 1
+
+        """
+        the index of the current acting player
+        """
+        self.__acting_player = 0
+
+        """
+        determine if a winner was found already
+        """
+        self.__has_winner = False
+
+        """
+        the moves played on this state since it was created or cloned, so they can be undone (see
+        Connect4State.undo)
+        """
+        self.__moves = []
+
+        """
+        the zobrist hash of the position and of its mirror, the same as the ones of Connect4State
+        """
+        self.__zobrist_keys = get_zobrist_keys(num_rows, num_cols)
+        self.__hash = 0
+        self.__mirror_hash = 0
+
+        """
+        the grid (built when it is first read) and the possible actions (built when they are first read after each
+        update)
+        """
+        self.__grid = None
+        self.__possible_actions = None
+
+    @staticmethod
+    def get_column_actions(num_cols):
+        actions = BitboardConnect4State.__ACTIONS.get(num_cols)
+        if actions is None:
+            actions = tuple(Connect4Action(col) for col in range(num_cols))
+            BitboardConnect4State.__ACTIONS[num_cols] = actions
+        return actions
+
+    """
+    checks if a board has 4 checkers in a line: for each direction, the checkers that have a neighbour in that
+    direction are found with a shift, and those with a neighbour of a neighbour with a second shift
+    """
+    def __check_winner(self, board):
+        stride = self.__num_rows + 1
+        for shift in (1, stride, stride - 1, stride + 1):
+            pairs = board & (board >> shift)
+            if pairs & (pairs >> (2 * shift)):
+                return True
+        return False
+
+    def get_grid(self):
+        if self.__grid is None:
+            board0, board1 = self.__boards
+            stride = self.__num_rows + 1
+            empty = BitboardConnect4State.EMPTY_CELL
+            self.__grid = [
+                [
+                    0 if board0 >> bit & 1 else 1 if board1 >> bit & 1 else empty
+                    for bit in range(self.__num_rows - 1 - row, self.__num_cols * stride, stride)
+                ]
+                for row in range(self.__num_rows)
+            ]
+        return self.__grid
+
+    """
+    gets the player of the checker of a cell (0 or 1), or EMPTY_CELL
+    :param row: the row of the cell, where 0 is the top row
+    """
+    def get_cell(self, row, col):
+        bit = 1 << (col * (self.__num_rows + 1) + self.__num_rows - 1 - row)
+        if self.__boards[0] & bit:
+            return 0
+        if self.__boards[1] & bit:
+            return 1
+        return BitboardConnect4State.EMPTY_CELL
+
+    """
+    gets the checkers of a player, as a bitboard (see the layout of the class)
+    """
+    def get_board(self, player):
+        return self.__boards[player]
+
+    def get_num_players(self):
+        return 2
+
+    def validate_action(self, action: Connect4Action) -> bool:
+        col = action.get_col()
+
+        # valid column
+        if col < 0 or col >= self.__num_cols:
+            return False
+
+        # full column
+        return self.__heights[col] < col * (self.__num_rows + 1) + self.__num_rows
+
+    def update(self, action: Connect4Action):
+        col = action.get_col()
+        self.__moves.append(col * 2 + self.__has_winner)
+
+        # drop the checker
+        height = self.__heights[col]
+        board = self.__boards[self.__acting_player] | (1 << height)
+        self.__boards[self.__acting_player] = board
+        self.__heights[col] = height + 1
+        row = self.__num_rows - 1 - (height - col * (self.__num_rows + 1))
+        self.__toggle_hash(self.__acting_player, row, col)
+
+        # the grid is kept up to date once it was built, like the grid of Connect4State
+        if self.__grid is not None:
+            self.__grid[row][col] = self.__acting_player
+
+        # determine if there is a winner
+        self.__has_winner = self.__check_winner(board)
+
+        # switch to next player
+        self.__acting_player = 1 - self.__acting_player
+
+        self.__turns_count += 1
+        self.__possible_actions = None
+
+    """
+    Reverts the last move played on this state (see Connect4State.undo)
+    """
+    def undo(self):
+        if not self.__moves:
+            raise Exception("there is no move to undo")
+        move = self.__moves.pop()
+        col = move >> 1
+
+        # remove the checker of the player that played it
+        self.__acting_player = 1 - self.__acting_player
+        height = self.__heights[col] - 1
+        self.__heights[col] = height
+        self.__boards[self.__acting_player] &= ~(1 << height)
+        row = self.__num_rows - 1 - (height - col * (self.__num_rows + 1))
+        self.__toggle_hash(self.__acting_player, row, col)
+        if self.__grid is not None:
+            self.__grid[row][col] = BitboardConnect4State.EMPTY_CELL
+
+        self.__has_winner = bool(move & 1)
+        self.__turns_count -= 1
+        self.__possible_actions = None
+
+    # adds or removes a checker from the hashes of the position and of its mirror
+    def __toggle_hash(self, player, row, col):
+        index = (player * self.__num_rows + row) * self.__num_cols
+        self.__hash ^= self.__zobrist_keys[index + col]
+        self.__mirror_hash ^= self.__zobrist_keys[index + self.__num_cols - 1 - col]
+
+    """
+    Gets the 64-bit hash of the position (see Connect4State.get_hash)
+    """
+    def get_hash(self):
+        return get_canonical_hash(self.__hash, self.__mirror_hash)[0]
+
+    """
+    Checks if the hash of the position is the one of its mirror (see Connect4State.is_hash_mirrored)
+    """
+    def is_hash_mirrored(self):
+        return get_canonical_hash(self.__hash, self.__mirror_hash)[1]
+
+    """
+    Gets the 64-bit hash of the position, without sharing it with its mirror (see Connect4State.get_position_hash)
+    """
+    def get_position_hash(self):
+        return self.__hash
+
+    def __display_cell(self, row, col):
+        cell_value = self.get_cell(row, col)
+        if cell_value == 0:
+            # Player 1 - Red
+            print(colored('●', 'red'), end="")
+        elif cell_value == 1:
+            # Player 2 - Blue
+            print(colored('○', 'blue'), end="")
+        else:
+            # Empty cell
+            print(' ', end="")
+
+    def __display_numbers(self):
+        for col in range(0, self.__num_cols):
+            if col < 10:
+                print(' ', end="")
+            print(col, end="")
+        print("")
+
+    def __display_separator(self):
+        for col in range(0, self.__num_cols):
+            print("--", end="")
+        print("-")
+
+    def display(self):
+        self.__display_numbers()
+        self.__display_separator()
+
+        for row in range(0, self.__num_rows):
+            print('|', end="")
+            for col in range(0, self.__num_cols):
+                self.__display_cell(row, col)
+                print('|', end="")
+            print("")
+            self.__display_separator()
+
+        self.__display_numbers()
+        print("")
+
+    def __is_full(self):
+        return self.__turns_count > (self.__num_cols * self.__num_rows)
+
+    def is_finished(self) -> bool:
+        return self.__has_winner or self.__is_full()
+
+    def get_acting_player(self) -> int:
+        return self.__acting_player
+
+    def clone(self):
+        cloned_state = BitboardConnect4State.__new__(BitboardConnect4State)
+        cloned_state.__num_rows = self.__num_rows
+        cloned_state.__num_cols = self.__num_cols
+        cloned_state.__boards = self.__boards.copy()
+        cloned_state.__heights = self.__heights.copy()
+        cloned_state.__turns_count = self.__turns_count
+        cloned_state.__acting_player = self.__acting_player
+        cloned_state.__has_winner = self.__has_winner
+        cloned_state.__moves = []
+        cloned_state.__zobrist_keys = self.__zobrist_keys
+        cloned_state.__hash = self.__hash
+        cloned_state.__mirror_hash = self.__mirror_hash
+        cloned_state.__grid = None
+        cloned_state.__possible_actions = self.__possible_actions
+        return cloned_state
+
+    def get_result(self, pos):
+        if self.__has_winner:
+            return Connect4Result.LOOSE.value if pos == self.__acting_player else Connect4Result.WIN.value
+        if self.__is_full():
+            return Connect4Result.DRAW.value
+        return None
+
+    def get_num_rows(self):
+        return self.__num_rows
+
+    def get_num_cols(self):
+        return self.__num_cols
+
+    def before_results(self):
+        pass
+
+    def get_possible_actions(self):
+        if self.__possible_actions is None:
+            top = self.__num_rows
+            stride = self.__num_rows + 1
+            self.__possible_actions = [
+                action for col, action in enumerate(BitboardConnect4State.get_column_actions(self.__num_cols))
+                if self.__heights[col] - col * stride < top
+            ]
+        # a new list, so that the players can change it
+        return list(self.__possible_actions)
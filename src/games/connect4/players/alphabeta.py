@@ -0,0 +1,119 @@
+from games.connect4.action import Connect4Action
+from games.connect4.player import Connect4Player
+from games.connect4.search import AlphaBetaSearch
+from games.connect4.state import Connect4State
+from games.state import State
+
+
+class AlphaBetaConnect4Player(Connect4Player):
+    """
+    a player that searches with AlphaBetaSearch (see search.py) for a fixed time per move, or for a share of its
+    remaining time when the game has time controls. its evaluation counts the lines of 4 cells that only one player
+    can still complete, weighted by how many checkers of that player they already have
+    """
+
+    # this player ignores the actions and the end of the game
+    SUBSCRIBED_EVENTS = frozenset()
+
+    """
+    the value of a line of 4 cells with 1, 2 and 3 checkers of a single player
+    """
+    LINE_VALUES = (0, 1, 5, 50)
+
+    """
+    the share of the remaining time that is used by each move
+    """
+    TIME_SHARE = 0.25
+
+    """
+    :param move_time: the time of each search, in seconds
+    :param max_depth: the maximum depth of each search (None for no limit)
+    """
+    def __init__(self, name, move_time: float = 0.1, max_depth: int = None):
+        super().__init__(name)
+        self.__move_time = move_time
+        self.__max_depth = max_depth
+        # the evaluation gives mirrored positions the same value (see __get_lines)
+        self.__search = AlphaBetaSearch(self.evaluate, symmetric=True)
+
+        """
+        the cells of each line of 4, for the size of the current board
+        """
+        self.__lines = []
+        self.__lines_size = None
+
+        """
+        the number of searches, their total of nodes and of completed depths
+        """
+        self.__searches = 0
+        self.__nodes = 0
+        self.__depths = 0
+
+    def get_action(self, state: Connect4State) -> Connect4Action:
+        time_budget = self.__move_time
+        remaining_time = self.get_remaining_time()
+        if remaining_time is not None:
+            time_budget = min(time_budget, remaining_time * AlphaBetaConnect4Player.TIME_SHARE)
+
+        action = self.__search.search(state, self.__max_depth, time_budget)
+
+        stats = self.__search.get_stats()
+        self.__searches += 1
+        self.__nodes += stats.nodes
+        self.__depths += stats.depth
+        return action
+
+    """
+    gets the value of a state from the point of view of the player to move
+    """
+    def evaluate(self, state: Connect4State) -> int:
+        size = (state.get_num_rows(), state.get_num_cols())
+        if self.__lines_size != size:
+            self.__lines = AlphaBetaConnect4Player.__get_lines(*size)
+            self.__lines_size = size
+
+        grid = state.get_grid()
+        player = state.get_acting_player()
+        line_values = AlphaBetaConnect4Player.LINE_VALUES
+        score = 0
+        for line in self.__lines:
+            own = 0
+            other = 0
+            for row, col in line:
+                cell = grid[row][col]
+                if cell == player:
+                    own += 1
+                elif cell != Connect4State.EMPTY_CELL:
+                    other += 1
+            if other == 0:
+                score += line_values[own]
+            elif own == 0:
+                score -= line_values[other]
+        return score
+
+    # the lines of 4 cells in every direction. the set of lines is its own mirror, so mirrored positions get the same
+    # value, and the search can share their entries in its table
+    @staticmethod
+    def __get_lines(num_rows, num_cols):
+        lines = []
+        for row in range(num_rows):
+            for col in range(num_cols):
+                for delta_row, delta_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_row = row + 3 * delta_row
+                    end_col = col + 3 * delta_col
+                    if end_row < num_rows and 0 <= end_col < num_cols:
+                        lines.append(tuple((row + i * delta_row, col + i * delta_col) for i in range(4)))
+        return lines
+
+    def print_stats(self):
+        if self.__searches > 0:
+            print(f"{self.get_name()}: {self.__searches} searches, {self.__nodes // self.__searches} nodes and "
+                  f"depth {self.__depths / self.__searches:.1f} per search")
+
+    def event_action(self, pos: int, action, new_state: State):
+        # ignore
+        pass
+
+    def event_end_game(self, final_state: State):
+        # ignore
+        pass
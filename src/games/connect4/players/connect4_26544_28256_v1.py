@@ -4,21 +4,37 @@ from games.connect4.player import Connect4Player
 from games.connect4.state import Connect4State
 from games.state import State
 from games.connect4.result import Connect4Result
+from games.connect4.transposition import TranspositionTable
 
 class connect4_26544_28256_v1(Connect4Player):
+    # this player ignores the actions and the end of the game
+    SUBSCRIBED_EVENTS = frozenset()
 
     def __init__(self, name, depth=4):
         super().__init__(name)
         self.depth = depth
+        # The values of the positions that were already searched, kept between moves
+        self.table = TranspositionTable(16)
 
     def get_action(self, state: Connect4State):
-        # Call Minimax to find the best solution
-        return self.minimax(state, self.depth, True)[1]
+        # Call Minimax to find the best solution, on a single copy of the state where the moves are played and undone
+        return self.minimax(state.clone(), self.depth, True)[1]
 
     def minimax(self, state: Connect4State, depth: int, is_maximizing: bool):
+        # A position reached through another order of moves is only searched once per depth. The evaluation does not
+        # give a position and its mirror the same value, so the key is not shared with the mirror. The values are from
+        # the point of view of this player, so the key includes its seat
+        key = state.get_position_hash() ^ self.get_current_pos()
+        if depth < self.depth:
+            entry = self.table.get(key)
+            if entry is not None and entry.depth == depth:
+                return entry.value, None
+
         if depth == 0 or state.is_finished():
             # Return the state evaluation
-            return self.evaluate(state), None
+            value = self.evaluate(state)
+            self.table.put(key, depth, value)
+            return value, None
 
         possible_actions = state.get_possible_actions()
 
@@ -26,27 +42,29 @@ class connect4_26544_28256_v1(Connect4Player):
             max_eval = float('-inf')
             best_action = None
             for action in possible_actions:
-                # Clone the state to simulate the play
-                new_state = state.clone()
-                new_state.update(action)
+                # Simulate the play, and undo it after the search
+                state.update(action)
                 # Call minimax recursively to alternate players
-                eval, _ = self.minimax(new_state, depth - 1, False)
+                eval, _ = self.minimax(state, depth - 1, False)
+                state.undo()
                 if eval > max_eval:
                     max_eval = eval
                     best_action = action
+            self.table.put(key, depth, max_eval)
             return max_eval, best_action
         else:
             min_eval = float('inf')
             worst_action = None
             for action in possible_actions:
-                # Clone the state to simulate the play
-                new_state = state.clone()
-                new_state.update(action)
+                # Simulate the play, and undo it after the search
+                state.update(action)
                 # Call minimax recursively to alternate players
-                eval, _ = self.minimax(new_state, depth - 1, True)
+                eval, _ = self.minimax(state, depth - 1, True)
+                state.undo()
                 if eval < min_eval:
                     min_eval = eval
                     worst_action = action
+            self.table.put(key, depth, min_eval)
             return min_eval, worst_action
 
     def evaluate(self, state: Connect4State):
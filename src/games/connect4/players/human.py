@@ -7,6 +7,8 @@ from games.connect4.state import Connect4State
 
 
 class HumanConnect4Player(Connect4Player):
+    # this player only needs the final state of the game
+    SUBSCRIBED_EVENTS = frozenset({Connect4Player.EVENT_END_GAME})
 
     def __init__(self, name):
         super().__init__(name)
@@ -0,0 +1,266 @@
+from collections import namedtuple
+from time import perf_counter
+
+from games.connect4.action import Connect4Action
+from games.connect4.result import Connect4Result
+from games.connect4.transposition import EXACT, LOWER, NO_MOVE, UPPER, TranspositionTable
+
+"""
+The value of a won position. Wins found sooner are worth more (WIN_VALUE minus the number of moves to the win), so
+the evaluations must stay below MAX_EVALUATION
+"""
+WIN_VALUE = 1000000
+MAX_EVALUATION = WIN_VALUE // 2
+
+"""
+The statistics of a search
+    - move: the best column found
+    - value: its value, from the point of view of the player to move
+    - depth: the depth of the last iteration that was completed
+    - nodes: the number of positions visited, in all iterations
+    - seconds: the time of the search
+"""
+SearchStats = namedtuple('SearchStats', ['move', 'value', 'depth', 'nodes', 'seconds'])
+
+
+class SearchTimeout(Exception):
+    """
+    raised inside a search when its time budget runs out
+    """
+    pass
+
+
+"""
+Adapts an evaluation from the point of view of a fixed player (like the evaluate method of most players) to the
+point of view of the player to move, as AlphaBetaSearch expects. most of these evaluations do not give a position and
+its mirror the same value, so the search must keep the default symmetric=False
+:param evaluate: function that gets the value of a state for the player in the seat pos
+"""
+def from_player_view(evaluate, pos: int):
+    def evaluate_for_player_to_move(state):
+        value = evaluate(state)
+        return value if state.get_acting_player() == pos else -value
+    return evaluate_for_player_to_move
+
+
+class AlphaBetaSearch:
+    """
+    a search engine for connect 4 players: negamax with alpha-beta pruning, iterative deepening under a time budget and
+    a transposition table (see transposition.py). the moves of each position are tried in this order: the best move
+    stored in the table, the killer moves of the ply (moves that caused a cutoff in a sibling position), then by
+    history score (how often and how deep each column caused cutoffs) and by distance to the centre.
+    the moves are played and undone on a single copy of the state (see Connect4State.undo), so the search does not
+    allocate a state per node.
+    players plug their own evaluation, which gets a state that is not finished and returns an integer value from the
+    point of view of the player to move (see from_player_view). the table is keyed on the hash of each position
+    (see Connect4State.get_position_hash). an evaluation that gives a position and its mirror the same value can set
+    symmetric, so that both share the entry of the canonical hash (see Connect4State.get_hash)
+    """
+
+    """
+    the number of nodes between two checks of the clock
+    """
+    CLOCK_INTERVAL = 256
+
+    """
+    :param evaluate: the evaluation of the positions at the maximum depth
+    :param table: the transposition table (None for a private table, see get_shared_table to share one)
+    :param symmetric: indicates if the evaluation gives a position and its mirror the same value
+    """
+    def __init__(self, evaluate, table: TranspositionTable = None, symmetric: bool = False):
+        self.__evaluate = evaluate
+        self.__table = TranspositionTable(18) if table is None else table
+        self.__symmetric = symmetric
+
+        """
+        the two killer moves of each ply, and the history score of each column
+        """
+        self.__killers = []
+        self.__history = []
+
+        """
+        the actions of each column and the order of the columns from the centre, for the size of the current board
+        """
+        self.__actions = []
+        self.__centre_order = []
+
+        self.__nodes = 0
+        self.__deadline = None
+        self.__stats = None
+
+    def get_table(self):
+        return self.__table
+
+    """
+    gets the statistics of the last search
+    """
+    def get_stats(self) -> SearchStats:
+        return self.__stats
+
+    """
+    searches the best move of a state with iterative deepening: the depth grows by one until the maximum depth is
+    reached, a win or a loss is proven, or the time budget runs out. the result of the last completed depth is kept
+    :param max_depth: the maximum depth (None for the number of empty cells, i.e. until the end of the game)
+    :param time_budget: the time of the search, in seconds (None for no limit)
+    :returns: the best action
+    """
+    def search(self, state, max_depth: int = None, time_budget: float = None) -> Connect4Action:
+        start = perf_counter()
+        num_cols = state.get_num_cols()
+        if len(self.__actions) != num_cols:
+            self.__actions = [Connect4Action(col) for col in range(num_cols)]
+            centre = (num_cols - 1) / 2
+            self.__centre_order = sorted(range(num_cols), key=lambda col: abs(col - centre))
+            self.__history = [0] * num_cols
+        else:
+            # older cutoffs count less than the ones of the current search
+            self.__history = [score // 2 for score in self.__history]
+
+        empty_cells = sum(row.count(-1) for row in state.get_grid())
+        max_depth = empty_cells if max_depth is None else min(max_depth, empty_cells)
+
+        # the search plays and undoes its moves on its own copy of the state
+        state = state.clone()
+        self.__table.new_search()
+        self.__killers = [[NO_MOVE, NO_MOVE] for _ in range(max_depth + 1)]
+        self.__nodes = 0
+        self.__deadline = None if time_budget is None else start + time_budget
+
+        best_move, best_value, completed_depth = None, 0, 0
+        for depth in range(1, max_depth + 1):
+            try:
+                value, move = self.__search_root(state, depth)
+            except SearchTimeout:
+                break
+            best_move, best_value, completed_depth = move, value, depth
+            if abs(value) > MAX_EVALUATION:
+                break
+
+        if best_move is None:
+            # not even the first depth was completed: the move of the table or the most central legal move
+            best_move = self.__order_moves(state, 0, self.__get_table_move(state))[0]
+
+        self.__stats = SearchStats(best_move, best_value, completed_depth, self.__nodes, perf_counter() - start)
+        return self.__actions[best_move]
+
+    def __search_root(self, state, depth):
+        alpha, beta = -WIN_VALUE - 1, WIN_VALUE + 1
+        best_move = NO_MOVE
+        for col in self.__order_moves(state, 0, self.__get_table_move(state)):
+            state.update(self.__actions[col])
+            try:
+                value = -self.__negamax(state, depth - 1, -beta, -alpha, 1)
+            finally:
+                state.undo()
+            if value > alpha:
+                alpha, best_move = value, col
+
+        self.__store(state, depth, alpha, EXACT, best_move, 0)
+        return alpha, best_move
+
+    def __negamax(self, state, depth, alpha, beta, ply):
+        self.__nodes += 1
+        if self.__deadline is not None and self.__nodes % AlphaBetaSearch.CLOCK_INTERVAL == 0 and \
+                perf_counter() > self.__deadline:
+            raise SearchTimeout()
+
+        if state.is_finished():
+            # the player to move can only have lost (the previous move ended the game) or drawn
+            if state.get_result(state.get_acting_player()) == Connect4Result.DRAW.value:
+                return 0
+            return -(WIN_VALUE - ply)
+        if depth == 0:
+            return self.__evaluate(state)
+
+        original_alpha = alpha
+        table_move = NO_MOVE
+        entry = self.__table.get(self.__get_key(state))
+        if entry is not None:
+            table_move = self.__unmirror(state, entry.move)
+            if entry.depth >= depth:
+                value = AlphaBetaSearch.__from_table(entry.value, ply)
+                if entry.bound == EXACT:
+                    return value
+                if entry.bound == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best_value, best_move = -WIN_VALUE - 1, NO_MOVE
+        for col in self.__order_moves(state, ply, table_move):
+            state.update(self.__actions[col])
+            try:
+                value = -self.__negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                state.undo()
+
+            if value > best_value:
+                best_value, best_move = value, col
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                self.__add_cutoff(ply, col, depth)
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.__store(state, depth, best_value, bound, best_move, ply)
+        return best_value
+
+    """
+    gets the legal columns of a state, in the order they are searched
+    """
+    def __order_moves(self, state, ply, table_move):
+        killers = self.__killers[ply] if ply < len(self.__killers) else ()
+        history = self.__history
+        moves = [col for col in self.__centre_order if state.validate_action(self.__actions[col])]
+        # the sort is stable, so the columns with the same score stay ordered from the centre
+        moves.sort(key=lambda col: (col != table_move, col not in killers, -history[col]))
+        return moves
+
+    def __add_cutoff(self, ply, col, depth):
+        killers = self.__killers[ply]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+        self.__history[col] += depth * depth
+
+    def __get_table_move(self, state):
+        entry = self.__table.get(self.__get_key(state))
+        return NO_MOVE if entry is None else self.__unmirror(state, entry.move)
+
+    def __get_key(self, state):
+        return state.get_hash() if self.__symmetric else state.get_position_hash()
+
+    # the moves of the table are stored for the canonical position, which may be the mirror of the state
+    def __unmirror(self, state, move):
+        if move == NO_MOVE or not self.__symmetric or not state.is_hash_mirrored():
+            return move
+        return state.get_num_cols() - 1 - move
+
+    def __store(self, state, depth, value, bound, move, ply):
+        self.__table.put(self.__get_key(state), depth, AlphaBetaSearch.__to_table(value, ply), bound,
+                         self.__unmirror(state, move))
+
+    # wins are stored as the number of moves from the stored position, not from the root of the search
+    @staticmethod
+    def __to_table(value, ply):
+        if value > MAX_EVALUATION:
+            return value + ply
+        if value < -MAX_EVALUATION:
+            return value - ply
+        return value
+
+    @staticmethod
+    def __from_table(value, ply):
+        if value > MAX_EVALUATION:
+            return value - ply
+        if value < -MAX_EVALUATION:
+            return value + ply
+        return value
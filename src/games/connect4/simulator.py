@@ -6,16 +6,24 @@ from games.game_simulator import GameSimulator
 
 class Connect4Simulator(GameSimulator):
 
-    def __init__(self, players, num_rows: int = 6, num_cols: int = 7):
+    """
+    :param state_type: the class of the states of the games, Connect4State or BitboardConnect4State (faster, with
+                       the same behaviour)
+    """
+    def __init__(self, players, num_rows: int = 6, num_cols: int = 7, state_type=Connect4State):
         super(Connect4Simulator, self).__init__(players)
         """
         the number of rows and cols from the connect4 grid
         """
         self.__num_rows = num_rows
         self.__num_cols = num_cols
+        self.__state_type = state_type
 
     def on_init_game(self):
-        return Connect4State(self.__num_rows, self.__num_cols)
+        return self.create_state(self.get_rng())
+
+    def create_state(self, rng):
+        return self.__state_type(self.__num_rows, self.__num_cols)
 
     def on_before_end_game(self, state: Connect4State):
         # ignored for this simulator
@@ -29,6 +37,14 @@ class Connect4Simulator(GameSimulator):
         # ignored for this simulator
         pass
 
+    @staticmethod
+    def encode_action(action: Connect4Action) -> int:
+        return action.get_col()
+
+    @staticmethod
+    def decode_action(code: int):
+        return Connect4Action(code)
+
     @staticmethod
     def get_player_type():
         return Connect4Player
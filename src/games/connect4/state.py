@@ -4,6 +4,7 @@ from termcolor import colored
 
 from games.connect4.action import Connect4Action
 from games.connect4.result import Connect4Result
+from games.connect4.zobrist import get_canonical_hash, get_zobrist_keys
 from games.state import State
 
 
@@ -29,6 +30,17 @@ class Connect4State(State):
         """
         self.__grid = [[Connect4State.EMPTY_CELL for _i in range(self.__num_cols)] for _j in range(self.__num_rows)]
 
+        """
+        the number of checkers of each column
+        """
+        self.__heights = [0] * self.__num_cols
+
+        """
+        the moves played on this state since it was created or cloned, so they can be undone. each move is stored as
+        a single small int (the column and whether there was a winner before it), so a move allocates nothing
+        """
+        self.__moves = []
+
         """
         counts the number of turns in the current game
         """
@@ -44,7 +56,45 @@ class Connect4State(State):
         """
         self.__has_winner = False
 
-    def __check_winner(self, player):
+        """
+        the zobrist hash of the position and of its mirror, updated with each move (see zobrist.py)
+        """
+        self.__zobrist_keys = get_zobrist_keys(num_rows, num_cols)
+        self.__hash = 0
+        self.__mirror_hash = 0
+
+    """
+    checks if the checker at (row, col) completes a line of 4. only the 4 lines through that cell can have changed,
+    and at most 3 cells are read on each side of it, so the cost of a move does not depend on the size of the board
+    """
+    def __check_last_move(self, row, col):
+        player = self.__grid[row][col]
+        for delta_row, delta_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            count = 1 + self.__count_line(row, col, delta_row, delta_col, player) + \
+                    self.__count_line(row, col, -delta_row, -delta_col, player)
+            if count >= 4:
+                return True
+        return False
+
+    """
+    counts the checkers of a player next to a cell in a direction (up to 3)
+    """
+    def __count_line(self, row, col, delta_row, delta_col, player):
+        count = 0
+        row += delta_row
+        col += delta_col
+        while count < 3 and 0 <= row < self.__num_rows and 0 <= col < self.__num_cols and \
+                self.__grid[row][col] == player:
+            count += 1
+            row += delta_row
+            col += delta_col
+        return count
+
+    """
+    checks the whole board for 4 checkers of a player in a line. update only checks the lines through the last
+    checker (see __check_last_move), this full scan is kept to verify it
+    """
+    def check_winner_full(self, player):
         # check for 4 across
         for row in range(0, self.__num_rows):
             for col in range(0, self.__num_cols - 3):
@@ -104,21 +154,69 @@ class Connect4State(State):
 
     def update(self, action: Connect4Action):
         col = action.get_col()
+        self.__moves.append(col * 2 + self.__has_winner)
 
         # drop the checker
-        for row in range(self.__num_rows - 1, -1, -1):
-            if self.__grid[row][col] < 0:
-                self.__grid[row][col] = self.__acting_player
-                break
+        row = self.__num_rows - 1 - self.__heights[col]
+        self.__grid[row][col] = self.__acting_player
+        self.__heights[col] += 1
+        self.__toggle_hash(self.__acting_player, row, col)
 
         # determine if there is a winner
-        self.__has_winner = self.__check_winner(self.__acting_player)
+        self.__has_winner = self.__check_last_move(row, col)
 
         # switch to next player
         self.__acting_player = 1 if self.__acting_player == 0 else 0
 
         self.__turns_count += 1
 
+    """
+    Reverts the last move played on this state (see update), in constant time. Only the moves played since the state
+    was created or cloned can be undone, so searches can play and undo moves on a single clone of the state
+    """
+    def undo(self):
+        if not self.__moves:
+            raise Exception("there is no move to undo")
+        move = self.__moves.pop()
+        col = move >> 1
+
+        # remove the checker
+        self.__acting_player = 1 if self.__acting_player == 0 else 0
+        self.__heights[col] -= 1
+        row = self.__num_rows - 1 - self.__heights[col]
+        self.__grid[row][col] = Connect4State.EMPTY_CELL
+        self.__toggle_hash(self.__acting_player, row, col)
+
+        self.__has_winner = bool(move & 1)
+        self.__turns_count -= 1
+
+    # adds or removes a checker from the hashes of the position and of its mirror
+    def __toggle_hash(self, player, row, col):
+        index = (player * self.__num_rows + row) * self.__num_cols
+        self.__hash ^= self.__zobrist_keys[index + col]
+        self.__mirror_hash ^= self.__zobrist_keys[index + self.__num_cols - 1 - col]
+
+    """
+    Gets the 64-bit hash of the position. A position and its mirror (the board reflected left to right) have the same
+    hash, see is_hash_mirrored
+    """
+    def get_hash(self):
+        return get_canonical_hash(self.__hash, self.__mirror_hash)[0]
+
+    """
+    Checks if the hash of the position is the one of its mirror, in which case the columns stored with the hash must
+    be mirrored (num_cols - 1 - col)
+    """
+    def is_hash_mirrored(self):
+        return get_canonical_hash(self.__hash, self.__mirror_hash)[1]
+
+    """
+    Gets the 64-bit hash of the position, without sharing it with its mirror, for the caches of evaluations that may
+    give a position and its mirror different values
+    """
+    def get_position_hash(self):
+        return self.__hash
+
     def __display_cell(self, row, col):
         cell_value = self.__grid[row][col]
         if cell_value == 0:
@@ -172,6 +270,9 @@ class Connect4State(State):
         cloned_state.__turns_count = self.__turns_count
         cloned_state.__acting_player = self.__acting_player
         cloned_state.__has_winner = self.__has_winner
+        cloned_state.__heights = self.__heights.copy()
+        cloned_state.__hash = self.__hash
+        cloned_state.__mirror_hash = self.__mirror_hash
         for row in range(0, self.__num_rows):
             for col in range(0, self.__num_cols):
                 cloned_state.__grid[row][col] = self.__grid[row][col]
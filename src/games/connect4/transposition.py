@@ -0,0 +1,143 @@
+from array import array
+from collections import namedtuple
+
+
+"""
+The bounds of a stored value:
+    - EXACT: the value of the position
+    - LOWER: the position is worth at least the value (the search failed high)
+    - UPPER: the position is worth at most the value (the search failed low)
+"""
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+"""
+The move stored with an entry when there is no best move
+"""
+NO_MOVE = -1
+
+"""
+An entry of the transposition table
+    - depth: the depth of the search that computed the value
+    - value: the value of the position (see the bound)
+    - bound: EXACT, LOWER or UPPER
+    - move: the best move found (a column), or NO_MOVE
+"""
+TranspositionEntry = namedtuple('TranspositionEntry', ['depth', 'value', 'bound', 'move'])
+
+
+class TranspositionTable:
+    """
+    a fixed-size cache of the values of the positions visited by a search, by 64-bit position hash (see
+    Connect4State.get_hash). the entries are stored in typed arrays, one per field, so the table never allocates
+    once it is created and its memory is known up front.
+    each hash has a single slot (its lowest bits). when two positions need the same slot, the new one replaces the
+    old one if the old one is from a previous search (see new_search) or was searched to the same depth or less, so
+    the deep (expensive) results of the current search are kept.
+    the values must be from the point of view of the player to move, so a table can be shared by any players and
+    searches that agree on the evaluation
+    """
+
+    """
+    :param size_bits: the table has 2 ** size_bits entries (17 bytes each)
+    """
+    def __init__(self, size_bits: int = 20):
+        if not 1 <= size_bits <= 32:
+            raise ValueError("The size of a transposition table must be between 1 and 32 bits")
+        size = 1 << size_bits
+        self.__mask = size - 1
+
+        self.__keys = array('Q', bytes(8 * size))
+        self.__values = array('i', bytes(4 * size))
+        self.__depths = array('h', bytes(2 * size))
+        self.__moves = array('b', bytes(size))
+        self.__bounds = array('B', bytes(size))
+
+        """
+        the search that stored each entry, 0 for the empty slots
+        """
+        self.__generations = array('B', bytes(size))
+        self.__generation = 1
+
+        """
+        the number of lookups and of lookups that found their position
+        """
+        self.__probes = 0
+        self.__hits = 0
+
+    def __len__(self):
+        return len(self.__keys)
+
+    # the entries are only a cache, so a table is sent to another process (e.g. with its player) empty
+    def __getstate__(self):
+        return self.__mask.bit_length()
+
+    def __setstate__(self, size_bits):
+        self.__init__(size_bits)
+
+    """
+    gets the stored entry of a position
+    :returns: the TranspositionEntry or None if the position is not in the table
+    """
+    def get(self, key: int):
+        self.__probes += 1
+        index = key & self.__mask
+        if self.__generations[index] == 0 or self.__keys[index] != key:
+            return None
+        self.__hits += 1
+        return TranspositionEntry(self.__depths[index], self.__values[index], self.__bounds[index],
+                                  self.__moves[index])
+
+    """
+    stores the result of the search of a position, unless its slot holds a deeper result of the current search
+    :param value: an integer value (32 bits)
+    """
+    def put(self, key: int, depth: int, value: int, bound: int = EXACT, move: int = NO_MOVE):
+        index = key & self.__mask
+        if self.__generations[index] == self.__generation and self.__keys[index] != key and \
+                self.__depths[index] > depth:
+            return
+        self.__keys[index] = key
+        self.__values[index] = value
+        self.__depths[index] = depth
+        self.__bounds[index] = bound
+        self.__moves[index] = move
+        self.__generations[index] = self.__generation
+
+    """
+    starts a new search: the entries of the previous searches are kept, but they are the first to be replaced
+    """
+    def new_search(self):
+        # 0 marks the empty slots, so the generations go from 1 to 255
+        self.__generation = self.__generation % 255 + 1
+
+    def clear(self):
+        for column in (self.__keys, self.__values, self.__depths, self.__moves, self.__bounds, self.__generations):
+            column[:] = array(column.typecode, bytes(column.itemsize * len(column)))
+        self.__probes = 0
+        self.__hits = 0
+
+    def get_probes(self):
+        return self.__probes
+
+    def get_hits(self):
+        return self.__hits
+
+
+"""
+The tables shared by the players of a process, by name
+"""
+_SHARED_TABLES = {}
+
+
+"""
+Gets a table shared by all the players (of the same process) that ask for the same name, so that players that
+search with the same evaluation reuse each other's results
+"""
+def get_shared_table(name: str = "default", size_bits: int = 20) -> TranspositionTable:
+    table = _SHARED_TABLES.get(name)
+    if table is None:
+        table = TranspositionTable(size_bits)
+        _SHARED_TABLES[name] = table
+    return table
@@ -0,0 +1,43 @@
+import random
+
+from games.rng import derive_seed
+
+
+"""
+The Zobrist keys of the boards of each size, built once per size
+"""
+_KEYS = {}
+
+
+"""
+Gets the Zobrist keys of a board: a random 64-bit key for each player and cell. The hash of a position is the xor of
+the keys of its checkers, so it is updated with a single xor when a checker is dropped or removed. The keys are
+derived from the size of the board, so the hashes are the same in every process and every run
+:returns: a flat list, where the key of a checker of a player at (row, col) is at get_key_index(...)
+"""
+def get_zobrist_keys(num_rows: int, num_cols: int) -> list:
+    keys = _KEYS.get((num_rows, num_cols))
+    if keys is None:
+        rng = random.Random(derive_seed("connect4-zobrist", num_rows, num_cols))
+        keys = [rng.getrandbits(64) for _ in range(2 * num_rows * num_cols)]
+        _KEYS[(num_rows, num_cols)] = keys
+    return keys
+
+
+"""
+Gets the index of the key of a checker in the list of get_zobrist_keys
+"""
+def get_key_index(num_rows: int, num_cols: int, player: int, row: int, col: int) -> int:
+    return (player * num_rows + row) * num_cols + col
+
+
+"""
+Gets the canonical hash of a position from its hash and the hash of its mirror (the board reflected left to right):
+a position and its mirror have the same value, so both get the smallest of the two hashes
+:returns: the canonical hash and True if it is the hash of the mirror, in which case the columns stored with the
+          hash (e.g. the best move) are mirrored as well
+"""
+def get_canonical_hash(position_hash: int, mirror_hash: int):
+    if mirror_hash < position_hash:
+        return mirror_hash, True
+    return position_hash, False
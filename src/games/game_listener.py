@@ -0,0 +1,37 @@
+from abc import ABC
+
+
+class GameListener(ABC):
+    """
+    A listener is notified of every game played by a simulator (see GameSimulator.add_listener).
+    Unlike players, listeners do not take part in the game. They can be used to record or export the games.
+    All the methods are optional.
+    """
+
+    """
+    A method that is invoked once a new game starts
+    :param simulator: the simulator running the game
+    :param game_index: the index of the game in the simulator
+    :param game_seed: the seed of the random generator of the game
+    :param permutation: the index of the seat permutation of the game
+    """
+    def event_game_start(self, simulator, game_index: int, game_seed: int, permutation: int):
+        pass
+
+    """
+    A method that is invoked after each action
+    :param game_index: the index of the game in the simulator
+    :param pos: the position of the player that performed the action
+    :param action: the action that was performed
+    """
+    def event_action(self, simulator, game_index: int, pos: int, action):
+        pass
+
+    """
+    A method that is invoked once a game ends
+    :param game_index: the index of the game in the simulator
+    :param result: dictionary with the score of each player
+    :param game_length: the number of actions in the game
+    """
+    def event_game_end(self, simulator, game_index: int, result: dict, game_length: int):
+        pass
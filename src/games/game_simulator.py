@@ -1,11 +1,24 @@
+import random
 from abc import ABC, abstractmethod
+from time import perf_counter
 
 from games.player import Player
+from games.result_store import ResultStore
+from games.rng import derive_seed
+from games.score_ledger import ScoreLedger
 from games.state import State
+from games.state_view import StateViews
+from games.time_control import MoveTimeout, PlayerWorker
 
 
 class GameSimulator(ABC):
 
+    """
+    whether several games can be played at once (see run_simulations). simulators that keep the state of the current
+    game in their own attributes (e.g. the deck of a card game) must disable it
+    """
+    SUPPORTS_BATCHES = True
+
     def __init__(self, players: list):
         # only allow list of players
         assert len(list(filter(lambda p: not isinstance(p, Player), players))) <= 0
@@ -23,7 +36,45 @@ class GameSimulator(ABC):
         self.__current_permutation = 0
 
         # the results of all games between all players
-        self.__results = []
+        self.__results = ResultStore(names)
+
+        # the running score of each player, so that the scores are never summed from the results
+        self.__ledger = ScoreLedger(names)
+
+        # the read-only views of the state handed to the players in the current turn
+        self.__views = StateViews()
+
+        # the seed of the simulator and the name of its stream (e.g. the pairing). when the seed is None, the seeds of
+        # the games are drawn from the global random generator
+        self.__seed = None
+        self.__stream = None
+
+        # the index of the next game (the number of games played, including the ones of merged results)
+        self.__game_index = 0
+
+        # the seed and the random generator of the current game, and the seed of the global random generator of its
+        # players (None when the simulator has no seed)
+        self.__game_seed = None
+        self.__rng = random.Random()
+        self.__players_seed = None
+
+        # the listeners notified of every game (see GameListener)
+        self.__listeners = []
+
+        # measures the latency of the players (None when disabled, see Instrumentation)
+        self.__instrumentation = None
+
+        # the time controls of the games (None when disabled, see TimeControl)
+        self.__time_control = None
+
+        # the number of time controls broken by each player
+        self.__violations = {name: {'timeouts': 0, 'retries': 0} for name in names}
+
+        # the thread that runs the timed calls of each player, created with its first timed call (see PlayerWorker)
+        self.__workers = {}
+
+        # the winner of a pairing that was still a draw after its extra games, and the rule that decided it
+        self.__tiebreak = None
 
     """
     Adapted from https://www.geeksforgeeks.org/heaps-algorithm-for-generating-permutations/
@@ -68,6 +119,17 @@ class GameSimulator(ABC):
         if self.__current_permutation >= len(self.__permutations):
             self.__current_permutation = 0
 
+    # gets the index of the seat permutation of the next game
+    def get_permutation_index(self):
+        return self.__current_permutation
+
+    """
+    Selects the seat permutation of the next game
+    :param index: the number of times the positions were changed since the first game
+    """
+    def set_permutation(self, index: int):
+        self.__current_permutation = index % len(self.__permutations)
+
     """
     starts a new game
     """
@@ -105,17 +167,206 @@ class GameSimulator(ABC):
     def get_player_positions(self):
         return self.__permutations[self.__current_permutation]
 
+    """
+    Sets the seed of the simulator. Each game gets its own random generator, seeded from (seed, stream, game index),
+    so that any game can be regenerated and the games of different streams are independent
+    :param seed: the tournament seed (None to draw the seeds from the global random generator)
+    :param stream: identifies the sequence of games (e.g. the pairing)
+    :param first_game: the index of the next game (e.g. the first game of a shard)
+    """
+    def set_seed(self, seed, stream=None, first_game: int = 0):
+        self.__seed = seed
+        self.__stream = stream
+        self.__game_index = first_game
+
+    """
+    Gets the seed of a game
+    :param game_index: the index of the game in the stream of the simulator
+    """
+    def get_game_seed(self, game_index: int):
+        return derive_seed(self.__seed, self.__stream, game_index)
+
+    """
+    Seeds the random generator of a new game. The global random generator is seeded as well, since most players
+    draw their random choices from it, but from a seed derived apart: the choices of the players must not follow the
+    random draws of the game (e.g. where the mines are)
+    """
+    def __start_game_rng(self):
+        if self.__seed is None:
+            self.__game_seed = random.getrandbits(64)
+        else:
+            self.__game_seed = self.get_game_seed(self.__game_index)
+            self.__players_seed = derive_seed(self.__game_seed, "players")
+            random.seed(self.__players_seed)
+        self.__rng.seed(self.__game_seed)
+        self.__game_index += 1
+
+    """
+    The random generator of the current game. Simulators and states must draw their randomness from here
+    """
+    def get_rng(self) -> random.Random:
+        return self.__rng
+
+    # gets the seed of the current game
+    def get_current_game_seed(self):
+        return self.__game_seed
+
+    # gets the seed of the global random generator in the current game (None when the simulator has no seed)
+    def get_players_seed(self):
+        return self.__players_seed
+
+    # gets the index of the next game
+    def get_game_index(self):
+        return self.__game_index
+
+    """
+    adds a listener that is notified of every game (see GameListener)
+    """
+    def add_listener(self, listener):
+        self.__listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.__listeners.remove(listener)
+
+    """
+    enables the latency instrumentation of the players
+    :param instrumentation: an Instrumentation, or None to disable it
+    """
+    def set_instrumentation(self, instrumentation):
+        self.__instrumentation = instrumentation
+
+    def get_instrumentation(self):
+        return self.__instrumentation
+
+    """
+    enables the time controls of the games
+    :param time_control: a TimeControl, or None to disable them
+    """
+    def set_time_control(self, time_control):
+        self.__time_control = time_control
+
+    def get_time_control(self):
+        return self.__time_control
+
+    """
+    gets the number of time controls broken by each player: {name: {'timeouts': n, 'retries': n}}
+    """
+    def get_violations(self):
+        return self.__violations
+
+    """
+    registers the winner of a drawn pairing decided by a tie-break (see tournament.pairing.resolve_draw)
+    :param name: the name of the winner
+    :param reason: the rule or the statistic that decided it
+    """
+    def set_tiebreak(self, name, reason):
+        self.__tiebreak = (name, reason)
+
+    # gets the winner of the tie-break and its reason, or None
+    def get_tiebreak(self):
+        return self.__tiebreak
+
+    # removes the winner of the tie-break
+    def clear_tiebreak(self):
+        self.__tiebreak = None
+
+    """
+    asks a player for an action under the time controls, in the worker of the player. the clock of the player runs
+    from the first attempt of the move (see PlayerClock.start_move), so each new attempt after an invalid action only
+    gets the time that is left. when the player misses its deadline, the fallback action is played instead
+    :param clock: the clock of the player
+    :param penalties: the penalties of each player in the current game
+    """
+    def __get_timed_action(self, player, state, clock, penalties):
+        instrumentation = self.__instrumentation
+        budget = clock.get_remaining() if self.__time_control.has_deadline() else None
+
+        worker = self.__workers.get(player.get_name())
+        if worker is None:
+            worker = PlayerWorker()
+            self.__workers[player.get_name()] = worker
+
+        start = perf_counter()
+        try:
+            action = worker.call(player.get_action, (self.__views.create(state),), budget)
+        except MoveTimeout:
+            action = self.__apply_violation(player, state, penalties, 'timeouts')
+        elapsed = perf_counter() - start
+
+        if instrumentation is not None:
+            instrumentation.get_histogram(player.get_name(), 'get_action', self.get_game_phase(state)) \
+                .record(int(elapsed * 1e9))
+        return action
+
+    """
+    registers a broken time control and returns the fallback action
+    :param violation: the type of violation ('timeouts' or 'retries')
+    """
+    def __apply_violation(self, player, state, penalties, violation):
+        name = player.get_name()
+        self.__violations[name][violation] += 1
+        penalties[name] = penalties.get(name, 0) + self.__time_control.get_penalty()
+        return self.__time_control.get_fallback_action(state, self.__rng)
+
+    """
+    Gets the phase of a game, used to split the latency of the players (e.g. the betting round in poker)
+    """
+    def get_game_phase(self, state):
+        return 'game'
+
+    """
+    Creates the initial state of a game from its random generator, without notifying the players. It must draw from
+    the generator exactly like on_init_game does, so that recorded games can be replayed (see games.trace)
+    :param rng: the random generator of the game
+    """
+    def create_state(self, rng):
+        raise NotImplementedError(f"{self.__class__.__name__} does not support replays")
+
+    """
+    Handler that completes a replayed state once all its actions were applied (e.g. computes the results)
+    :param state: the replayed state
+    :param rng: a random generator seeded like the one of the recorded game
+    """
+    def on_replay_end_game(self, state, rng):
+        pass
+
+    """
+    Converts an action into an integer, so that games can be recorded in a compact way
+    """
+    @staticmethod
+    def encode_action(action) -> int:
+        raise NotImplementedError("This simulator does not support encoding actions")
+
+    """
+    Converts an integer back into an action (see encode_action)
+    """
+    @staticmethod
+    def decode_action(code: int):
+        raise NotImplementedError("This simulator does not support decoding actions")
+
     """
     runs the simulation
     """
     def run_simulation(self):
+        game_index = self.__game_index
+        self.__start_game_rng()
         state = self.on_init_game()
         players = self.get_player_positions()
+        instrumentation = self.__instrumentation
+        time_control = self.__time_control
 
-        # notify players a new game is starting
-        for pos in range(0, len(players)):
-            players[pos].set_current_pos(pos)
-            players[pos].event_new_game()
+        # the clocks and the penalties of the players, when the game has time controls
+        clocks = {}
+        penalties = {}
+        if time_control is not None:
+            for player in players:
+                clocks[player.get_name()] = time_control.create_clock()
+                player.set_clock(clocks[player.get_name()])
+
+        self.__start_game(state, players, game_index)
+
+        # number of actions played in the game
+        game_length = 0
 
         # play a turn
         while not state.is_finished():
@@ -123,44 +374,270 @@ class GameSimulator(ABC):
             pos = state.get_acting_player()
 
             # obtain a valid action
+            invalid_actions = 0
+            if time_control is not None:
+                clocks[players[pos].get_name()].start_move()
             while True:
-                selected_action = players[pos].get_action(state.clone())
+                if time_control is not None:
+                    selected_action = self.__get_timed_action(players[pos], state, clocks[players[pos].get_name()],
+                                                              penalties)
+                elif instrumentation is None:
+                    selected_action = players[pos].get_action(self.__views.create(state))
+                else:
+                    selected_action = instrumentation.call(players[pos].get_name(), 'get_action',
+                                                           self.get_game_phase(state), players[pos].get_action,
+                                                           self.__views.create(state))
                 if state.validate_action(selected_action):
                     break
+                if instrumentation is not None:
+                    instrumentation.record_invalid_action(players[pos].get_name())
+
+                # the time controls limit the number of invalid actions in a row
+                invalid_actions += 1
+                if time_control is not None and time_control.exceeds_retries(invalid_actions):
+                    selected_action = self.__apply_violation(players[pos], state, penalties, 'retries')
+                    break
+
+            # the whole move, with its retries, is charged to the bank of the player
+            if time_control is not None:
+                clocks[players[pos].get_name()].stop_move()
 
+            # the views handed to the players are invalidated before the state changes
+            self.__views.release()
             state.play(selected_action)
+            game_length += 1
+
+            for listener in self.__listeners:
+                listener.event_action(self, game_index, pos, selected_action)
 
             # notify players of the action
             for player in players:
-                player.event_action(pos, selected_action, state.clone())
+                if not player.is_subscribed(Player.EVENT_ACTION):
+                    continue
+                if instrumentation is None:
+                    player.event_action(pos, selected_action, self.__views.create(state))
+                else:
+                    instrumentation.call(player.get_name(), 'event_action', self.get_game_phase(state),
+                                         player.event_action, pos, selected_action, self.__views.create(state))
 
             # the simulator will run an optional hanlder for each updated state
             self.on_state_update(state)
 
+        self.__end_game(state, self.__current_permutation, game_index, game_length, penalties)
+
+    """
+    Plays several games in lockstep: in each step, every player gets the states of all the games where it has to act
+    in a single call to get_actions, so that players that run a model can evaluate them at once. The games are the
+    same (and get the same seeds) as playing them one after the other with run_simulation, but the calls to the
+    players are interleaved, so players must not keep the state of a game between calls.
+    Each game has its own random generator, and keeps the state of the global one of its players, which is restored
+    around the calls of the players for that game, so the random choices of the players are the same as in
+    run_simulation. Players that override get_actions draw the random numbers of all the games of a call from the
+    same stream, so their choices depend on the size of the batch.
+    Simulators that keep the state of the current game (see SUPPORTS_BATCHES), games with time controls, and games
+    where no player overrides get_actions (batches would only cost more) are played one after the other
+    :param permutations: the index of the seat permutation of each game
+    """
+    def run_simulations(self, permutations: list):
+        if not self.SUPPORTS_BATCHES or self.__time_control is not None or len(permutations) <= 1 or \
+                all(type(player).get_actions is Player.get_actions for player in self.__permutations[0]):
+            for permutation in permutations:
+                self.__current_permutation = permutation
+                self.run_simulation()
+            return
+
+        instrumentation = self.__instrumentation
+        simulator_rng = self.__rng
+        games = []
+        for permutation in permutations:
+            self.__current_permutation = permutation
+            game_index = self.__game_index
+            self.__rng = random.Random()
+            self.__start_game_rng()
+            state = self.on_init_game()
+            self.__start_game(state, self.get_player_positions(), game_index)
+            games.append([state, permutation, game_index, 0, self.__save_game_rngs()])
+
+        # the results are stored in the order of the games, like in run_simulation
+        finished = []
+        while games:
+            # the games are grouped by the player that acts and its seat
+            turns = {}
+            for game in games:
+                pos = game[0].get_acting_player()
+                turns.setdefault((self.__permutations[game[1]][pos], pos), []).append(game)
+
+            for (player, pos), turn_games in turns.items():
+                player.set_current_pos(pos)
+                actions = self.__get_batch_actions(player, pos, turn_games)
+
+                for game, selected_action in zip(turn_games, actions):
+                    state = game[0]
+                    self.__restore_game_rngs(game[4])
+
+                    # invalid actions are asked again, one game at a time
+                    while not state.validate_action(selected_action):
+                        if instrumentation is not None:
+                            instrumentation.record_invalid_action(player.get_name())
+                        player.set_current_pos(pos)
+                        selected_action = player.get_action(self.__views.create(state))
+
+                    self.__views.release()
+                    state.play(selected_action)
+                    game[3] += 1
+
+                    for listener in self.__listeners:
+                        listener.event_action(self, game[2], pos, selected_action)
+
+                    # notify players of the action
+                    for seat, other in enumerate(self.__permutations[game[1]]):
+                        if not other.is_subscribed(Player.EVENT_ACTION):
+                            continue
+                        other.set_current_pos(seat)
+                        if instrumentation is None:
+                            other.event_action(pos, selected_action, self.__views.create(state))
+                        else:
+                            instrumentation.call(other.get_name(), 'event_action', self.get_game_phase(state),
+                                                 other.event_action, pos, selected_action, self.__views.create(state))
+
+                    self.on_state_update(state)
+                    self.__views.release()
+                    game[4] = self.__save_game_rngs()
+
+            for game in [game for game in games if game[0].is_finished()]:
+                self.__restore_game_rngs(game[4])
+                finished.append((game[2], self.__end_game(game[0], game[1], game[2], game[3], {}, store=False)))
+                games.remove(game)
+
+        for _, (result, permutation, game_length) in sorted(finished, key=lambda item: item[0]):
+            self.__results.append(result, permutation, game_length)
+        self.__rng = simulator_rng
+        self.__current_permutation = permutations[-1]
+
+    """
+    asks a player for its actions in several games. players that do not override get_actions are asked game by game,
+    each with the random generators of its game (see run_simulations)
+    :param turn_games: the games where the player acts
+    """
+    def __get_batch_actions(self, player, pos, turn_games):
+        instrumentation = self.__instrumentation
+        phase = self.get_game_phase(turn_games[0][0])
+
+        if type(player).get_actions is not Player.get_actions:
+            views = [self.__views.create(game[0]) for game in turn_games]
+            if instrumentation is None:
+                return player.get_actions(views)
+            return instrumentation.call(player.get_name(), 'get_actions', phase, player.get_actions, views)
+
+        actions = []
+        for game in turn_games:
+            self.__restore_game_rngs(game[4])
+            player.set_current_pos(pos)
+            if instrumentation is None:
+                actions.append(player.get_action(self.__views.create(game[0])))
+            else:
+                actions.append(instrumentation.call(player.get_name(), 'get_action', phase, player.get_action,
+                                                    self.__views.create(game[0])))
+            self.__views.release()
+            game[4] = self.__save_game_rngs()
+        return actions
+
+    # gets the random generator of the current game and the state of the global one (None when there is no seed)
+    def __save_game_rngs(self):
+        return self.__rng, None if self.__seed is None else random.getstate()
+
+    # restores the random generators of a game before its players are called (see run_simulations)
+    def __restore_game_rngs(self, rngs):
+        self.__rng = rngs[0]
+        if rngs[1] is not None:
+            random.setstate(rngs[1])
+
+    """
+    notifies the listeners and the players that a game is starting
+    """
+    def __start_game(self, state, players, game_index):
+        instrumentation = self.__instrumentation
+
+        for listener in self.__listeners:
+            listener.event_game_start(self, game_index, self.__game_seed, self.__current_permutation)
+
+        # notify players a new game is starting
+        for pos in range(0, len(players)):
+            players[pos].set_current_pos(pos)
+            players[pos].set_random_seed(self.__players_seed)
+            if instrumentation is None:
+                players[pos].event_new_game()
+            else:
+                instrumentation.call(players[pos].get_name(), 'event_new_game', self.get_game_phase(state),
+                                     players[pos].event_new_game)
+
+    """
+    ends a game: notifies the players of the results and stores them
+    :param permutation: the index of the seat permutation of the game
+    :param penalties: the penalties of each player in the game
+    :param store: False to return the result instead of storing it (see run_simulations)
+    :returns: the result, the permutation and the length of the game, when it was not stored
+    """
+    def __end_game(self, state, permutation, game_index, game_length, penalties, store=True):
+        instrumentation = self.__instrumentation
+        players = self.__permutations[permutation]
+
         # handler to run before the game ends
+        self.__views.release()
         self.on_before_end_game(state)
 
         result = {}
-        for player in players:
+        for seat, player in enumerate(players):
+            # in batches, the player may have been seated elsewhere in another game since
+            player.set_current_pos(seat)
+
             # notify the player of the result in each position
             for pos in range(len(players)):
-                player.event_result(pos, state.get_result(pos))
+                if instrumentation is None:
+                    player.event_result(pos, state.get_result(pos))
+                else:
+                    instrumentation.call(player.get_name(), 'event_result', self.get_game_phase(state),
+                                         player.event_result, pos, state.get_result(pos))
 
             # store the result for that player
             result[player.get_name()] = state.get_result(player.get_current_pos())
-            player.event_end_game(state.clone())
+            if player.get_name() in penalties:
+                result[player.get_name()] += penalties[player.get_name()]
+            if not player.is_subscribed(Player.EVENT_END_GAME):
+                continue
+            if instrumentation is None:
+                player.event_end_game(self.__views.create(state))
+            else:
+                instrumentation.call(player.get_name(), 'event_end_game', self.get_game_phase(state),
+                                     player.event_end_game, self.__views.create(state))
 
-        self.__results.append(result)
+        self.__views.release()
+        if store:
+            self.__results.append(result, permutation, game_length)
+        self.__ledger.add_result(result)
+
+        for listener in self.__listeners:
+            listener.event_game_end(self, game_index, result, game_length)
 
         # handler to run after a game ends
         self.on_end_game(state)
+        return None if store else (result, permutation, game_length)
 
     # prints the stats for all players
     def print_stats(self):
         scores = self.get_global_score()
         for player in self.__permutations[0]:
             name = player.get_name()
-            print(f"Player {name} | Total score: {scores[name]}$ | Avg. score per game: {scores[name] / len(self.__results)}$")
+            print(f"Player {name} | Total score: {scores[name]}$ | Avg. score per game: {scores[name] / self.__ledger.get_count(name)}$")
+        if self.__time_control is not None:
+            for player in self.__permutations[0]:
+                violations = self.__violations[player.get_name()]
+                print(f"Player {player.get_name()} | Timeouts: {violations['timeouts']} | "
+                      f"Too many invalid actions: {violations['retries']}")
+        if self.__tiebreak is not None:
+            print(f"Draw broken by {self.__tiebreak[1]}: {self.__tiebreak[0]} wins")
+        if self.__instrumentation is not None:
+            self.__instrumentation.print_stats()
 
     # returns the list of players
     def get_players(self):
@@ -174,19 +651,43 @@ class GameSimulator(ABC):
     def num_players(self):
         return len(self.__permutations[0])
 
-    # gets the results of all games
+    # gets a zero-copy view of the results of all games (see ResultStore.view)
     def get_results(self):
+        return self.__results.view()
+
+    # gets the columnar store with the results of all games
+    def get_result_store(self):
         return self.__results
 
+    # appends the results of another simulator with the same players (e.g. a shard played by another process)
+    def merge_results(self, other):
+        names = [player.get_name() for player in self.__permutations[0]]
+        assert sorted(names) == sorted(player.get_name() for player in other.get_players()), \
+            "Can only merge results of simulators with the same players"
+        self.__results.extend(other.get_result_store())
+        self.__game_index += len(other.get_result_store())
+        if self.__instrumentation is not None and other.get_instrumentation() is not None:
+            self.__instrumentation.merge(other.get_instrumentation())
+        for name, violations in other.get_violations().items():
+            for violation, count in violations.items():
+                self.__violations[name][violation] += count
+        self.__ledger.merge(other.get_ledger())
+
+    # listeners (e.g. open files) and the worker threads stay in the process where they were added, so simulators can
+    # be sent between processes
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_GameSimulator__listeners'] = []
+        state['_GameSimulator__workers'] = {}
+        return state
+
+    # gets the running score ledger of all players
+    def get_ledger(self):
+        return self.__ledger
+
     # gets the scores of all players
     def get_global_score(self):
-        scores = {}
-        for player in self.__permutations[0]:
-            name = player.get_name()
-            scores[name] = 0
-            for result in self.__results:
-                scores[name] += result[name]
-        return scores
+        return self.__ledger.get_totals()
 
 
     @staticmethod
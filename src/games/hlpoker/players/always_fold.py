@@ -6,6 +6,8 @@ from games.state import State
 
 
 class AlwaysFoldHLPokerPlayer(HLPokerPlayer):
+    # this player ignores the actions and the end of the game
+    SUBSCRIBED_EVENTS = frozenset()
 
     def __init__(self, name):
         super().__init__(name)
@@ -5,6 +5,8 @@ from games.hlpoker.state import HLPokerState
 from games.state import State
 
 class hlpoker_26544_28256_v1(HLPokerPlayer):
+    # this player ignores the actions and the end of the game
+    SUBSCRIBED_EVENTS = frozenset()
 
     def __init__(self, name):
         super().__init__(name)
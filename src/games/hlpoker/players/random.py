@@ -6,6 +6,9 @@ from random import choice
 
 
 class RandomHLPokerPlayer(HLPokerPlayer):
+    # this player ignores the actions and the end of the game
+    SUBSCRIBED_EVENTS = frozenset()
+
     def __init__(self, name):
         super().__init__(name)
 
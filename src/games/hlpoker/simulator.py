@@ -1,5 +1,3 @@
-from random import shuffle
-
 from termcolor import cprint
 
 from games.game_simulator import GameSimulator
@@ -12,12 +10,19 @@ from games.hlpoker.player import HLPokerPlayer
 
 class HLPokerSimulator(GameSimulator):
 
+    # the deck and the round of the current game are kept in the simulator
+    SUPPORTS_BATCHES = False
+
     def __init__(self, players: list[HLPokerPlayer]):
         super().__init__(players)
         """
+        the cards in their original order, which is shuffled at the start of each game
+        """
+        self.__cards = [Card(rank, suit) for suit in Suit for rank in Rank]
+        """
         deck of cards
         """
-        self.__deck = [Card(rank, suit) for suit in Suit for rank in Rank]
+        self.__deck = self.__cards.copy()
         """
         stores the current round of the current game being simulated
         """
@@ -28,8 +33,7 @@ class HLPokerSimulator(GameSimulator):
         self.__used_card_count = None
 
     def on_init_game(self):
-        # shuffle the deck
-        shuffle(self.__deck)
+        self.__deck = self.shuffle_deck(self.get_rng())
 
         self.__used_card_count = 0
         self.__current_round = Round.Preflop
@@ -42,6 +46,23 @@ class HLPokerSimulator(GameSimulator):
 
         return HLPokerState(len(self.get_players()))
 
+    """
+    gets a shuffled deck. it always starts from the same order, so each game only depends on its own seed
+    """
+    def shuffle_deck(self, rng):
+        deck = self.__cards.copy()
+        rng.shuffle(deck)
+        return deck
+
+    def create_state(self, rng):
+        # the deck is shuffled first, just like in on_init_game, so that the generator is left in the same position
+        self.shuffle_deck(rng)
+        return HLPokerState(len(self.get_players()))
+
+    def on_replay_end_game(self, state: HLPokerState, rng):
+        deck = self.shuffle_deck(rng)
+        state.compute_results(deck[0:2], deck[2:4], deck[4:9])
+
     def on_state_update(self, state):
         # check if we changed the round
         new_round = state.get_current_round()
@@ -81,6 +102,17 @@ class HLPokerSimulator(GameSimulator):
         # ignored for this simulator
         pass
 
+    def get_game_phase(self, state: HLPokerState):
+        return str(state.get_current_round())
+
+    @staticmethod
+    def encode_action(action: HLPokerAction) -> int:
+        return action.value
+
+    @staticmethod
+    def decode_action(code: int):
+        return HLPokerAction(code)
+
     @staticmethod
     def get_player_type():
         return HLPokerPlayer
@@ -0,0 +1,165 @@
+import json
+from time import perf_counter_ns
+
+
+class LatencyHistogram:
+    """
+    a histogram of latencies with power-of-two buckets (in nanoseconds). recording is a couple of integer
+    operations, and histograms of different processes can be merged
+    """
+
+    NUM_BUCKETS = 64
+
+    def __init__(self):
+        self.__buckets = [0] * LatencyHistogram.NUM_BUCKETS
+        self.__count = 0
+        self.__total = 0
+        self.__max = 0
+
+    def record(self, elapsed_ns: int):
+        self.__buckets[min(elapsed_ns.bit_length(), LatencyHistogram.NUM_BUCKETS - 1)] += 1
+        self.__count += 1
+        self.__total += elapsed_ns
+        if elapsed_ns > self.__max:
+            self.__max = elapsed_ns
+
+    def merge(self, other):
+        for bucket, count in enumerate(other.get_buckets()):
+            self.__buckets[bucket] += count
+        self.__count += other.get_count()
+        self.__total += other.get_total()
+        self.__max = max(self.__max, other.get_max())
+
+    def get_buckets(self):
+        return self.__buckets
+
+    def get_count(self):
+        return self.__count
+
+    def get_total(self):
+        return self.__total
+
+    def get_max(self):
+        return self.__max
+
+    def get_mean(self):
+        return self.__total / self.__count if self.__count > 0 else 0
+
+    """
+    gets an upper bound of a percentile (the upper limit of the bucket where it falls)
+    :param percentile: value between 0 and 100
+    """
+    def get_percentile(self, percentile):
+        if self.__count == 0:
+            return 0
+        target = self.__count * percentile / 100
+        seen = 0
+        for bucket, count in enumerate(self.__buckets):
+            seen += count
+            if seen >= target:
+                return min((1 << bucket) - 1, self.__max)
+        return self.__max
+
+    def to_dict(self):
+        return {
+            'count': self.__count,
+            'total_ns': self.__total,
+            'mean_ns': self.get_mean(),
+            'p50_ns': self.get_percentile(50),
+            'p99_ns': self.get_percentile(99),
+            'max_ns': self.__max,
+            'buckets': {f"<{1 << bucket}": count for bucket, count in enumerate(self.__buckets) if count > 0}
+        }
+
+
+class Instrumentation:
+    """
+    records the latency of the calls to the players (get_action and the event callbacks), per player,
+    per callback and per game phase, as well as the number of invalid actions returned by each player.
+    the simulator only uses it when it is enabled, so it costs nothing otherwise
+    """
+
+    def __init__(self):
+        """
+        histograms by player name, callback name and game phase
+        """
+        self.__histograms = {}
+
+        """
+        number of invalid actions by player name
+        """
+        self.__invalid_actions = {}
+
+    """
+    calls a method of a player and records its latency
+    :param name: the name of the player
+    :param callback: the name of the method (e.g. get_action)
+    :param phase: the game phase (see GameSimulator.get_game_phase)
+    :param method: the bound method to call
+    :returns: the value returned by the method
+    """
+    def call(self, name, callback, phase, method, *args):
+        start = perf_counter_ns()
+        value = method(*args)
+        self.get_histogram(name, callback, phase).record(perf_counter_ns() - start)
+        return value
+
+    def get_histogram(self, name, callback, phase):
+        phases = self.__histograms.setdefault(name, {}).setdefault(callback, {})
+        histogram = phases.get(phase)
+        if histogram is None:
+            histogram = phases[phase] = LatencyHistogram()
+        return histogram
+
+    """
+    registers an invalid action returned by a player
+    """
+    def record_invalid_action(self, name):
+        self.__invalid_actions[name] = self.__invalid_actions.get(name, 0) + 1
+
+    def get_invalid_actions(self, name):
+        return self.__invalid_actions.get(name, 0)
+
+    def get_histograms(self):
+        return self.__histograms
+
+    """
+    adds the measurements of another instrumentation (e.g. from another process) to this one
+    """
+    def merge(self, other):
+        for name, callbacks in other.get_histograms().items():
+            for callback, phases in callbacks.items():
+                for phase, histogram in phases.items():
+                    self.get_histogram(name, callback, phase).merge(histogram)
+        for name in other.get_player_names():
+            self.__invalid_actions[name] = self.get_invalid_actions(name) + other.get_invalid_actions(name)
+
+    def get_player_names(self):
+        return sorted(set(self.__histograms.keys()) | set(self.__invalid_actions.keys()))
+
+    def print_stats(self):
+        print(f"{'Player':<15} {'Callback':<16} {'Phase':<10} {'Calls':>9} {'Mean(us)':>10} {'p50(us)':>10} "
+              f"{'p99(us)':>10} {'Max(us)':>10}")
+        for name in self.get_player_names():
+            for callback, phases in sorted(self.__histograms.get(name, {}).items()):
+                for phase, histogram in phases.items():
+                    print(f"{name:<15} {callback:<16} {str(phase):<10} {histogram.get_count():>9} "
+                          f"{histogram.get_mean() / 1000:>10.1f} {histogram.get_percentile(50) / 1000:>10.1f} "
+                          f"{histogram.get_percentile(99) / 1000:>10.1f} {histogram.get_max() / 1000:>10.1f}")
+            print(f"{name:<15} invalid actions: {self.get_invalid_actions(name)}")
+
+    def to_dict(self):
+        return {
+            name: {
+                'callbacks': {
+                    callback: {str(phase): histogram.to_dict() for phase, histogram in phases.items()}
+                    for callback, phases in self.__histograms.get(name, {}).items()
+                },
+                'invalid_actions': self.get_invalid_actions(name)
+            }
+            for name in self.get_player_names()
+        }
+
+    def export_json(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
@@ -7,6 +7,8 @@ from games.minesweeper.state import MinesweeperState
 
 
 class HumanMinesweeperPlayer(MinesweeperPlayer):
+    # this player only needs the final state of the game
+    SUBSCRIBED_EVENTS = frozenset({MinesweeperPlayer.EVENT_END_GAME})
 
     def __init__(self, name):
         super().__init__(name)
@@ -5,6 +5,9 @@ from games.minesweeper.state import MinesweeperState
 from games.state import State
 
 class IntelligentMinesweeperPlayer(MinesweeperPlayer):
+    # this player ignores the actions and the end of the game
+    SUBSCRIBED_EVENTS = frozenset()
+
     def __init__(self, name):
         super().__init__(name)
         self.corners_played = [False, False, False, False]  # Para rastrear se cada canto foi jogado
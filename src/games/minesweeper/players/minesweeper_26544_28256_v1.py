@@ -6,6 +6,9 @@ from games.state import State
 import random
 
 class minesweeper_26544_28256_v1(MinesweeperPlayer):
+    # this player ignores the actions and the end of the game
+    SUBSCRIBED_EVENTS = frozenset()
+
     def __init__(self, name):
         super().__init__(name)
         self.corners_played = [False, False, False, False]  # To track if each corner has been played
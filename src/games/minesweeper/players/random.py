@@ -7,6 +7,8 @@ from games.state import State
 
 
 class RandomMinesweeperPlayer(MinesweeperPlayer):
+    # this player ignores the actions and the end of the game
+    SUBSCRIBED_EVENTS = frozenset()
 
     def __init__(self, name):
         super().__init__(name)
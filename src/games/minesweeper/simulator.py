@@ -15,7 +15,10 @@ class MinesweeperSimulator(GameSimulator):
         self.__num_cols = num_cols
 
     def on_init_game(self):
-        return MinesweeperState(self.__num_rows, self.__num_cols)
+        return self.create_state(self.get_rng())
+
+    def create_state(self, rng):
+        return MinesweeperState(self.__num_rows, self.__num_cols, rng=rng)
 
     def on_before_end_game(self, state: MinesweeperState):
         # ignored for this simulator
@@ -29,6 +32,14 @@ class MinesweeperSimulator(GameSimulator):
         # ignored for this simulator
         pass
 
+    @staticmethod
+    def encode_action(action: MinesweeperAction) -> int:
+        return (action.get_row() << 16) | action.get_col()
+
+    @staticmethod
+    def decode_action(code: int):
+        return MinesweeperAction(code >> 16, code & 0xFFFF)
+
     @staticmethod
     def get_player_type():
         return MinesweeperPlayer
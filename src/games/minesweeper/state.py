@@ -11,7 +11,7 @@ class MinesweeperState(State):
     EMPTY_CELL = -1
     MINE_CELL = -2
 
-    def __init__(self, num_rows: int = 7, num_cols: int = 7, num_mines: int = 11):
+    def __init__(self, num_rows: int = 7, num_cols: int = 7, num_mines: int = 11, rng: random.Random = None):
         super().__init__()
 
         if num_rows < 4:
@@ -33,15 +33,15 @@ class MinesweeperState(State):
         """
         self.__grid = [[MinesweeperState.EMPTY_CELL for _i in range(self.__num_cols)] for _j in range(self.__num_rows)]
         self.__grid_players = [[MinesweeperState.EMPTY_CELL for _i in range(self.__num_cols)] for _j in range(self.__num_rows)]
-        self.__mines = self.__place_mines()
+        self.__mines = self.__place_mines(rng if rng is not None else random)
         self.__acting_player = 0
         self.__mines_hit = [0, 0]
         self.__has_winner = False
 
-    def __place_mines(self):
+    def __place_mines(self, rng):
         mines = set()
         while len(mines) < self.__num_mines:
-            mine = (random.randint(0, self.__num_rows - 1), random.randint(0, self.__num_cols - 1))
+            mine = (rng.randint(0, self.__num_rows - 1), rng.randint(0, self.__num_cols - 1))
             mines.add(mine)
         return mines
 
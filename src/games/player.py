@@ -5,6 +5,18 @@ from games.state import State
 
 class Player(ABC):
 
+    """
+    the events that send a game state to the player
+    """
+    EVENT_ACTION = 'action'
+    EVENT_END_GAME = 'end_game'
+
+    """
+    the events the player is notified of. players that ignore some of these events can narrow this set, so that the
+    simulator does not need to call them (nor build a view of the state) for each action
+    """
+    SUBSCRIBED_EVENTS = frozenset({EVENT_ACTION, EVENT_END_GAME})
+
     """
     :param name: name of the player (simply a text identifier for the player)
     """
@@ -16,6 +28,12 @@ class Player(ABC):
         # in most games, the first player takes the position 0
         self.__current_pos = None
 
+        # the clock of the player in the current game, when the game has time controls
+        self.__clock = None
+
+        # the seed of the global random generator in the current game (None when the tournament has no seed)
+        self.__random_seed = None
+
     """
     retrieves the name of the player
     """
@@ -35,6 +53,36 @@ class Player(ABC):
     def set_current_pos(self, new_pos):
         self.__current_pos = new_pos
 
+    """
+    sets the clock of the player for the current game (see PlayerClock)
+    """
+    def set_clock(self, clock):
+        self.__clock = clock
+
+    """
+    sets the seed of the global random generator in the current game. the simulator seeds the generator itself, so
+    players only need it to seed the random numbers they draw elsewhere (e.g. in another process)
+    """
+    def set_random_seed(self, seed):
+        self.__random_seed = seed
+
+    def get_random_seed(self):
+        return self.__random_seed
+
+    """
+    retrieves the time left for the current move, in seconds, or None if the game has no time controls.
+    players can use it to stop searching before they run out of time
+    """
+    def get_remaining_time(self):
+        return None if self.__clock is None else self.__clock.get_remaining()
+
+    """
+    checks if the player is notified of an event
+    :param event: one of the EVENT_* constants
+    """
+    def is_subscribed(self, event) -> bool:
+        return event in self.SUBSCRIBED_EVENTS
+
     """
     prints to the console the stats of the player
     """
@@ -44,12 +92,24 @@ class Player(ABC):
 
     """
     Method that returns an action for a certain game state
-    :param state: the current game state
+    :param state: a read-only view of the current game state (see StateView), only valid during this call. Changing
+                  it (e.g. with update) makes a private copy, but search code should still work on state.clone(),
+                  and players that keep the state for later must keep state.snapshot()
     """
     @abstractmethod
     def get_action(self, state):
         pass
 
+    """
+    Method that returns the actions for several games at once, when the simulator plays games in batches (see
+    GameSimulator.run_simulations). Players that evaluate a model can override it to amortize the cost of each call.
+    By default, it asks get_action for each game
+    :param states: read-only views of the states of the games where the player has to act
+    :returns: the list of actions, in the same order as the states
+    """
+    def get_actions(self, states: list):
+        return [self.get_action(state) for state in states]
+
     """
     A method that is invoked once a new game starts
     """
@@ -0,0 +1,421 @@
+import os
+import pickle
+import random
+import struct
+import subprocess
+import sys
+import threading
+import traceback
+import weakref
+from pathlib import Path
+from time import perf_counter
+
+from games.player import Player
+from games.state_view import StateViews
+
+"""
+The frames exchanged with a player host: the size of the payload, an opcode, a sequence number and the payload (a
+pickled list of messages, or the pickled reply). a request has the number of the request, and its reply (or error)
+has the same one, so the replies to requests that were abandoned are recognized and discarded. the other frames
+have the number 0
+"""
+FRAME_HEADER = struct.Struct('<IBI')
+
+"""
+The opcodes of the frames
+    - NOTIFY: messages that need no reply (sent together with the next request, or when the game ends)
+    - REQUEST: messages where the last one needs a reply (e.g. get_action)
+    - REPLY: the reply to a request
+    - ERROR: the hosted player raised an exception (in the request, or in the notifications since the last request)
+    - READY: sent by the host once the player is built, with the events it is subscribed to
+"""
+NOTIFY = 1
+REQUEST = 2
+REPLY = 3
+ERROR = 4
+READY = 5
+
+"""
+Pickle protocol 4 is understood by every Python interpreter since 3.4
+"""
+PICKLE_PROTOCOL = 4
+
+"""
+The directory of the source tree, where the host module is started
+"""
+SOURCE_DIR = Path(__file__).resolve().parent.parent
+
+
+class PlayerHostError(RuntimeError):
+    """
+    raised when a player host dies or its player raises an exception
+    """
+    pass
+
+
+def write_frame(file, opcode, payload: bytes, sequence: int = 0):
+    file.write(FRAME_HEADER.pack(len(payload), opcode, sequence))
+    file.write(payload)
+    file.flush()
+
+
+"""
+:returns: the opcode, the sequence number and the payload of the next frame
+"""
+def read_frame(file):
+    header = file.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        raise EOFError("The player host closed the connection")
+    size, opcode, sequence = FRAME_HEADER.unpack(header)
+    payload = file.read(size)
+    if len(payload) < size:
+        raise EOFError("The player host closed the connection")
+    return opcode, sequence, payload
+
+
+class RemotePlayer(Player):
+    """
+    a proxy of a player that runs in its own process (a player host), so that a crash or the memory of the player
+    does not take down the tournament and the player can run on another python interpreter.
+    the simulator uses it like any other player. to keep the traffic small, the host keeps its own copy of the game
+    state: the full state is only sent once per game, then only the actions that were played. the notifications
+    are buffered and sent together with the next request, so each move costs a single round trip.
+    when the host dies (or its player raises an exception), the proxy plays the first valid action until the end of
+    the game, and starts a new host in the next game.
+    a request that is abandoned (e.g. it missed its deadline) keeps waiting for its own reply: frames are written
+    and read under separate locks, so the notifications are still sent meanwhile, and each request only accepts the
+    reply with its own number
+    """
+
+    # the proxy follows all the actions to keep the state of the host up to date
+    SUBSCRIBED_EVENTS = Player.SUBSCRIBED_EVENTS
+
+    """
+    the methods of the players of each game that the simulators call besides the ones of Player. they return
+    nothing, so they are sent to the host with the next request
+    """
+    FORWARDED_EVENTS = frozenset({'start_new_game', 'event_show_board_cards', 'event_show_opponent_cards'})
+
+    """
+    :param name: the name of the player
+    :param game_type: the key of the game in constants.AVAILABLE_GAME_TYPES
+    :param type_name: the name of the player class, built by the host
+    :param python: the python interpreter of the host (defaults to the current one)
+    """
+    def __init__(self, name, game_type: str, type_name: str, python: str = None):
+        super().__init__(name)
+        self.__game_type = game_type
+        self.__type_name = type_name
+        self.__python = python or sys.executable
+
+        self.__process = None
+        self.__write_lock = threading.Lock()
+        self.__read_lock = threading.Lock()
+
+        """
+        the messages waiting to be sent, and the number of the last request
+        """
+        self.__pending = []
+        self.__request_id = 0
+
+        """
+        the events the hosted player is subscribed to (see Player.SUBSCRIBED_EVENTS)
+        """
+        self.__hosted_events = frozenset()
+
+        """
+        indicates if the host has the state of the current game, and if the host failed during the current game
+        """
+        self.__synced = False
+        self.__failed = False
+
+    # processes and pipes stay in the process that created them, so simulators can be sent between processes
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_RemotePlayer__process'] = None
+        state['_RemotePlayer__write_lock'] = None
+        state['_RemotePlayer__read_lock'] = None
+        state['_RemotePlayer__pending'] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__write_lock = threading.Lock()
+        self.__read_lock = threading.Lock()
+
+    # the class of the proxy is created on the fly (see create_remote_player), so it is created again when unpickled
+    def __reduce__(self):
+        return (create_remote_player, (self.get_name(), self.__game_type, self.__type_name, self.__python),
+                self.__getstate__())
+
+    def __start(self):
+        self.__process = subprocess.Popen(
+            [self.__python, "-m", "games.player_host", self.__game_type, self.__type_name, self.get_name()],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=SOURCE_DIR
+        )
+        weakref.finalize(self, RemotePlayer.stop_process, self.__process)
+
+        opcode, _, payload = read_frame(self.__process.stdout)
+        if opcode != READY:
+            raise PlayerHostError(f"Could not start the host of player '{self.get_name()}': {payload.decode()}")
+        self.__hosted_events = frozenset(pickle.loads(payload))
+
+    @staticmethod
+    def stop_process(process):
+        if process.poll() is None:
+            try:
+                write_frame(process.stdin, NOTIFY, pickle.dumps([('close',)], protocol=PICKLE_PROTOCOL))
+                process.stdin.close()
+                process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                process.kill()
+
+    def close(self):
+        if self.__process is not None:
+            RemotePlayer.stop_process(self.__process)
+            self.__process = None
+
+    def __notify(self, *message):
+        if not self.__failed:
+            self.__pending.append(message)
+
+    def __flush(self, opcode=NOTIFY, sequence=0):
+        messages, self.__pending = self.__pending, []
+        write_frame(self.__process.stdin, opcode, pickle.dumps(messages, protocol=PICKLE_PROTOCOL), sequence)
+
+    """
+    sends the pending messages and a request, and waits for the reply
+    """
+    def __request(self, *message):
+        with self.__write_lock:
+            if self.__process is None:
+                self.__start()
+            process = self.__process
+            self.__request_id += 1
+            request_id = self.__request_id
+            self.__pending.append(message)
+            self.__flush(REQUEST, request_id)
+
+        with self.__read_lock:
+            # the replies (and errors) of requests that were abandoned (e.g. after a timeout) are discarded
+            while True:
+                opcode, sequence, payload = read_frame(process.stdout)
+                if sequence != request_id:
+                    continue
+                if opcode == ERROR:
+                    raise PlayerHostError(payload.decode())
+                return pickle.loads(payload)
+
+    def __fail(self, error):
+        print(f"Player {self.get_name()} | host failed: {error}", file=sys.stderr)
+        self.__failed = True
+        self.__pending = []
+        if self.__process is not None and self.__process.poll() is not None:
+            self.__process = None
+
+    def get_type_name(self):
+        return self.__type_name
+
+    def get_action(self, state):
+        if self.__failed:
+            return next(iter(state.get_possible_actions()))
+        if not self.__synced:
+            self.__notify('state', state.clone())
+            self.__synced = True
+        try:
+            return self.__request('get_action', self.get_current_pos(), self.get_remaining_time())
+        except (OSError, EOFError, PlayerHostError) as error:
+            self.__fail(error)
+            return next(iter(state.get_possible_actions()))
+
+    def event_new_game(self):
+        self.__synced = False
+        # the host is started before the first move, so its start is not charged to the clock of the player
+        if self.__process is None:
+            try:
+                with self.__write_lock:
+                    self.__start()
+            except (OSError, EOFError, PlayerHostError) as error:
+                self.__fail(error)
+        # the host seeds its global random generator like the simulator seeds the one of the players in this process
+        # (see GameSimulator.get_players_seed), so a hosted player draws the same numbers as in process
+        self.__notify('new_game', self.get_current_pos(), self.get_random_seed())
+
+    def event_action(self, pos: int, action, new_state):
+        if self.__synced:
+            self.__notify('action', pos, action)
+        elif Player.EVENT_ACTION in self.__hosted_events or self.__process is None:
+            self.__notify('state', new_state.clone())
+            self.__notify('event_action', pos, action)
+            self.__synced = True
+
+    def event_result(self, pos: int, result):
+        self.__notify('result', self.get_current_pos(), pos, result)
+
+    def event_end_game(self, final_state):
+        if not self.__failed:
+            if Player.EVENT_END_GAME in self.__hosted_events or self.__process is None:
+                self.__notify('end_game', final_state.clone())
+            try:
+                with self.__write_lock:
+                    if self.__process is None:
+                        self.__start()
+                    self.__flush()
+            except (OSError, EOFError, PlayerHostError) as error:
+                self.__fail(error)
+
+        # the failure only lasts until the end of the game: the next game sends messages (e.g. the cards dealt in
+        # poker) before event_new_game, and they must reach the host
+        self.__failed = False
+
+    def print_stats(self):
+        self.__notify('print_stats')
+
+    """
+    the events that are specific to the player of a game (e.g. the cards dealt in poker, see FORWARDED_EVENTS) are
+    sent to the host. any other attribute that the proxy does not have raises AttributeError, as for the player
+    """
+    def __getattr__(self, name):
+        if name not in RemotePlayer.FORWARDED_EVENTS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        def call(*args):
+            self.__notify('call', name, args)
+        return call
+
+
+"""
+Creates a proxy of a player hosted in another process. The class of the proxy has the same name as the class of the
+player, so the proxy is shown and cached like the player itself
+"""
+def create_remote_player(name, game_type, type_name, python=None):
+    proxy_class = type(type_name, (RemotePlayer,), {'__module__': __name__})
+    return proxy_class(name, game_type, type_name, python)
+
+
+class HostClock:
+    """
+    the clock of a hosted player during a move: the time that was left when the request was received
+    """
+
+    def __init__(self, remaining: float):
+        self.__deadline = perf_counter() + remaining
+
+    def get_remaining(self):
+        return max(0.0, self.__deadline - perf_counter())
+
+
+class PlayerHost:
+    """
+    runs a player in the host process: reads the messages of the proxy, keeps its own copy of the game state and
+    calls the player
+    """
+
+    def __init__(self, player):
+        self.__player = player
+        self.__state = None
+        self.__views = StateViews()
+
+        """
+        the error raised by the player in the notifications since the last request, reported in its reply
+        """
+        self.__error = None
+
+    def __view(self):
+        self.__views.release()
+        return self.__views.create(self.__state)
+
+    def handle(self, message):
+        player = self.__player
+        kind = message[0]
+        if kind == 'new_game':
+            _, pos, seed = message
+            self.__state = None
+            self.__error = None
+            if seed is not None:
+                random.seed(seed)
+            player.set_current_pos(pos)
+            player.event_new_game()
+        elif kind == 'state':
+            self.__state = message[1]
+        elif kind == 'action':
+            _, pos, action = message
+            self.__views.release()
+            self.__state.play(action)
+            if player.is_subscribed(Player.EVENT_ACTION):
+                player.event_action(pos, action, self.__view())
+        elif kind == 'event_action':
+            _, pos, action = message
+            if player.is_subscribed(Player.EVENT_ACTION):
+                player.event_action(pos, action, self.__view())
+        elif kind == 'get_action':
+            _, pos, remaining_time = message
+            player.set_current_pos(pos)
+            if remaining_time is not None:
+                player.set_clock(HostClock(remaining_time))
+            return player.get_action(self.__view())
+        elif kind == 'result':
+            _, current_pos, pos, result = message
+            player.set_current_pos(current_pos)
+            player.event_result(pos, result)
+        elif kind == 'end_game':
+            self.__state = message[1]
+            player.event_end_game(self.__view())
+        elif kind == 'print_stats':
+            player.print_stats()
+        elif kind == 'call':
+            _, name, args = message
+            getattr(player, name)(*args)
+        return None
+
+    def serve(self, reader, writer):
+        while True:
+            try:
+                opcode, sequence, payload = read_frame(reader)
+            except EOFError:
+                return
+            try:
+                reply = None
+                for message in pickle.loads(payload):
+                    if message[0] == 'close':
+                        return
+                    reply = self.handle(message)
+            except Exception:
+                traceback.print_exc()
+                # the errors of the notifications are reported to the next request
+                self.__error = traceback.format_exc()
+            if opcode != REQUEST:
+                continue
+            if self.__error is not None:
+                write_frame(writer, ERROR, self.__error.encode(), sequence)
+                self.__error = None
+            else:
+                write_frame(writer, REPLY, pickle.dumps(reply, protocol=PICKLE_PROTOCOL), sequence)
+
+
+"""
+Entry point of a player host: python -m games.player_host <game type> <player class> <player name>
+The frames go through the standard input and output, so the output of the player is sent to the standard error
+"""
+def main():
+    reader = sys.stdin.buffer
+    writer = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    sys.stdout = sys.stderr
+
+    game_type, type_name, name = sys.argv[1:4]
+    try:
+        from constants import get_player_type
+        player_class = get_player_type(game_type, type_name)
+        if player_class is None:
+            raise ValueError(f"Player type '{type_name}' is not available for game '{game_type}'.")
+        player = player_class(name)
+    except Exception:
+        write_frame(writer, ERROR, traceback.format_exc().encode())
+        return
+
+    write_frame(writer, READY, pickle.dumps(sorted(player.SUBSCRIBED_EVENTS), protocol=PICKLE_PROTOCOL))
+    PlayerHost(player).serve(reader, writer)
+
+
+if __name__ == '__main__':
+    main()
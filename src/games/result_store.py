@@ -0,0 +1,209 @@
+import mmap
+import tempfile
+from array import array
+from collections import namedtuple
+
+
+"""
+A zero-copy view of the results stored so far:
+    - scores: dictionary with a typed memoryview of the scores of each player
+    - permutations: the index of the seat permutation used in each game
+    - game_lengths: the number of actions played in each game
+"""
+ResultView = namedtuple('ResultView', ['scores', 'permutations', 'game_lengths'])
+
+
+class ResultColumn:
+    """
+    a growable column of values of a single type (see the typecodes of the array module).
+    the values are kept in an array until the column is spilled, after which they live in a memory-mapped
+    temporary file. the buffer is replaced (never resized) when the column grows, so views taken earlier
+    stay valid
+    """
+
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, typecode: str, values=None):
+        self.__typecode = typecode
+        self.__itemsize = array(typecode).itemsize
+        self.__length = 0
+        self.__capacity = 0
+        self.__items = None
+
+        """
+        the file backing the column once it is spilled (None while the column is in memory)
+        """
+        self.__file = None
+
+        self.__allocate(ResultColumn.INITIAL_CAPACITY)
+        if values is not None:
+            self.extend(values)
+
+    def __allocate(self, capacity):
+        if self.__file is None:
+            buffer = array(self.__typecode, bytes(capacity * self.__itemsize))
+        else:
+            self.__file.truncate(capacity * self.__itemsize)
+            buffer = mmap.mmap(self.__file.fileno(), capacity * self.__itemsize)
+
+        items = memoryview(buffer).cast('B').cast(self.__typecode)
+        if self.__items is not None:
+            items[:self.__length] = self.__items[:self.__length]
+
+        self.__items = items
+        self.__capacity = capacity
+
+    def __len__(self):
+        return self.__length
+
+    def append(self, value):
+        if self.__length >= self.__capacity:
+            self.__allocate(self.__capacity * 2)
+        self.__items[self.__length] = value
+        self.__length += 1
+
+    """
+    appends all the values of a sequence (or of another column view)
+    """
+    def extend(self, values):
+        values = memoryview(array(self.__typecode, values)) if not isinstance(values, memoryview) else values
+        count = len(values)
+        if self.__length + count > self.__capacity:
+            capacity = self.__capacity
+            while self.__length + count > capacity:
+                capacity *= 2
+            self.__allocate(capacity)
+        self.__items[self.__length:self.__length + count] = values
+        self.__length += count
+
+    """
+    moves the column to a memory-mapped temporary file
+    :param directory: the directory of the temporary file (None for the system default)
+    """
+    def spill(self, directory=None):
+        if self.__file is not None:
+            return
+        self.__file = tempfile.TemporaryFile(dir=directory)
+        self.__allocate(self.__capacity)
+
+    def is_spilled(self):
+        return self.__file is not None
+
+    """
+    gets a typed memoryview of the values, without copying them
+    """
+    def view(self):
+        return self.__items[:self.__length]
+
+    def get_typecode(self):
+        return self.__typecode
+
+    def get_nbytes(self):
+        return self.__length * self.__itemsize
+
+    # only the values are pickled, so columns can be sent between processes. they are restored in memory
+    def __getstate__(self):
+        return self.__typecode, self.view().tobytes()
+
+    def __setstate__(self, state):
+        typecode, data = state
+        values = array(typecode)
+        values.frombytes(data)
+        self.__init__(typecode, values)
+
+
+class ResultStore:
+    """
+    stores the results of all games in columns: one column with the score of each player, plus the index of the
+    seat permutation and the length of each game. once the store grows past the spill threshold, the columns move
+    to memory-mapped files so that long simulations do not keep millions of results in memory
+    """
+
+    SCORE_TYPECODE = 'd'
+    PERMUTATION_TYPECODE = 'H'
+    GAME_LENGTH_TYPECODE = 'I'
+
+    def __init__(self, names: list, spill_threshold: int = None, spill_dir: str = None):
+        """
+        the names of the players, in the order of the columns
+        """
+        self.__names = list(names)
+        self.__scores = {name: ResultColumn(ResultStore.SCORE_TYPECODE) for name in self.__names}
+        self.__permutations = ResultColumn(ResultStore.PERMUTATION_TYPECODE)
+        self.__game_lengths = ResultColumn(ResultStore.GAME_LENGTH_TYPECODE)
+
+        """
+        the number of games after which the columns are spilled to disk (None to always keep them in memory)
+        """
+        self.__spill_threshold = spill_threshold
+        self.__spill_dir = spill_dir
+
+    def __len__(self):
+        return len(self.__game_lengths)
+
+    def __columns(self):
+        return list(self.__scores.values()) + [self.__permutations, self.__game_lengths]
+
+    """
+    changes the spill settings of the store
+    :param spill_threshold: the number of games after which the results are spilled to disk (None to never spill)
+    :param spill_dir: the directory of the memory-mapped files (None for the system default)
+    """
+    def set_spill(self, spill_threshold: int = None, spill_dir: str = None):
+        self.__spill_threshold = spill_threshold
+        self.__spill_dir = spill_dir
+        self.__check_spill()
+
+    def __check_spill(self):
+        if self.__spill_threshold is not None and len(self) > self.__spill_threshold and not self.is_spilled():
+            for column in self.__columns():
+                column.spill(self.__spill_dir)
+
+    def is_spilled(self):
+        return self.__game_lengths.is_spilled()
+
+    """
+    stores the result of a game
+    :param result: dictionary with the score of each player
+    :param permutation: the index of the seat permutation of the game
+    :param game_length: the number of actions in the game
+    """
+    def append(self, result: dict, permutation: int, game_length: int):
+        for name in self.__names:
+            self.__scores[name].append(result[name])
+        self.__permutations.append(permutation)
+        self.__game_lengths.append(game_length)
+        self.__check_spill()
+
+    """
+    appends all the results of another store with the same players
+    """
+    def extend(self, other):
+        other_view = other.view()
+        for name in self.__names:
+            self.__scores[name].extend(other_view.scores[name])
+        self.__permutations.extend(other_view.permutations)
+        self.__game_lengths.extend(other_view.game_lengths)
+        self.__check_spill()
+
+    """
+    gets a zero-copy view of all the results
+    """
+    def view(self):
+        return ResultView(
+            {name: column.view() for name, column in self.__scores.items()},
+            self.__permutations.view(),
+            self.__game_lengths.view()
+        )
+
+    """
+    gets the result of a single game as a dictionary with the score of each player
+    """
+    def get_result(self, index):
+        return {name: column.view()[index] for name, column in self.__scores.items()}
+
+    def get_names(self):
+        return list(self.__names)
+
+    def get_nbytes(self):
+        return sum(column.get_nbytes() for column in self.__columns())
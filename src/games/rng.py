@@ -0,0 +1,11 @@
+import hashlib
+
+
+"""
+Derives a 64-bit seed from a sequence of values (e.g. the tournament seed, the pairing and the game index).
+Unlike hash(), the result is the same in every process and every run, so any game can be regenerated on its own
+:param parts: values with a stable repr (ints, strings and tuples of those)
+"""
+def derive_seed(*parts) -> int:
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
@@ -0,0 +1,82 @@
+from math import sqrt
+
+
+class ScoreLedger:
+    """
+    a running ledger with the sum, the number and the sum of squares of the scores of each player.
+    it is updated in constant time after each game, so the global scores, the averages and the
+    variances never require going through the history of results
+    """
+
+    def __init__(self, names: list):
+        """
+        the running sums for each player
+        """
+        self.__totals = {name: 0 for name in names}
+        self.__counts = {name: 0 for name in names}
+        self.__squares = {name: 0 for name in names}
+
+    """
+    registers the score of a player in a game
+    """
+    def add(self, name, score):
+        self.__totals[name] += score
+        self.__counts[name] += 1
+        self.__squares[name] += score * score
+
+    """
+    registers the result of a game, a dictionary with the score of each player
+    """
+    def add_result(self, result: dict):
+        for name, score in result.items():
+            self.add(name, score)
+
+    """
+    adds the entries of another ledger to this one
+    """
+    def merge(self, other):
+        for name in self.__totals:
+            self.__totals[name] += other.get_total(name)
+            self.__counts[name] += other.get_count(name)
+            self.__squares[name] += other.get_sum_of_squares(name)
+
+    def get_names(self):
+        return list(self.__totals.keys())
+
+    def get_total(self, name):
+        return self.__totals[name]
+
+    def get_count(self, name):
+        return self.__counts[name]
+
+    def get_sum_of_squares(self, name):
+        return self.__squares[name]
+
+    """
+    gets the total score of every player
+    """
+    def get_totals(self):
+        return dict(self.__totals)
+
+    """
+    gets the average score per game of a player
+    """
+    def get_mean(self, name):
+        count = self.__counts[name]
+        return self.__totals[name] / count if count > 0 else 0
+
+    """
+    gets the (sample) variance of the score per game of a player
+    """
+    def get_variance(self, name):
+        count = self.__counts[name]
+        if count < 2:
+            return 0
+        mean = self.__totals[name] / count
+        return max(0, (self.__squares[name] - count * mean * mean) / (count - 1))
+
+    """
+    gets the standard deviation of the score per game of a player
+    """
+    def get_std(self, name):
+        return sqrt(self.get_variance(name))
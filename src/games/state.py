@@ -64,6 +64,12 @@ class State(ABC):
     def clone(self):
         pass
 
+    """
+    Retrieves the actions that can be performed in the current state
+    """
+    def get_possible_actions(self):
+        raise NotImplementedError(f"{self.__class__.__name__} does not list its possible actions")
+
     """
     Retrieves the game result for a player in a given position
     :param pos: position of the player in the game [0, num_players[
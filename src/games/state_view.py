@@ -0,0 +1,127 @@
+from functools import partial
+
+
+"""
+Copies the lists returned by a getter into tuples, the nested lists too (e.g. the rows of a grid)
+"""
+def freeze(value):
+    if isinstance(value, list):
+        return tuple(freeze(item) if isinstance(item, list) else item for item in value)
+    return value
+
+
+class StateView:
+    """
+    a read-only, copy-on-write view of a game state, handed to the players instead of a clone.
+    reading the state goes straight to the state of the simulator. the state is only copied when the
+    player calls a method that changes it (e.g. update).
+    a view is only valid during the call that received it: it is invalidated before the simulator changes
+    the state, and using it afterwards raises an exception. players that keep a state between calls must
+    keep state.snapshot() (or state.clone()) instead.
+    the getters that return the lists of the state (e.g. the grid) return tuples, so the players can not change the
+    state of the simulator through them
+    """
+
+    """
+    the methods of the states that change them
+    """
+    MUTATING_METHODS = frozenset({'update', 'play', 'undo', 'before_results', 'compute_results'})
+
+    """
+    the getters of the states that return their own lists: the grid and the actions played so far
+    """
+    FROZEN_GETTERS = frozenset({'get_grid', 'get_sequence'})
+
+    def __init__(self, state):
+        self.__state = state
+
+        """
+        indicates if the view holds its own copy of the state
+        """
+        self.__detached = False
+
+        """
+        the values of the frozen getters, by name. the state of the simulator does not change while the view is
+        valid, so each value is only copied once
+        """
+        self.__frozen = {}
+
+    def __getattr__(self, name):
+        if self.__state is None:
+            raise Exception("the view of the state is no longer valid, keep state.snapshot() to use a state later")
+        if name in StateView.MUTATING_METHODS:
+            self.detach()
+        elif name in StateView.FROZEN_GETTERS:
+            return partial(self.__get_frozen, name)
+        return getattr(self.__state, name)
+
+    # gets the value of a frozen getter. a detached view can change its state, so its values are not kept
+    def __get_frozen(self, name):
+        if self.__state is None:
+            raise Exception("the view of the state is no longer valid, keep state.snapshot() to use a state later")
+        if self.__detached:
+            return freeze(getattr(self.__state, name)())
+        if name not in self.__frozen:
+            self.__frozen[name] = freeze(getattr(self.__state, name)())
+        return self.__frozen[name]
+
+    """
+    copies the underlying state, so that the view no longer follows the state of the simulator
+    """
+    def detach(self):
+        if not self.__detached:
+            self.__state = self.__state.clone()
+            self.__detached = True
+
+    def is_detached(self):
+        return self.__detached
+
+    """
+    ends the view: it can no longer be used (see the class)
+    """
+    def invalidate(self):
+        self.__state = None
+        self.__frozen.clear()
+
+    def is_valid(self):
+        return self.__state is not None
+
+    """
+    a clone of the view is a regular state
+    """
+    def clone(self):
+        if self.__state is None:
+            raise Exception("the view of the state is no longer valid, keep state.snapshot() to use a state later")
+        return self.__state.clone()
+
+    """
+    gets a copy of the state that stays valid after the call that received the view (see clone)
+    """
+    def snapshot(self):
+        return self.clone()
+
+
+class StateViews:
+    """
+    keeps track of the views that were handed to the players, so that they are all invalidated before the
+    simulator changes the state
+    """
+
+    def __init__(self):
+        self.__views = []
+
+    """
+    creates a view of the state
+    """
+    def create(self, state):
+        view = StateView(state)
+        self.__views.append(view)
+        return view
+
+    """
+    invalidates the views handed out so far, whoever still holds them. must be called before the state changes
+    """
+    def release(self):
+        for view in self.__views:
+            view.invalidate()
+        self.__views.clear()
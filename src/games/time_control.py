@@ -0,0 +1,198 @@
+import queue
+import threading
+from time import perf_counter
+
+
+class MoveTimeout(Exception):
+    """
+    raised when a player does not return an action before its deadline
+    """
+    pass
+
+
+class TimeControl:
+    """
+    the time controls of a game: a time budget per move, a time bank per game and a maximum number of invalid actions
+    per move. when a player breaks one of them, the simulator plays a fallback action for the player and adds a
+    penalty to its score in that game
+    """
+
+    """
+    the possible fallback actions: the first valid action or a random valid action
+    """
+    FALLBACK_DEFAULT = 'default'
+    FALLBACK_RANDOM = 'random'
+    FALLBACKS = [FALLBACK_DEFAULT, FALLBACK_RANDOM]
+
+    """
+    :param move_time: the time budget of each move, in seconds (None for no limit)
+    :param game_time: the time bank of each player for a whole game, in seconds (None for no limit)
+    :param max_retries: the number of invalid actions a player can return in a row (None for no limit)
+    :param fallback: the action played when a time control is broken (see FALLBACKS)
+    :param penalty: the value added to the score of a player each time it breaks a time control
+    """
+    def __init__(self, move_time: float = None, game_time: float = None, max_retries: int = None,
+                 fallback: str = FALLBACK_DEFAULT, penalty=0):
+        if fallback not in TimeControl.FALLBACKS:
+            raise ValueError(f"Unknown fallback '{fallback}'")
+
+        self.__move_time = move_time
+        self.__game_time = game_time
+        self.__max_retries = max_retries
+        self.__fallback = fallback
+        self.__penalty = penalty
+
+    def get_move_time(self):
+        return self.__move_time
+
+    def get_game_time(self):
+        return self.__game_time
+
+    def get_max_retries(self):
+        return self.__max_retries
+
+    def get_penalty(self):
+        return self.__penalty
+
+    """
+    gets the settings of the time controls, which can be compared and stored (e.g. in the key of a cached pairing)
+    """
+    def get_settings(self):
+        return self.__move_time, self.__game_time, self.__max_retries, self.__fallback, self.__penalty
+
+    def has_deadline(self):
+        return self.__move_time is not None or self.__game_time is not None
+
+    """
+    checks if a number of invalid actions in a row exceeds the limit
+    """
+    def exceeds_retries(self, invalid_actions: int):
+        return self.__max_retries is not None and invalid_actions > self.__max_retries
+
+    """
+    gets the action played for a player that broke a time control
+    :param state: the current game state
+    :param rng: the random generator of the game
+    """
+    def get_fallback_action(self, state, rng):
+        actions = list(state.get_possible_actions())
+        if self.__fallback == TimeControl.FALLBACK_RANDOM:
+            return rng.choice(actions)
+        return actions[0]
+
+    """
+    creates the clock of a player for a new game
+    """
+    def create_clock(self):
+        return PlayerClock(self.__move_time, self.__game_time)
+
+
+class PlayerClock:
+    """
+    the clock of a player during a game. players can read it (see Player.get_remaining_time) to adapt their search
+    """
+
+    def __init__(self, move_time: float = None, game_time: float = None):
+        self.__move_time = move_time
+
+        """
+        the time left in the bank of the player
+        """
+        self.__bank = game_time
+
+        """
+        the deadline of the current move (None when no move is running or there is no limit)
+        """
+        self.__deadline = None
+        self.__move_start = None
+
+    """
+    the time budget of the next move (None for no limit)
+    """
+    def get_move_budget(self):
+        budgets = [budget for budget in [self.__move_time, self.__bank] if budget is not None]
+        return max(0.0, min(budgets)) if budgets else None
+
+    def start_move(self):
+        self.__move_start = perf_counter()
+        budget = self.get_move_budget()
+        self.__deadline = None if budget is None else self.__move_start + budget
+
+    """
+    ends the current move, charging its duration to the bank
+    :returns: the duration of the move, in seconds
+    """
+    def stop_move(self):
+        elapsed = perf_counter() - self.__move_start
+        if self.__bank is not None:
+            self.__bank = max(0.0, self.__bank - elapsed)
+        self.__deadline = None
+        self.__move_start = None
+        return elapsed
+
+    """
+    the time left for the current move, in seconds (None for no limit)
+    """
+    def get_remaining(self):
+        if self.__deadline is None:
+            return self.get_move_budget()
+        return max(0.0, self.__deadline - perf_counter())
+
+    def get_bank(self):
+        return self.__bank
+
+
+class PlayerWorker:
+    """
+    runs the calls of a player that have a deadline, in a single thread reused for all its moves. python threads can
+    not be stopped, so a call that misses its deadline keeps running in the worker and its result is discarded. until
+    it returns, the worker is busy and the next calls of the player are forfeited (MoveTimeout) without starting
+    them, so the calls of a player never run alongside each other
+    """
+
+    def __init__(self):
+        self.__calls = queue.SimpleQueue()
+        self.__thread = None
+
+        """
+        indicates if a call is still running (possibly one that missed its deadline)
+        """
+        self.__busy = False
+
+    def is_busy(self):
+        return self.__busy
+
+    """
+    calls a method in the worker and waits until its deadline
+    :param timeout: the maximum time to wait, in seconds (None to wait forever)
+    :raises MoveTimeout: when the deadline is missed, or the worker is still running a previous call
+    """
+    def call(self, method, args, timeout):
+        if timeout is None and not self.__busy:
+            return method(*args)
+        if self.__busy or timeout <= 0:
+            raise MoveTimeout()
+
+        if self.__thread is None:
+            self.__thread = threading.Thread(target=self.__run, daemon=True)
+            self.__thread.start()
+
+        outcome = {}
+        done = threading.Event()
+        self.__busy = True
+        self.__calls.put((method, args, outcome, done))
+        if not done.wait(timeout):
+            raise MoveTimeout()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['value']
+
+    def __run(self):
+        while True:
+            method, args, outcome, done = self.__calls.get()
+            try:
+                outcome['value'] = method(*args)
+            except BaseException as error:
+                outcome['error'] = error
+            self.__busy = False
+            done.set()
@@ -0,0 +1,200 @@
+import json
+import random
+import struct
+from array import array
+from collections import namedtuple
+
+from games.game_listener import GameListener
+
+
+"""
+A recorded game:
+    - game_index: the index of the game in the simulator
+    - game_seed: the seed of the random generator of the game
+    - permutation: the index of the seat permutation of the game
+    - actions: the encoded actions (see GameSimulator.encode_action)
+    - results: dictionary with the score of each player
+"""
+TraceGame = namedtuple('TraceGame', ['game_index', 'game_seed', 'permutation', 'actions', 'results'])
+
+"""
+The binary trace format. A trace file starts with the magic, the size of the metadata and the metadata (JSON),
+followed by one record per game: the record header, the actions (int32) and the scores of the players (float64).
+The index file next to it holds the offset (uint64) of each record, for random access.
+"""
+TRACE_MAGIC = b'GTRACE1\n'
+METADATA_SIZE = struct.Struct('<I')
+RECORD_HEADER = struct.Struct('<QQHI')
+ACTION_TYPECODE = 'i'
+SCORE_TYPECODE = 'd'
+OFFSET_TYPECODE = 'Q'
+INDEX_SUFFIX = '.idx'
+
+
+class TraceRecorder(GameListener):
+    """
+    records the games of a simulator in an append-only binary trace (see TRACE_MAGIC) and its index.
+    the files are only created when the first game starts, and writes are buffered
+    """
+
+    BUFFER_SIZE = 1 << 20
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__file = None
+        self.__index = None
+
+        """
+        the names of the players, in the order of the scores of each record
+        """
+        self.__names = None
+
+        """
+        the actions of the games that are being played, by game index
+        """
+        self.__actions = {}
+        self.__headers = {}
+
+    def __open(self, simulator):
+        self.__names = [player.get_name() for player in simulator.get_players()]
+        metadata = json.dumps({
+            'simulator': f"{simulator.__class__.__module__}.{simulator.__class__.__name__}",
+            'players': self.__names
+        }).encode('utf-8')
+
+        self.__file = open(self.__path, 'wb', buffering=TraceRecorder.BUFFER_SIZE)
+        self.__index = open(self.__path + INDEX_SUFFIX, 'wb', buffering=TraceRecorder.BUFFER_SIZE)
+        self.__file.write(TRACE_MAGIC)
+        self.__file.write(METADATA_SIZE.pack(len(metadata)))
+        self.__file.write(metadata)
+
+    def event_game_start(self, simulator, game_index: int, game_seed: int, permutation: int):
+        if self.__file is None:
+            self.__open(simulator)
+        self.__actions[game_index] = array(ACTION_TYPECODE)
+        self.__headers[game_index] = (game_seed, permutation)
+
+    def event_action(self, simulator, game_index: int, pos: int, action):
+        self.__actions[game_index].append(simulator.encode_action(action))
+
+    def event_game_end(self, simulator, game_index: int, result: dict, game_length: int):
+        actions = self.__actions.pop(game_index)
+        game_seed, permutation = self.__headers.pop(game_index)
+
+        array(OFFSET_TYPECODE, [self.__file.tell()]).tofile(self.__index)
+        self.__file.write(RECORD_HEADER.pack(game_index, game_seed, permutation, len(actions)))
+        actions.tofile(self.__file)
+        array(SCORE_TYPECODE, [result[name] for name in self.__names]).tofile(self.__file)
+
+    def get_path(self):
+        return self.__path
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__index.close()
+            self.__file = None
+            self.__index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class TraceReader:
+    """
+    reads the games of a trace file in any order, using its index
+    """
+
+    def __init__(self, path: str):
+        self.__file = open(path, 'rb')
+        if self.__file.read(len(TRACE_MAGIC)) != TRACE_MAGIC:
+            raise ValueError(f"'{path}' is not a game trace")
+
+        (size,) = METADATA_SIZE.unpack(self.__file.read(METADATA_SIZE.size))
+        self.__metadata = json.loads(self.__file.read(size).decode('utf-8'))
+
+        self.__offsets = array(OFFSET_TYPECODE)
+        with open(path + INDEX_SUFFIX, 'rb') as index:
+            self.__offsets.frombytes(index.read())
+
+    def __len__(self):
+        return len(self.__offsets)
+
+    def get_metadata(self):
+        return self.__metadata
+
+    def get_player_names(self):
+        return self.__metadata['players']
+
+    """
+    reads the n-th game of the trace
+    """
+    def get_game(self, n: int) -> TraceGame:
+        self.__file.seek(self.__offsets[n])
+        game_index, game_seed, permutation, num_actions = RECORD_HEADER.unpack(self.__file.read(RECORD_HEADER.size))
+
+        actions = array(ACTION_TYPECODE)
+        actions.frombytes(self.__file.read(num_actions * actions.itemsize))
+
+        names = self.get_player_names()
+        scores = array(SCORE_TYPECODE)
+        scores.frombytes(self.__file.read(len(names) * scores.itemsize))
+
+        return TraceGame(game_index, game_seed, permutation, actions, dict(zip(names, scores)))
+
+    def __iter__(self):
+        for n in range(len(self)):
+            yield self.get_game(n)
+
+    def close(self):
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class TraceReplay:
+    """
+    rebuilds the state of any recorded game at any ply, by applying the recorded actions to the initial state
+    created by the simulator. the players are never called, so replaying is much faster than simulating
+    """
+
+    """
+    :param reader: the trace to replay
+    :param simulator: a simulator configured like the one that recorded the trace (e.g. the same grid size)
+    """
+    def __init__(self, reader: TraceReader, simulator):
+        self.__reader = reader
+        self.__simulator = simulator
+
+    """
+    gets the actions of the n-th game of the trace
+    """
+    def get_actions(self, n: int):
+        return [self.__simulator.decode_action(code) for code in self.__reader.get_game(n).actions]
+
+    """
+    gets the state of the n-th game of the trace
+    :param n: the position of the game in the trace
+    :param ply: the number of actions to apply (None for the final state)
+    """
+    def get_state(self, n: int, ply: int = None):
+        game = self.__reader.get_game(n)
+        num_actions = len(game.actions) if ply is None else ply
+        if num_actions < 0 or num_actions > len(game.actions):
+            raise ValueError(f"The game only has {len(game.actions)} actions")
+
+        state = self.__simulator.create_state(random.Random(game.game_seed))
+        for code in game.actions[:num_actions]:
+            state.update(self.__simulator.decode_action(code))
+
+        if num_actions == len(game.actions):
+            self.__simulator.on_replay_end_game(state, random.Random(game.game_seed))
+
+        return state
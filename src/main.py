@@ -1,62 +1,145 @@
 import argparse
 import itertools
 from collections import namedtuple, defaultdict
-from tqdm import tqdm
 
-from constants import AVAILABLE_GAME_TYPES, AVAILABLE_PLAYER_TYPES
+from constants import AVAILABLE_GAME_TYPES, AVAILABLE_PLAYER_TYPES, get_player_type
+from games.instrumentation import Instrumentation
+from games.player_host import create_remote_player
+from games.time_control import TimeControl
+from tournament.cache import MatchupCache
+from tournament.checkpoint import Checkpoint
+from tournament.export import EXPORT_FORMATS, ResultExporter
+from tournament.pairing import DRAW_RULES, get_games_per_iteration
+from tournament.rating import RATING_SYSTEMS, GlickoRating
+from tournament.scheduler import AdaptiveScheduler, SCHEDULES
+from tournament.stopping import SEQUENTIAL_TESTS, get_critical_value, get_projected_score
 
 def run_simulation(game_settings):
     removed_players = []
+    round_number = 1
+
+    # the pairings played in a round are reused in the following rounds
+    cache = MatchupCache()
+    scheduler = AdaptiveScheduler(game_settings, cache) if game_settings.get('schedule') == 'adaptive' else None
+    projected = game_settings.get('early_stopping') is not None or scheduler is not None
+
+    # the ratings are updated with the new games of each pairing
+    rating = None
+    if game_settings.get('rating') == 'glicko':
+        rating = GlickoRating(c=game_settings['glicko_c'])
+    elif game_settings.get('rating') is not None:
+        rating = RATING_SYSTEMS[game_settings['rating']]()
+
+    checkpoint = game_settings.get('checkpoint')
+    progress = None
+    if checkpoint is not None:
+        if game_settings.get('resume'):
+            progress = checkpoint.resume(game_settings, game_settings['players'], cache)
+            if progress is None:
+                print("No checkpoint to resume, starting a new tournament")
+        if progress is None:
+            checkpoint.start(game_settings, game_settings['players'])
+        else:
+            round_number, removed_players, rating = resume_progress(game_settings, progress, rating)
+
+    # the games and a summary of each pairing are exported once the pairing is played
+    exporter = None
+    if game_settings.get('export') is not None:
+        exporter = ResultExporter(game_settings['export'], game_settings['export_format'])
+        # a resumed tournament continues the files of the last checkpoint, so each pairing is only exported once per
+        # round, as in a tournament that was not interrupted
+        if progress is not None and progress.get('export') is not None:
+            exporter.resume(progress['export'])
 
     while len(game_settings['players']) > 1:
         scores = defaultdict(int)
+        variances = defaultdict(float)
+        tiebreaks = defaultdict(int)
         match_results = defaultdict(dict)
 
-        for player1, player2 in itertools.combinations(game_settings['players'], 2):
-            simulator = game_settings['game']([player1, player2])
-            print(f"Simulation: {player1.get_name()} VS {player2.get_name()}")
+        pairings = list(itertools.combinations(game_settings['players'], 2))
+        if scheduler is None:
+            simulators = cache.play_pairings(game_settings, pairings)
+        else:
+            simulators = scheduler.play_round(pairings)
 
+        round_simulators = []
+        for (player1, player2), simulator in zip(pairings, simulators):
+            round_simulators.append(simulator)
             names = {player1.get_name(): player1, player2.get_name(): player2}
 
-            # Run initial iterations with progress bar
-            for _ in tqdm(range(game_settings['num_iterations']), desc="Running iterations"):
-                run_game_iteration(simulator, game_settings['seat_permutation'])
-
-            # Run additional iterations if there's a draw
-            while check_draw(simulator):
-                run_game_iteration(simulator, game_settings['seat_permutation'])
-
-            update_scores(scores, simulator, names)
+            if not projected:
+                update_scores(scores, simulator, names)
+            else:
+                update_projected_scores(scores, variances, simulator, names, game_settings)
+            update_tiebreaks(tiebreaks, simulator, names)
 
             # Update match results for cross table
             update_match_results(match_results, simulator, player1, player2)
 
+            if rating is not None:
+                rating.add_results(simulator)
+
+            if exporter is not None:
+                exporter.export_pairing(simulator, round_number)
+
             simulator.print_stats()
+            if projected:
+                print(f"Games played: {len(simulator.get_result_store())}")
 
         # Print cross table and leaderboard before removing a player
         print_cross_table(match_results)
-        print_leaderboard(scores)
-
-        removed_player = remove_worst_player(game_settings['players'], scores)
+        if rating is not None:
+            # the rated leaderboard replaces the scores, and the lowest rated player is removed
+            scores = {player: rating.get_ratings()[player.get_name()][0] for player in game_settings['players']}
+            print_rated_leaderboard(game_settings['players'], rating, game_settings['confidence'])
+        elif not projected:
+            print_leaderboard(scores)
+        else:
+            print_leaderboard(scores, uncertainty=get_uncertainty(variances, game_settings['confidence']))
+
+        removed_player = remove_worst_player(game_settings['players'], scores, tiebreaks)
         removed_players.insert(0, removed_player)
 
+        # each round is a rating period
+        if rating is not None:
+            rating.end_period()
+
+        round_number += 1
+        if checkpoint is not None:
+            keys = [MatchupCache.get_key(game_settings, player1, player2) for player1, player2 in pairings]
+            checkpoint.save_round(round_number, game_settings['players'], removed_players, rating,
+                                  list(zip(keys, round_simulators)),
+                                  None if exporter is None else exporter.get_progress())
+
     last_remaining_player = game_settings['players'][0]
     removed_players.insert(0, last_remaining_player)
     print_leaderboard(removed_players, final=True)
 
-def run_game_iteration(simulator, seat_permutation):
-    simulator.run_simulation()
-    if seat_permutation:
-        simulator.change_player_positions()
-        simulator.run_simulation()
+    if exporter is not None:
+        exporter.close()
 
-def check_draw(simulator):
-    global_scores = simulator.get_global_score()
-    # Assuming there are only two players in each game
-    player_scores = list(global_scores.values())
-    if len(player_scores) == 2 and player_scores[0] == player_scores[1]:
-        return True  # It's a draw
-    return False  # Not a draw
+    if game_settings.get('latency_json') is not None:
+        export_latency(cache, game_settings['latency_json'])
+
+def resume_progress(game_settings, progress, rating):
+    # The players are found by name, so the eliminated ones keep the order of the checkpoint
+    players = {player.get_name(): player for player in game_settings['players']}
+    game_settings['players'] = [players[name] for name in progress['players']]
+    removed_players = [players[name] for name in progress['removed_players']]
+    if progress['rating'] is not None:
+        rating = progress['rating']
+
+    print(f"Resuming the tournament at round {progress['round']}"
+          f" ({len(removed_players)} players eliminated, {len(progress['pairings'])} pairings played)")
+    return progress['round'], removed_players, rating
+
+def export_latency(cache, path):
+    # Merge the latency of every pairing (each pairing is only played once)
+    instrumentation = Instrumentation()
+    for simulator in cache.get_simulators():
+        instrumentation.merge(simulator.get_instrumentation())
+    instrumentation.export_json(path)
 
 def update_scores(scores, simulator, names):
     # Update global scores for each player
@@ -64,16 +147,41 @@ def update_scores(scores, simulator, names):
     for player_name, score in global_scores.items():
         scores[names[player_name]] += score
 
-def remove_worst_player(players, scores):
-    # Find the player with the lowest score
-    lowest_score_player = min(players, key=lambda player: scores[player])
+def update_projected_scores(scores, variances, simulator, names, game_settings):
+    # Pairings that stopped early are projected to the planned number of games
+    planned_games = game_settings['num_iterations'] * get_games_per_iteration(game_settings)
+    for player_name, player in names.items():
+        score, variance = get_projected_score(simulator, player_name, planned_games)
+        scores[player] += score
+        variances[player] += variance
+
+def update_tiebreaks(tiebreaks, simulator, names):
+    # Count the drawn pairings won by each player on a tie-break
+    tiebreak = simulator.get_tiebreak()
+    if tiebreak is not None:
+        tiebreaks[names[tiebreak[0]]] += 1
+
+def get_uncertainty(variances, confidence):
+    # Half width of the confidence interval of each score
+    critical_value = get_critical_value(confidence)
+    return {player: critical_value * variance ** 0.5 for player, variance in variances.items()}
+
+def remove_worst_player(players, scores, tiebreaks=None):
+    # Find the player with the lowest score, the players with the same score are ranked by the tie-breaks they won
+    tiebreaks = tiebreaks or {}
+    lowest_score_player = min(players, key=lambda player: (scores[player], tiebreaks.get(player, 0)))
     players.remove(lowest_score_player)
     return lowest_score_player
 
 def update_match_results(match_results, simulator, player1, player2):
     result = simulator.get_global_score()  # Assuming this method exists and returns the match result
-    match_results[player1.get_name()][player2.get_name()] = result[player1.get_name()]
-    match_results[player2.get_name()][player1.get_name()] = result[player2.get_name()]
+    tiebreak = simulator.get_tiebreak()
+    for player, opponent in ((player1, player2), (player2, player1)):
+        score = result[player.get_name()]
+        # a drawn pairing shows which player won its tie-break
+        if tiebreak is not None:
+            score = f"{score} (TB {'won' if tiebreak[0] == player.get_name() else 'lost'})"
+        match_results[player.get_name()][opponent.get_name()] = score
 
 def print_cross_table(match_results):
     print("\nCross Table:")
@@ -84,7 +192,7 @@ def print_cross_table(match_results):
         print(f"{name:<15}" + " ".join(f"{result:<15}" for result in results))
     print()
 
-def print_leaderboard(players, final=False):
+def print_leaderboard(players, final=False, uncertainty=None):
     print("\n" + "=" * 60)
     title = "Final Leaderboard" if final else "Leaderboard"
     print("{:^40}".format(title))
@@ -96,7 +204,29 @@ def print_leaderboard(players, final=False):
     else:
         sorted_scores = sorted(players.items(), key=lambda x: x[1], reverse=True)
         for position, (player, score) in enumerate(sorted_scores, start=1):
-            print("{:2}. {:<40} {:>5}".format(position, f"{player.get_name()} ({player.__class__.__name__})", score))
+            if uncertainty is None:
+                print("{:2}. {:<40} {:>5}".format(position, f"{player.get_name()} ({player.__class__.__name__})", score))
+            else:
+                print("{:2}. {:<40} {:>9.1f} ± {:.1f}".format(position, f"{player.get_name()} ({player.__class__.__name__})",
+                                                             score, uncertainty[player]))
+
+    print("=" * 60 + "\n")
+
+def print_rated_leaderboard(players, rating, confidence):
+    print("\n" + "=" * 60)
+    print("{:^40}".format("Rated Leaderboard"))
+    print("=" * 60)
+
+    ratings = rating.get_ratings()
+    critical_value = get_critical_value(confidence)
+    sorted_players = sorted(players, key=lambda player: ratings[player.get_name()][0], reverse=True)
+    for position, player in enumerate(sorted_players, start=1):
+        value, error = ratings[player.get_name()]
+        label = f"{player.get_name()} ({player.__class__.__name__})"
+        if error is None:
+            print("{:2}. {:<40} {:>7.0f}".format(position, label, value))
+        else:
+            print("{:2}. {:<40} {:>7.0f} ± {:.0f}".format(position, label, value, critical_value * error))
 
     print("=" * 60 + "\n")
 
@@ -118,6 +248,134 @@ def main():
     parser.add_argument('--num-iterations', type=int, default=10000,
                         help='Number of iterations in the simulation. Defaults to 10000.')
 
+    # Number of worker processes (default: 1)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes used to play the pairings of each round. Defaults to 1.')
+
+    # Number of shards per pairing (default: 1)
+    parser.add_argument('--shards', type=int, default=1,
+                        help='Number of chunks in which the iterations of each pairing are split between workers. Defaults to 1.')
+
+    # Number of games after which the results are spilled to disk (default: never)
+    parser.add_argument('--spill-threshold', type=int, default=None,
+                        help='Number of games of a pairing after which its results are moved to memory-mapped files. Defaults to never.')
+
+    # Directory of the spilled results (default: system temporary directory)
+    parser.add_argument('--spill-dir', default=None,
+                        help='Directory where the results are spilled. Defaults to the system temporary directory.')
+
+    # Seed of the tournament (default: random)
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Seed of the tournament. Makes the results reproducible. Defaults to a random seed.')
+
+    # Directory of the game traces (default: no traces)
+    parser.add_argument('--trace', default=None,
+                        help='Directory where the games are recorded in binary traces that can be replayed. Defaults to no traces.')
+
+    # Latency instrumentation (default: False)
+    parser.add_argument('--latency', action='store_true', default=False,
+                        help='Measure the latency of the players and print it with the stats. Defaults to False.')
+
+    # File where the latency is exported (default: no export)
+    parser.add_argument('--latency-json', default=None,
+                        help='Export the latency of the players to a JSON file. Implies --latency.')
+
+    # Time budget per move (default: no limit)
+    parser.add_argument('--move-time', type=float, default=None,
+                        help='Time budget of each move, in seconds. Defaults to no limit.')
+
+    # Time bank per game (default: no limit)
+    parser.add_argument('--game-time', type=float, default=None,
+                        help='Time bank of each player for a whole game, in seconds. Defaults to no limit.')
+
+    # Maximum number of invalid actions in a row (default: no limit)
+    parser.add_argument('--max-retries', type=int, default=None,
+                        help='Number of invalid actions a player can return in a row. Defaults to no limit.')
+
+    # Action played when a time control is broken (default: first valid action)
+    parser.add_argument('--fallback-action', choices=TimeControl.FALLBACKS, default=TimeControl.FALLBACK_DEFAULT,
+                        help='Action played for a player that breaks a time control. Defaults to the first valid action.')
+
+    # Penalty for breaking a time control (default: 0)
+    parser.add_argument('--time-penalty', type=float, default=0,
+                        help='Value added to the score of a player each time it breaks a time control. Defaults to 0.')
+
+    # Sequential test used to stop the pairings early (default: none)
+    parser.add_argument('--early-stopping', choices=SEQUENTIAL_TESTS.keys(), default=None,
+                        help='Stop each pairing as soon as a sequential test (ci or sprt) separates the players. Defaults to playing all iterations.')
+
+    # Confidence of the sequential test (default: 0.95)
+    parser.add_argument('--confidence', type=float, default=0.95,
+                        help='Confidence level of the sequential test and of the leaderboard intervals. Defaults to 0.95.')
+
+    # Minimum number of iterations before stopping (default: 50)
+    parser.add_argument('--min-iterations', type=int, default=50,
+                        help='Minimum number of iterations of a pairing before it can stop early. Defaults to 50.')
+
+    # Effect size of the SPRT (default: 0.05)
+    parser.add_argument('--sprt-delta', type=float, default=0.05,
+                        help='The SPRT tests a win rate of 0.5 + delta against 0.5 - delta in decisive games. Defaults to 0.05.')
+
+    # How the games of a round are scheduled (default: fixed)
+    parser.add_argument('--schedule', choices=SCHEDULES, default='fixed',
+                        help='fixed plays every iteration of every pairing; adaptive plays batches on the pairings that can still change the eliminated player. Defaults to fixed.')
+
+    # Budget of an adaptive round (default: the iterations of a fixed round)
+    parser.add_argument('--round-budget', type=int, default=None,
+                        help='Maximum number of iterations of an adaptive round. Defaults to --num-iterations times the number of pairings.')
+
+    # Size of the batches of an adaptive round (default: 20)
+    parser.add_argument('--batch-iterations', type=int, default=20,
+                        help='Number of iterations played at once on a pairing of an adaptive round. Defaults to 20.')
+
+    # Maximum number of extra games of a drawn pairing (default: 100)
+    parser.add_argument('--max-draw-games', type=int, default=100,
+                        help='Maximum number of extra games played while a pairing is a draw, before a tie-break on the results decides it. Defaults to 100.')
+
+    # Rule of the extra games of a drawn pairing (default: replay)
+    parser.add_argument('--draw-rule', choices=DRAW_RULES, default='replay',
+                        help='replay plays more regular iterations, seat-swap plays both seats of each iteration, armageddon plays single games where a draw is won by the player in the last seat. Defaults to replay.')
+
+    # Number of iterations played in lockstep (default: 1)
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Number of iterations of a pairing played in lockstep, so that players with a get_actions method choose the actions of all the games in a single call. Defaults to 1.')
+
+    # Players hosted in their own processes (default: False)
+    parser.add_argument('--player-host', action='store_true', default=False,
+                        help='Run each player in its own process, so that a crashing player does not stop the tournament. Defaults to False.')
+
+    # Python interpreter of the player hosts (default: the current one)
+    parser.add_argument('--player-python', default=None,
+                        help='Python interpreter used to run the hosted players. Implies --player-host. Defaults to the current interpreter.')
+
+    # Rating system of the leaderboard (default: none)
+    parser.add_argument('--rating', choices=RATING_SYSTEMS.keys(), default=None,
+                        help='Rate the players (elo, glicko or bradley-terry) and eliminate the lowest rated player instead of the lowest score. Defaults to the score sums.')
+
+    # Growth of the glicko rating deviations in each round (default: 34.6)
+    parser.add_argument('--glicko-c', type=float, default=34.6,
+                        help='Growth of the glicko rating deviations in each round, so that the ratings keep moving. Defaults to 34.6.')
+
+    # Directory of the exported results (default: no export)
+    parser.add_argument('--export', default=None,
+                        help='Directory where the games and a summary of each pairing are exported. Defaults to no export.')
+
+    # Format of the exported results (default: jsonl)
+    parser.add_argument('--export-format', choices=EXPORT_FORMATS, default='jsonl',
+                        help='Format of the exported results: jsonl, csv or columnar (binary games and JSONL pairings). Defaults to jsonl.')
+
+    # Directory of the checkpoints (default: no checkpoints)
+    parser.add_argument('--checkpoint', default=None,
+                        help='Directory where the progress of the tournament is saved, so that it can be resumed with --resume. Defaults to no checkpoints.')
+
+    # Number of games between checkpoints of a pairing (default: 5000)
+    parser.add_argument('--checkpoint-every', type=int, default=5000,
+                        help='Number of games of a pairing between two checkpoints of the pairing being played. Defaults to 5000.')
+
+    # Resume from the last checkpoint (default: False)
+    parser.add_argument('--resume', action='store_true', default=False,
+                        help='Continue the tournament from the last checkpoint in the --checkpoint directory. Defaults to False.')
+
     # Player argument. This should be specified at least twice.
     parser.add_argument('--player', action='append', nargs=2, metavar=('NAME', 'TYPE'),
                         help='Add a player with a name and type. Requires two values. This option should be specified at least twice.')
@@ -128,12 +386,44 @@ def main():
     if args.player is None or len(args.player) < 2:
         parser.error('At least two --player arguments are required.')
 
-    try:
-        # Retrieve available player types for the selected game
-        available_player_types = AVAILABLE_PLAYER_TYPES[args.game]
-    except KeyError:
+    if args.game not in AVAILABLE_PLAYER_TYPES:
         parser.error(f"No player types available for the game '{args.game}'.")
 
+    if args.workers < 1:
+        parser.error('The number of workers must be 1 or over.')
+
+    if args.shards < 1:
+        parser.error('The number of shards must be 1 or over.')
+
+    if args.batch_iterations < 1:
+        parser.error('The number of iterations of a batch must be 1 or over.')
+
+    if args.batch_size < 1:
+        parser.error('The batch size must be 1 or over.')
+
+    if args.player_python is not None:
+        args.player_host = True
+
+    if args.player_host and args.batch_size > 1:
+        parser.error('Hosted players follow one game at a time, so they can not be used with --batch-size.')
+
+    if args.max_draw_games < 0:
+        parser.error('The maximum number of extra games of a draw must be 0 or over.')
+
+    if args.resume and args.checkpoint is None:
+        parser.error('--resume requires a --checkpoint directory.')
+
+    if args.checkpoint_every < 1:
+        parser.error('The number of games between checkpoints must be 1 or over.')
+
+    if not 0.5 < args.confidence < 1:
+        parser.error('The confidence must be between 0.5 and 1.')
+
+    time_control = None
+    if args.move_time is not None or args.game_time is not None or args.max_retries is not None:
+        time_control = TimeControl(args.move_time, args.game_time, args.max_retries, args.fallback_action,
+                                   args.time_penalty)
+
     used_names = set()
 
     players = []
@@ -144,23 +434,50 @@ def main():
         used_names.add(name)
 
         # Find the player class that matches the provided type name
-        player_class = None
-        for cls in available_player_types:
-            if cls.__name__ == type_name:
-                player_class = cls
-                break
+        player_class = get_player_type(args.game, type_name)
 
         if player_class is None:
             parser.error(f"Player type '{type_name}' is not available for game '{args.game}'.")
 
-        # Create a new player instance
-        players.append(player_class(name))
+        # Create a new player instance, or a proxy of the player running in its own process
+        if args.player_host:
+            players.append(create_remote_player(name, args.game, type_name, args.player_python))
+        else:
+            players.append(player_class(name))
 
     # Your logic to build the object with these arguments
     game_settings = {
         'game': AVAILABLE_GAME_TYPES[args.game],
+        'game_type': args.game,
         'seat_permutation': args.seat_permutation,
         'num_iterations': args.num_iterations,
+        'workers': args.workers,
+        'shards': args.shards,
+        'spill_threshold': args.spill_threshold,
+        'spill_dir': args.spill_dir,
+        'seed': args.seed,
+        'trace': args.trace,
+        'latency': args.latency or args.latency_json is not None,
+        'latency_json': args.latency_json,
+        'time_control': time_control,
+        'early_stopping': args.early_stopping,
+        'confidence': args.confidence,
+        'min_iterations': args.min_iterations,
+        'sprt_delta': args.sprt_delta,
+        'schedule': args.schedule,
+        'round_budget': args.round_budget,
+        'batch_iterations': args.batch_iterations,
+        'max_draw_games': args.max_draw_games,
+        'draw_rule': args.draw_rule,
+        'rating': args.rating,
+        'glicko_c': args.glicko_c,
+        'batch_size': args.batch_size,
+        'player_host': args.player_host,
+        'player_python': args.player_python,
+        'export': args.export,
+        'export_format': args.export_format,
+        'checkpoint': None if args.checkpoint is None else Checkpoint(args.checkpoint, args.checkpoint_every),
+        'resume': args.resume,
         'players': players
     }
 
@@ -0,0 +1,209 @@
+import ast
+import importlib
+import json
+import os
+from pathlib import Path
+
+
+"""
+The games: the simulator class, the base player class and the package of the players of each game, as
+(module, class name) paths. Nothing is imported until a game is selected
+"""
+GAMES = {
+    "hlpoker": {
+        'simulator': ("games.hlpoker.simulator", "HLPokerSimulator"),
+        'player': ("games.hlpoker.player", "HLPokerPlayer"),
+        'players': "games.hlpoker.players"
+    },
+    "connect4": {
+        'simulator': ("games.connect4.simulator", "Connect4Simulator"),
+        'player': ("games.connect4.player", "Connect4Player"),
+        'players': "games.connect4.players"
+    },
+    "minesweeper": {
+        'simulator': ("games.minesweeper.simulator", "MinesweeperSimulator"),
+        'player': ("games.minesweeper.player", "MinesweeperPlayer"),
+        'players': "games.minesweeper.players"
+    }
+}
+
+"""
+The root of the source tree (where the game packages are) and the default location of the manifest
+"""
+SOURCE_DIR = Path(__file__).parent
+MANIFEST_PATH = SOURCE_DIR / ".player_registry.json"
+
+MANIFEST_VERSION = 1
+
+
+def import_attribute(path):
+    module_name, attribute_name = path
+    return getattr(importlib.import_module(module_name), attribute_name)
+
+
+class PlayerRegistry:
+    """
+    a manifest of the player classes of every game, built by parsing the modules of the players folders (without
+    importing them) and cached on disk. each module is parsed again only when its modification time or size change,
+    so the startup does not grow with the number of players. the modules of a player are only imported when the
+    player is selected
+    """
+
+    """
+    :param manifest_path: the file where the manifest is cached (None to keep it in memory)
+    """
+    def __init__(self, manifest_path=MANIFEST_PATH):
+        self.__manifest_path = manifest_path
+        self.__manifest = None
+
+    def __load(self):
+        if self.__manifest is not None:
+            return self.__manifest
+
+        cached = {}
+        if self.__manifest_path is not None:
+            try:
+                with open(self.__manifest_path) as file:
+                    cached = json.load(file)
+            except (OSError, ValueError):
+                cached = {}
+        if cached.get('version') != MANIFEST_VERSION:
+            cached = {}
+
+        changed = False
+        games = {}
+        for game_type, game in GAMES.items():
+            cached_files = cached.get('games', {}).get(game_type, {})
+            files = {}
+            for relative_path, path in PlayerRegistry.get_player_files(game['players']):
+                stat = path.stat()
+                entry = cached_files.get(relative_path)
+                if entry is None or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                    entry = {
+                        'mtime_ns': stat.st_mtime_ns,
+                        'size': stat.st_size,
+                        'classes': PlayerRegistry.parse_classes(path)
+                    }
+                    changed = True
+                files[relative_path] = entry
+            changed = changed or files.keys() != cached_files.keys()
+            games[game_type] = files
+
+        self.__manifest = {'version': MANIFEST_VERSION, 'games': games}
+        if changed and self.__manifest_path is not None:
+            self.__save()
+        return self.__manifest
+
+    def __save(self):
+        # the manifest is replaced atomically, so concurrent processes never read a partial file
+        temporary_path = f"{self.__manifest_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, 'w') as file:
+                json.dump(self.__manifest, file, indent=1)
+            os.replace(temporary_path, self.__manifest_path)
+        except OSError:
+            # a read-only source tree only means the manifest is rebuilt on every start
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    """
+    lists the modules of a players package, like pkgutil.walk_packages: the modules of the folder and of its
+    sub-packages
+    :returns: list of (path relative to the package, absolute path) tuples
+    """
+    @staticmethod
+    def get_player_files(package):
+        players_dir = SOURCE_DIR.joinpath(*package.split('.'))
+        if not players_dir.is_dir():
+            raise ValueError(f"No 'players' subfolder found in {players_dir.parent}")
+
+        files = []
+        for directory, subdirectories, filenames in os.walk(players_dir):
+            directory = Path(directory)
+            subdirectories[:] = sorted(name for name in subdirectories if (directory / name / "__init__.py").is_file())
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    path = directory / filename
+                    files.append((path.relative_to(players_dir).as_posix(), path))
+        return files
+
+    """
+    gets the classes defined in a module and the names of their base classes
+    :returns: dictionary with the names of the base classes of each class, or an empty dictionary if the module can
+              not be parsed
+    """
+    @staticmethod
+    def parse_classes(path):
+        try:
+            tree = ast.parse(Path(path).read_bytes(), filename=str(path))
+        except (SyntaxError, ValueError):
+            return {}
+
+        classes = {}
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef):
+                classes[node.name] = [
+                    base.id if isinstance(base, ast.Name) else base.attr
+                    for base in node.bases if isinstance(base, (ast.Name, ast.Attribute))
+                ]
+        return classes
+
+    """
+    gets the module of each player class of a game, including the subclasses of other players
+    :returns: dictionary with the module name of each player class name
+    """
+    def get_player_modules(self, game_type):
+        game = GAMES[game_type]
+        files = self.__load()['games'][game_type]
+        player_types = {game['player'][1]}
+        modules = {}
+
+        # the subclasses of the players are found by repeating until no new class is found
+        found = True
+        while found:
+            found = False
+            for relative_path, entry in files.items():
+                module_name = PlayerRegistry.get_module_name(game['players'], relative_path)
+                for class_name, bases in entry['classes'].items():
+                    if class_name not in modules and player_types.intersection(bases):
+                        modules[class_name] = module_name
+                        player_types.add(class_name)
+                        found = True
+        return modules
+
+    @staticmethod
+    def get_module_name(package, relative_path):
+        module_path = relative_path[:-len(".py")]
+        if module_path.endswith("/__init__"):
+            module_path = module_path[:-len("/__init__")]
+        return f"{package}.{module_path.replace('/', '.')}"
+
+    """
+    imports a player class of a game
+    :returns: the player class or None if the game has no player with that name, or its module can not be imported
+    """
+    def get_player_type(self, game_type, type_name):
+        module_name = self.get_player_modules(game_type).get(type_name)
+        if module_name is None:
+            return None
+
+        try:
+            player_class = getattr(importlib.import_module(module_name), type_name, None)
+        except ImportError:
+            return None
+
+        base_class = import_attribute(GAMES[game_type]['player'])
+        if not isinstance(player_class, type) or not issubclass(player_class, base_class):
+            return None
+        return player_class
+
+    """
+    imports all the player classes of a game
+    """
+    def get_player_types(self, game_type):
+        player_types = []
+        for type_name in self.get_player_modules(game_type):
+            player_class = self.get_player_type(game_type, type_name)
+            if player_class is not None:
+                player_types.append(player_class)
+        return player_types
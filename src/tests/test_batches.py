@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from games.connect4.players.greedy import GreedyConnect4Player
+from games.connect4.players.random import RandomConnect4Player
+from games.connect4.simulator import Connect4Simulator
+from games.minesweeper.players.random import RandomMinesweeperPlayer
+from games.minesweeper.players.safe import PlaySafeMinesweeperPlayer
+from games.minesweeper.simulator import MinesweeperSimulator
+from tournament.pairing import run_game_batch
+
+
+class BatchedConnect4Player(RandomConnect4Player):
+    # a deterministic player that evaluates its states at once, so the games are played in lockstep
+    def get_action(self, state):
+        return state.get_possible_actions()[-1]
+
+    def get_actions(self, states: list):
+        return [self.get_action(state) for state in states]
+
+
+SIMULATORS = {
+    "connect4": lambda: Connect4Simulator([RandomConnect4Player("a"), GreedyConnect4Player("b")]),
+    "connect4_lockstep": lambda: Connect4Simulator([RandomConnect4Player("a"), BatchedConnect4Player("b")]),
+    "minesweeper": lambda: MinesweeperSimulator([RandomMinesweeperPlayer("a"), PlaySafeMinesweeperPlayer("b")]),
+}
+
+
+def play(game, num_iterations, batch_size):
+    simulator = SIMULATORS[game]()
+    simulator.set_seed(42, "a VS b")
+    played = 0
+    while played < num_iterations:
+        batch = min(batch_size, num_iterations - played)
+        run_game_batch(simulator, True, batch)
+        played += batch
+    scores = simulator.get_results().scores
+    return {name: np.frombuffer(scores[name], dtype=np.float64).copy() for name in ("a", "b")}
+
+
+@pytest.mark.parametrize("game", SIMULATORS.keys())
+@pytest.mark.parametrize("batch_size", [2, 7])
+def test_batches_play_the_same_games_as_serial_runs(game, batch_size):
+    serial = play(game, 30, 1)
+    batched = play(game, 30, batch_size)
+    for name in ("a", "b"):
+        assert np.array_equal(serial[name], batched[name])
@@ -0,0 +1,44 @@
+import pytest
+
+from games.connect4.players.greedy import GreedyConnect4Player
+from games.connect4.players.random import RandomConnect4Player
+from games.connect4.simulator import Connect4Simulator
+from tournament.export import EXPORT_FORMATS, ResultExporter
+
+
+def play(simulator, num_games):
+    for _ in range(num_games):
+        simulator.run_simulation()
+        simulator.change_player_positions()
+
+
+def read_files(directory):
+    return {path.name: path.read_bytes() for path in directory.iterdir()}
+
+
+@pytest.mark.parametrize("export_format", EXPORT_FORMATS)
+def test_resumed_export_writes_the_files_of_an_uninterrupted_one(tmp_path, export_format):
+    simulators = []
+    for _ in range(2):
+        simulator = Connect4Simulator([RandomConnect4Player("a"), GreedyConnect4Player("b")])
+        simulator.set_seed(1, "a VS b")
+        simulators.append(simulator)
+
+    play(simulators[0], 10)
+    with ResultExporter(tmp_path / "uninterrupted", export_format) as exporter:
+        exporter.export_pairing(simulators[0], 1)
+        play(simulators[0], 10)
+        exporter.export_pairing(simulators[0], 2)
+
+    # the interrupted tournament exported its second round after the checkpoint of the first one
+    play(simulators[1], 10)
+    with ResultExporter(tmp_path / "resumed", export_format) as exporter:
+        exporter.export_pairing(simulators[1], 1)
+        progress = exporter.get_progress()
+        play(simulators[1], 10)
+        exporter.export_pairing(simulators[1], 2)
+    with ResultExporter(tmp_path / "resumed", export_format) as exporter:
+        exporter.resume(progress)
+        exporter.export_pairing(simulators[1], 2)
+
+    assert read_files(tmp_path / "resumed") == read_files(tmp_path / "uninterrupted")
@@ -0,0 +1,12 @@
+import pytest
+
+from games.player_host import create_remote_player
+
+
+def test_remote_player_only_forwards_the_events_of_the_games():
+    player = create_remote_player("a", "hlpoker", "RandomHLPokerPlayer")
+    # the events are only sent with the next request, so the host is not started
+    player.start_new_game([])
+    with pytest.raises(AttributeError):
+        player.get_unknown_value()
+    assert not hasattr(player, 'start_new_gmae')
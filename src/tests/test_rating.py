@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+
+from tournament.rating import BradleyTerryRating, EloRating, GlickoRating
+
+
+def play(rating, name1, name2, wins, losses):
+    scores1 = np.array([1.0] * wins + [-1.0] * losses)
+    rating.add_games(name1, name2, scores1, -scores1)
+
+
+def test_glicko_deviation_grows_for_an_inactive_player():
+    rating = GlickoRating(c=34.6)
+    play(rating, "a", "b", 30, 20)
+    play(rating, "b", "c", 25, 25)
+    rating.end_period()
+
+    # only b and c play in the next period
+    deviation = rating.get_ratings()["a"][1]
+    play(rating, "b", "c", 25, 25)
+    rating.end_period()
+
+    assert rating.get_ratings()["a"][1] > deviation
+    assert rating.get_ratings()["a"][1] == pytest.approx(np.sqrt(deviation ** 2 + 34.6 ** 2))
+
+
+def test_glicko_deviation_is_bounded_by_the_initial_deviation():
+    rating = GlickoRating(initial_deviation=350, c=200)
+    play(rating, "a", "b", 1, 0)
+    for _ in range(10):
+        rating.end_period()
+
+    assert rating.get_ratings()["a"][1] == 350
+
+
+def test_glicko_ratings_keep_moving_after_many_games():
+    frozen = GlickoRating(c=0)
+    inflated = GlickoRating(c=34.6)
+    for rating in (frozen, inflated):
+        for _ in range(10):
+            play(rating, "a", "b", 500, 500)
+            rating.end_period()
+
+    # the same upset moves the ratings more when the deviations grow between periods
+    before = {rating: rating.get_ratings()["a"][0] for rating in (frozen, inflated)}
+    for rating in (frozen, inflated):
+        play(rating, "a", "b", 20, 0)
+    assert inflated.get_ratings()["a"][0] - before[inflated] > 2 * (frozen.get_ratings()["a"][0] - before[frozen])
+
+
+def test_elo_updates_by_half_of_k_between_equal_players():
+    rating = EloRating(k=16)
+    play(rating, "a", "b", 1, 0)
+
+    assert rating.get_ratings()["a"][0] == pytest.approx(1508)
+    assert rating.get_ratings()["b"][0] == pytest.approx(1492)
+
+
+def test_elo_converges_to_the_difference_of_the_win_rate():
+    rating = EloRating(k=2)
+    # a wins 3 games out of 4, which is a difference of 400 * log10(3) in the elo scale
+    for _ in range(2000):
+        play(rating, "a", "b", 3, 1)
+
+    ratings = rating.get_ratings()
+    assert ratings["a"][0] + ratings["b"][0] == pytest.approx(3000)
+    assert ratings["a"][0] - ratings["b"][0] == pytest.approx(400 * np.log10(3), abs=10)
+
+
+def test_elo_orders_the_players_by_their_results():
+    rating = EloRating()
+    # the ratings follow the last games, so the pairings are interleaved
+    for _ in range(10):
+        play(rating, "a", "b", 7, 3)
+        play(rating, "b", "c", 7, 3)
+        play(rating, "a", "c", 10, 0)
+        play(rating, "c", "d", 10, 0)
+
+    ratings = rating.get_ratings()
+    assert sorted(ratings, key=lambda name: -ratings[name][0]) == ["a", "b", "c", "d"]
+
+
+def test_bradley_terry_recovers_the_strengths_of_the_win_matrix():
+    # the games are won in the proportions of the model with strengths 1, 0 and -1 (natural log units)
+    strengths = {"a": 1.0, "b": 0.0, "c": -1.0}
+    rating = BradleyTerryRating()
+    for name1, name2 in [("a", "b"), ("b", "c"), ("a", "c")]:
+        wins = round(10000 / (1 + np.exp(strengths[name2] - strengths[name1])))
+        play(rating, name1, name2, wins, 10000 - wins)
+
+    ratings = rating.get_ratings()
+    for name, strength in strengths.items():
+        assert ratings[name][0] == pytest.approx(1500 + BradleyTerryRating.SCALE * strength, abs=2)
+        assert 0 < ratings[name][1] < 10
+
+
+def test_bradley_terry_fit_converges_to_the_maximum_likelihood():
+    rating = BradleyTerryRating(prior=1e-2)
+    play(rating, "a", "b", 30, 20)
+    play(rating, "b", "c", 12, 28)
+    play(rating, "a", "c", 5, 5)
+
+    # the gradient of the penalized log-likelihood is zero at the fitted strengths
+    strengths, _ = rating.fit()
+    wins = np.array([[0, 30, 5], [20, 0, 12], [5, 28, 0]])
+    probabilities = 1 / (1 + np.exp(strengths[None, :] - strengths[:, None]))
+    gradient = wins.sum(axis=1) - ((wins + wins.T) * probabilities).sum(axis=1) - 1e-2 * strengths
+    assert np.abs(gradient).max() < 1e-6
+    assert strengths.sum() == pytest.approx(0)
+
+    # more iterations do not move the strengths
+    assert np.allclose(rating.fit(max_iterations=1000)[0], strengths)
+
+
+def test_bradley_terry_ratings_are_finite_when_a_player_wins_or_loses_all_its_games():
+    rating = BradleyTerryRating()
+    play(rating, "a", "b", 20, 0)
+    play(rating, "b", "c", 20, 0)
+
+    ratings = rating.get_ratings()
+    for name in ("a", "b", "c"):
+        assert np.isfinite(ratings[name][0]) and np.isfinite(ratings[name][1])
+    assert ratings["a"][0] > ratings["b"][0] > ratings["c"][0]
+    # the ratings are symmetric around the average player
+    assert ratings["a"][0] - 1500 == pytest.approx(1500 - ratings["c"][0])
+
+
+def test_bradley_terry_counts_draws_as_half_a_win():
+    rating = BradleyTerryRating()
+    rating.add_games("a", "b", np.zeros(10), np.zeros(10))
+
+    ratings = rating.get_ratings()
+    assert ratings["a"][0] == pytest.approx(1500)
+    assert ratings["b"][0] == pytest.approx(1500)
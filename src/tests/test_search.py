@@ -0,0 +1,33 @@
+import random
+
+from games.connect4.action import Connect4Action
+from games.connect4.search import AlphaBetaSearch, from_player_view
+from games.connect4.state import Connect4State
+
+
+def evaluate_columns(state):
+    # favours the checkers of player 0 on the right side, so a position and its mirror have different values
+    grid = state.get_grid()
+    return sum(col for row in grid for col, cell in enumerate(row) if cell == 0)
+
+
+def play(moves):
+    state = Connect4State()
+    for col in moves:
+        state.update(Connect4Action(col))
+    return state
+
+
+def test_search_does_not_mix_mirrored_positions_with_an_asymmetric_evaluation():
+    rng = random.Random(3)
+    for _ in range(20):
+        moves = [rng.randrange(7) for _ in range(6)]
+        state, mirror = play(moves), play([6 - col for col in moves])
+
+        search = AlphaBetaSearch(from_player_view(evaluate_columns, 0))
+        search.search(state, max_depth=3)
+        search.search(mirror, max_depth=3)
+
+        fresh = AlphaBetaSearch(from_player_view(evaluate_columns, 0))
+        fresh.search(mirror, max_depth=3)
+        assert search.get_stats().value == fresh.get_stats().value
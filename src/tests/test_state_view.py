@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from games.connect4.action import Connect4Action
+from games.connect4.bitboard_state import BitboardConnect4State
+from games.connect4.state import Connect4State
+from games.hlpoker.simulator import HLPokerSimulator
+from games.hlpoker.players.always_call import AlwaysCallHLPokerPlayer
+from games.minesweeper.simulator import MinesweeperSimulator
+from games.minesweeper.players.random import RandomMinesweeperPlayer
+from games.state_view import StateView
+
+
+def play_connect4(state_type):
+    state = state_type(6, 7)
+    for col in (3, 3, 4, 0):
+        state.update(Connect4Action(col))
+    return state
+
+
+STATES = {
+    "connect4": lambda: play_connect4(Connect4State),
+    "connect4_bitboard": lambda: play_connect4(BitboardConnect4State),
+    "minesweeper": lambda: MinesweeperSimulator([RandomMinesweeperPlayer("a")]).create_state(random.Random(1)),
+}
+
+
+@pytest.mark.parametrize("game", STATES.keys())
+def test_changing_the_grid_of_a_view_leaves_the_state_unchanged(game):
+    state = STATES[game]()
+    grid = [list(row) for row in state.get_grid()]
+    view = StateView(state)
+
+    view_grid = view.get_grid()
+    with pytest.raises(TypeError):
+        view_grid[0][0] = 1
+    with pytest.raises((TypeError, AttributeError)):
+        view_grid[0].append(1)
+    assert [list(row) for row in state.get_grid()] == grid
+    assert [list(row) for row in view_grid] == grid
+
+
+def test_changing_the_sequence_of_a_view_leaves_the_state_unchanged():
+    simulator = HLPokerSimulator([AlwaysCallHLPokerPlayer("a"), AlwaysCallHLPokerPlayer("b")])
+    state = simulator.create_state(random.Random(1))
+    state.update(state.get_possible_actions()[0])
+    sequence = list(state.get_sequence())
+    view = StateView(state)
+
+    with pytest.raises(AttributeError):
+        view.get_sequence().append(sequence[0])
+    assert state.get_sequence() == sequence
+
+
+def test_a_detached_view_returns_its_own_grid():
+    state = play_connect4(Connect4State)
+    view = StateView(state)
+    grid = view.get_grid()
+
+    view.update(Connect4Action(6))
+    assert view.get_grid() != grid
+    assert state.get_grid()[-1][6] == Connect4State.EMPTY_CELL
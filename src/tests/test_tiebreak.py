@@ -0,0 +1,54 @@
+from collections import defaultdict
+
+from games.connect4.players.random import RandomConnect4Player
+from games.connect4.simulator import Connect4Simulator
+from main import remove_worst_player, update_match_results, update_scores, update_tiebreaks
+from tournament.export import ResultExporter
+from tournament.pairing import check_draw, resolve_draw, run_game_iteration
+
+
+class LastColumnConnect4Player(RandomConnect4Player):
+    # a deterministic player, so both players win the games where they play first and the pairing is a draw
+    def get_action(self, state):
+        return state.get_possible_actions()[-1]
+
+
+def play_draw():
+    player1, player2 = LastColumnConnect4Player("a"), LastColumnConnect4Player("b")
+    simulator = Connect4Simulator([player1, player2])
+    simulator.set_seed(42, "a VS b")
+    run_game_iteration(simulator, True)
+    return simulator, player1, player2
+
+
+def test_the_tiebreak_winner_is_ranked_above_the_loser():
+    simulator, player1, player2 = play_draw()
+    totals = simulator.get_global_score()
+    assert totals["a"] == totals["b"]
+    simulator.set_tiebreak("b", "games won")
+
+    names = {"a": player1, "b": player2}
+    scores, tiebreaks = defaultdict(int), defaultdict(int)
+    update_scores(scores, simulator, names)
+    update_tiebreaks(tiebreaks, simulator, names)
+    # the first player of the list has the same score, so only the tie-break removes the loser
+    players = [player2, player1]
+    assert remove_worst_player(players, scores, tiebreaks) is player1
+    assert players == [player2]
+
+    match_results = defaultdict(dict)
+    update_match_results(match_results, simulator, player1, player2)
+    assert match_results["a"]["b"] == f"{totals['a']} (TB lost)"
+    assert match_results["b"]["a"] == f"{totals['b']} (TB won)"
+
+    assert ResultExporter.get_summary(simulator, 1, (1, 1, 0))['tiebreak'] == "b"
+
+
+def test_a_pairing_that_is_no_longer_a_draw_loses_its_tiebreak():
+    simulator, _, _ = play_draw()
+    simulator.set_tiebreak("b", "games won")
+    # a single game makes one of the players ahead
+    simulator.run_simulation()
+    assert not check_draw(simulator)
+    resolve_draw({'draw_rule': 'replay', 'max_draw_games': 0, 'seat_permutation': True}, simulator)
+    assert simulator.get_tiebreak() is None
@@ -0,0 +1,27 @@
+import random
+
+import pytest
+
+from games.connect4.bitboard_state import BitboardConnect4State
+from games.connect4.result import Connect4Result
+from games.connect4.state import Connect4State
+
+
+@pytest.mark.parametrize("num_rows, num_cols", [(6, 7), (4, 4), (4, 9), (9, 4), (20, 30)])
+def test_win_detection_matches_a_full_board_scan(num_rows, num_cols):
+    # update only looks at the lines through the last checker, so it is checked against a scan of the whole board
+    # after every move of random games. the bitboard state must agree with both
+    rng = random.Random(1234)
+    for _ in range(200):
+        state = Connect4State(num_rows, num_cols)
+        bitboard = BitboardConnect4State(num_rows, num_cols)
+        while not state.is_finished():
+            player = state.get_acting_player()
+            action = rng.choice(state.get_possible_actions())
+            state.update(action)
+            bitboard.update(action)
+
+            won = state.get_result(player) == Connect4Result.WIN.value
+            assert won == state.check_winner_full(player)
+            assert bitboard.is_finished() == state.is_finished()
+            assert bitboard.get_result(player) == state.get_result(player)
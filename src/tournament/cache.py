@@ -0,0 +1,89 @@
+from tournament.parallel import play_pairings
+
+
+class MatchupCache:
+    """
+    stores the simulator of each pairing that was already played, so that the surviving pairings of an
+    elimination round are not replayed in the following rounds
+    """
+
+    """
+    the settings that change the outcome of a pairing. the remaining ones (e.g. the number of workers)
+    only change how the games are played
+    """
+    SETTINGS_KEYS = ['game_type', 'seat_permutation', 'num_iterations', 'early_stopping', 'confidence',
+                     'min_iterations', 'sprt_delta', 'schedule', 'round_budget', 'batch_iterations',
+                     'max_draw_games', 'draw_rule', 'batch_size', 'time_control', 'player_host', 'player_python']
+
+    def __init__(self):
+        """
+        the simulators of the pairings that were played, by matchup key
+        """
+        self.__entries = {}
+
+    """
+    gets the key of a pairing: the name and class of both players, the game settings and the seed
+    """
+    @staticmethod
+    def get_key(game_settings, player1, player2):
+        return (
+            (player1.get_name(), player1.__class__.__name__),
+            (player2.get_name(), player2.__class__.__name__),
+            MatchupCache.get_settings(game_settings),
+            game_settings.get('seed')
+        )
+
+    """
+    gets the settings that change the outcome of a pairing (see SETTINGS_KEYS), as a tuple of (key, value) pairs
+    that can be compared and stored. the time controls are given by their settings
+    """
+    @staticmethod
+    def get_settings(game_settings):
+        settings = []
+        for key in MatchupCache.SETTINGS_KEYS:
+            value = game_settings.get(key)
+            if key == 'time_control' and value is not None:
+                value = value.get_settings()
+            settings.append((key, value))
+        return tuple(settings)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key):
+        return self.__entries.get(key)
+
+    def put(self, key, simulator):
+        self.__entries[key] = simulator
+
+    """
+    gets the simulators of all the pairings that were played
+    """
+    def get_simulators(self):
+        return list(self.__entries.values())
+
+    """
+    Yields the simulator of every pairing in order. Cached pairings are reused and only the missing ones are played
+    :param game_settings: the tournament settings (see main.py)
+    :param pairings: list of (player1, player2) tuples
+    """
+    def play_pairings(self, game_settings, pairings):
+        keys = [MatchupCache.get_key(game_settings, player1, player2) for player1, player2 in pairings]
+        missing = [pairing for pairing, key in zip(pairings, keys) if key not in self]
+        played = play_pairings(game_settings, missing)
+
+        for (player1, player2), key in zip(pairings, keys):
+            if key in self:
+                print(f"Simulation: {player1.get_name()} VS {player2.get_name()} (cached)")
+            else:
+                self.put(key, next(played))
+                # a completed pairing is never played again, so it is saved as soon as it is played
+                if game_settings.get('checkpoint') is not None:
+                    game_settings['checkpoint'].save_pairing(key, self.get(key))
+            yield self.get(key)
+
+        # shuts down the worker pool (if any)
+        played.close()
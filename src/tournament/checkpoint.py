@@ -0,0 +1,262 @@
+import os
+import pickle
+import random
+
+from games.rng import derive_seed
+from tournament.cache import MatchupCache
+
+
+"""
+The files of a checkpoint directory:
+    - the progress of the tournament: the players, the current round, the eliminated players, the ratings, the
+      random state, the files of the pairings that were played and the progress of the export of the results
+    - one file per pairing with its simulator, named after its number of games, only written again when the pairing
+      plays more games. the file of the previous save is removed once the progress refers to the new one, so the
+      progress always refers to pairings that were saved together
+    - the pairing that is being played, with the games played so far
+"""
+PROGRESS_FILE = "tournament.pkl"
+PARTIAL_FILE = "partial.pkl"
+PAIRING_PREFIX = "pairing-"
+
+CHECKPOINT_VERSION = 2
+
+
+class Checkpoint:
+    """
+    saves the progress of a tournament in a directory, so that a tournament that was interrupted can be resumed
+    without playing again the games that were already played. the completed pairings are saved once, so a save only
+    writes the progress (a few bytes) and the pairing being played.
+    every file is replaced atomically, so an interruption while saving leaves the previous checkpoint intact
+    """
+
+    """
+    :param directory: the directory of the checkpoint files
+    :param every: the number of games of a pairing between saves of the pairing being played (None to only save
+                  completed pairings)
+    """
+    def __init__(self, directory, every: int = None):
+        self.__directory = directory
+        self.__every = every
+
+        """
+        the progress of the tournament, as saved in the progress file
+        """
+        self.__progress = None
+
+        """
+        the matchup key and the number of games of the last save of the pairing being played
+        """
+        self.__partial_games = (None, 0)
+
+        """
+        the pairing that was being played when the checkpoint was saved (restored on resume)
+        """
+        self.__partial = None
+
+    def __path(self, name):
+        return os.path.join(self.__directory, name)
+
+    def __write(self, name, value):
+        path = self.__path(name)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, 'wb') as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+    def __read(self, name):
+        with open(self.__path(name), 'rb') as file:
+            return pickle.load(file)
+
+    @staticmethod
+    def get_pairing_file(key, games):
+        return f"{PAIRING_PREFIX}{derive_seed(key):016x}-{games}.pkl"
+
+    """
+    gets what identifies a tournament: the players and the settings that change the outcome of the pairings
+    """
+    @staticmethod
+    def get_identity(game_settings, players):
+        return (
+            [(player.get_name(), player.__class__.__name__) for player in players],
+            list(MatchupCache.get_settings(game_settings)) +
+            [(key, game_settings.get(key)) for key in ['seed', 'rating', 'glicko_c']]
+        )
+
+    """
+    Starts a new checkpoint, removing the files of a previous one in the same directory
+    :param players: the players of the tournament
+    """
+    def start(self, game_settings, players):
+        os.makedirs(self.__directory, exist_ok=True)
+        for name in os.listdir(self.__directory):
+            if name in (PROGRESS_FILE, PARTIAL_FILE) or name.startswith(PAIRING_PREFIX):
+                os.remove(self.__path(name))
+
+        self.__progress = {
+            'version': CHECKPOINT_VERSION,
+            'identity': Checkpoint.get_identity(game_settings, players),
+            'round': 1,
+            'players': [player.get_name() for player in players],
+            'removed_players': [],
+            'rating': None,
+            'pairings': {},
+            'export': None,
+            'round_played': 0,
+            'random_state': random.getstate()
+        }
+        self.__write(PROGRESS_FILE, self.__progress)
+
+    """
+    Loads the last checkpoint: the pairings that were played go back to the cache, and the random state is restored
+    :param players: the players of the tournament, which must be the ones of the checkpoint
+    :returns: the progress of the tournament (see start), or None if the directory has no checkpoint
+    """
+    def resume(self, game_settings, players, cache: MatchupCache):
+        if not os.path.exists(self.__path(PROGRESS_FILE)):
+            return None
+
+        progress = self.__read(PROGRESS_FILE)
+        if progress.get('version') != CHECKPOINT_VERSION:
+            raise ValueError(f"The checkpoint in '{self.__directory}' was saved by another version")
+        if progress['identity'] != Checkpoint.get_identity(game_settings, players):
+            raise ValueError(f"The checkpoint in '{self.__directory}' was saved with other players or settings")
+
+        for key, games in progress['pairings'].items():
+            simulator = self.__read(Checkpoint.get_pairing_file(key, games))
+            simulator.get_result_store().set_spill(game_settings.get('spill_threshold'), game_settings.get('spill_dir'))
+            cache.put(key, simulator)
+
+        random_state = progress['random_state']
+        if os.path.exists(self.__path(PARTIAL_FILE)):
+            partial = self.__read(PARTIAL_FILE)
+            # the pairing may have been completed after its last partial save
+            if partial['key'] not in cache:
+                self.__partial = partial
+                random_state = partial['random_state']
+        random.setstate(random_state)
+
+        self.__progress = progress
+        return progress
+
+    """
+    Saves a pairing, unless all its games were already saved
+    """
+    def save_pairing(self, key, simulator):
+        if self.__progress['pairings'].get(key) == len(simulator.get_result_store()):
+            return
+
+        self.__write_progress(self.__write_pairings([(key, simulator)]))
+
+        # the partial pairing is only removed once the completed one is in the progress
+        if os.path.exists(self.__path(PARTIAL_FILE)):
+            os.remove(self.__path(PARTIAL_FILE))
+
+    # writes the files of the pairings that played games since their last save, and refers to them in the progress
+    # :returns: the files of their previous saves, to remove once the progress is written
+    def __write_pairings(self, pairings):
+        stale_files = []
+        for key, simulator in pairings:
+            games = len(simulator.get_result_store())
+            saved_games = self.__progress['pairings'].get(key)
+            if saved_games == games:
+                continue
+
+            self.__write(Checkpoint.get_pairing_file(key, games), simulator)
+            self.__progress['pairings'][key] = games
+            if saved_games is not None:
+                stale_files.append(Checkpoint.get_pairing_file(key, saved_games))
+        return stale_files
+
+    # writes the progress, then removes the files of the pairings that it no longer refers to
+    def __write_progress(self, stale_files):
+        self.__progress['random_state'] = random.getstate()
+        self.__write(PROGRESS_FILE, self.__progress)
+        for name in stale_files:
+            os.remove(self.__path(name))
+
+    """
+    Saves the pairings of a round that plays them in batches (see AdaptiveScheduler), once they played enough games
+    since their last save. the number of iterations played in the round is saved with them, so a resumed round only
+    plays the rest of its budget
+    :param pairings: list of (key, simulator) tuples with the pairings of the round
+    :param played: the number of iterations played in the round
+    """
+    def update_round(self, pairings, played: int):
+        if self.__every is None:
+            return
+
+        saved_games = self.__progress['pairings']
+        unsaved = sum(len(simulator.get_result_store()) - saved_games.get(key, 0) for key, simulator in pairings)
+        if unsaved < self.__every:
+            return
+
+        # the progress is written after all the pairings, so it never counts games that were not saved
+        stale_files = self.__write_pairings(pairings)
+        self.__progress['round_played'] = played
+        self.__write_progress(stale_files)
+
+    """
+    Gets the number of iterations that the current round played before it was saved (see update_round)
+    """
+    def get_round_played(self):
+        return self.__progress.get('round_played', 0)
+
+    """
+    Saves the pairing being played, once it played enough games since its last save
+    :param test: the sequential test of the pairing (None when the pairing does not stop early)
+    :param played: the number of iterations of the pairing that were played
+    """
+    def update_pairing(self, game_settings, player1, player2, simulator, test, played: int):
+        if self.__every is None:
+            return
+
+        key = MatchupCache.get_key(game_settings, player1, player2)
+        games = len(simulator.get_result_store())
+        saved_key, saved_games = self.__partial_games
+        if games - (saved_games if saved_key == key else 0) < self.__every:
+            return
+
+        self.__write(PARTIAL_FILE, {
+            'key': key,
+            'simulator': simulator,
+            'test': test,
+            'played': played,
+            'random_state': random.getstate()
+        })
+        self.__partial_games = (key, games)
+
+    """
+    Gets the pairing that was being played when the checkpoint was saved, so it continues from its last save
+    :returns: (simulator, sequential test, iterations played) tuple, or None if the pairing was not being played
+    """
+    def resume_pairing(self, game_settings, player1, player2):
+        if self.__partial is None or self.__partial['key'] != MatchupCache.get_key(game_settings, player1, player2):
+            return None
+
+        partial, self.__partial = self.__partial, None
+        simulator = partial['simulator']
+        self.__partial_games = (partial['key'], len(simulator.get_result_store()))
+        simulator.get_result_store().set_spill(game_settings.get('spill_threshold'), game_settings.get('spill_dir'))
+        print(f"Resuming {player1.get_name()} VS {player2.get_name()} after {partial['played']} iterations")
+        return simulator, partial['test'], partial['played']
+
+    """
+    Saves the state of the tournament at the end of a round
+    :param round_number: the number of the next round
+    :param players: the players that are still in the tournament
+    :param removed_players: the eliminated players, the last one first
+    :param rating: the rating system of the leaderboard (None when the scores are used)
+    :param pairings: list of (key, simulator) tuples with the pairings of the round
+    :param export: the progress of the export of the results (see ResultExporter.get_progress), None when the results
+                   are not exported
+    """
+    def save_round(self, round_number, players, removed_players, rating, pairings, export=None):
+        stale_files = self.__write_pairings(pairings)
+        self.__progress['round'] = round_number
+        self.__progress['players'] = [player.get_name() for player in players]
+        self.__progress['removed_players'] = [player.get_name() for player in removed_players]
+        self.__progress['rating'] = rating
+        self.__progress['export'] = export
+        self.__progress['round_played'] = 0
+        self.__write_progress(stale_files)
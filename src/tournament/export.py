@@ -0,0 +1,275 @@
+import csv
+import io
+import json
+import os
+import struct
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+from games.result_store import ResultStore
+
+
+"""
+The formats of the exported results. The games of the columnar format are binary, and its pairings are JSONL
+"""
+EXPORT_FORMATS = ['jsonl', 'csv', 'columnar']
+
+"""
+The columns of the exported games and pairings
+"""
+GAME_COLUMNS = ['player1', 'player2', 'game', 'permutation', 'length', 'score1', 'score2']
+PAIRING_COLUMNS = ['round', 'player1', 'player2', 'games', 'total1', 'total2', 'mean1', 'mean2', 'variance1',
+                   'variance2', 'wins1', 'wins2', 'draws', 'tiebreak']
+
+"""
+The columnar format. A file starts with the magic, followed by blocks of games of a single pairing: the block header
+(the size of the names of the players and the number of games), the names (JSON) and one column after the other:
+the game indexes (uint64), the seat permutations (uint16), the game lengths (uint32) and the scores of both
+players (float64)
+"""
+COLUMNAR_MAGIC = b'GRESULT1\n'
+BLOCK_HEADER = struct.Struct('<IQ')
+GAME_INDEX_TYPECODE = 'Q'
+
+"""
+A block of games of the columnar format, with a typed array per column
+"""
+ResultBlock = namedtuple('ResultBlock', ['names', 'games', 'permutations', 'game_lengths', 'scores1', 'scores2'])
+
+
+class ResultExporter:
+    """
+    exports the games and a summary of each pairing to files, so that the results can be analysed without parsing
+    the output of the tournament. the games are read from the result store of each pairing once it was played, so
+    the games themselves are not slowed down. only the games that were not exported yet are written, in blocks of at
+    most BLOCK_SIZE games, so the memory stays bounded on pairings of millions of games. the files are buffered, so
+    each block is written at once
+    """
+
+    BLOCK_SIZE = 1 << 16
+    BUFFER_SIZE = 1 << 20
+
+    """
+    :param directory: the directory of the files (games and pairings, with the extension of the format)
+    :param export_format: one of EXPORT_FORMATS
+    """
+    def __init__(self, directory, export_format: str = 'jsonl'):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{export_format}'")
+        self.__directory = directory
+        self.__format = export_format
+        self.__games = None
+        self.__pairings = None
+        self.__pairings_writer = None
+
+        """
+        the number of games of each pairing that were exported, and the number of games won by each player and drawn
+        in them, by the names of its players
+        """
+        self.__exported_games = {}
+        self.__outcomes = {}
+
+        """
+        the sizes of the files when the export is resumed (see resume), None to write new files
+        """
+        self.__resumed_sizes = None
+
+    def __get_paths(self):
+        games_extension = 'bin' if self.__format == 'columnar' else self.__format
+        pairings_extension = 'csv' if self.__format == 'csv' else 'jsonl'
+        return (os.path.join(self.__directory, f"games.{games_extension}"),
+                os.path.join(self.__directory, f"pairings.{pairings_extension}"))
+
+    def __open(self):
+        os.makedirs(self.__directory, exist_ok=True)
+        games_path, pairings_path = self.__get_paths()
+
+        # a resumed export drops what was written after its progress was saved, and appends to the files
+        resumed = self.__resumed_sizes is not None
+        if resumed:
+            for path, size in zip((games_path, pairings_path), self.__resumed_sizes):
+                os.truncate(path, size)
+        mode = 'a' if resumed else 'w'
+
+        if self.__format == 'columnar':
+            self.__games = open(games_path, f'{mode}b', buffering=ResultExporter.BUFFER_SIZE)
+        else:
+            self.__games = open(games_path, mode, newline='', buffering=ResultExporter.BUFFER_SIZE)
+        self.__pairings = open(pairings_path, mode, newline='', buffering=ResultExporter.BUFFER_SIZE)
+        if self.__format == 'csv':
+            self.__pairings_writer = csv.DictWriter(self.__pairings, PAIRING_COLUMNS)
+        if resumed:
+            return
+
+        if self.__format == 'columnar':
+            self.__games.write(COLUMNAR_MAGIC)
+        elif self.__format == 'csv':
+            self.__games.write(",".join(GAME_COLUMNS) + "\n")
+            self.__pairings_writer.writeheader()
+
+    """
+    gets the progress of the export, so that a resumed tournament continues the same files (see resume). the files
+    are flushed, so their sizes include everything that was exported
+    """
+    def get_progress(self):
+        sizes = None
+        if self.__games is not None:
+            self.__games.flush()
+            self.__pairings.flush()
+            sizes = [os.path.getsize(path) for path in self.__get_paths()]
+        return {
+            'format': self.__format,
+            'sizes': sizes,
+            'exported_games': dict(self.__exported_games),
+            'outcomes': {names: outcomes.tolist() for names, outcomes in self.__outcomes.items()}
+        }
+
+    """
+    continues an export from its progress (see get_progress), so that the games and the summaries exported after the
+    progress was saved are not written twice
+    """
+    def resume(self, progress):
+        if progress['format'] != self.__format:
+            raise ValueError(f"The results were exported in the '{progress['format']}' format")
+        if progress['sizes'] is not None:
+            for path, size in zip(self.__get_paths(), progress['sizes']):
+                if not os.path.exists(path) or os.path.getsize(path) < size:
+                    raise ValueError(f"'{path}' does not have the results that were exported before the checkpoint")
+            self.__resumed_sizes = progress['sizes']
+
+        self.__exported_games = dict(progress['exported_games'])
+        self.__outcomes = {names: np.array(outcomes, dtype=np.int64)
+                           for names, outcomes in progress['outcomes'].items()}
+
+    """
+    exports the games of a pairing that were not exported yet (if any), and the summary of the pairing in the round
+    :param simulator: the simulator of a pairing of 2 players
+    :param round_number: the round of the tournament
+    """
+    def export_pairing(self, simulator, round_number: int):
+        store = simulator.get_result_store()
+        names = tuple(store.get_names())
+        if len(names) != 2:
+            raise ValueError("The export only supports pairings of 2 players")
+
+        # a pairing that was played in an earlier round has no new games, but its summary is written for each round
+        first_game = self.__exported_games.get(names, 0)
+        if self.__games is None:
+            self.__open()
+
+        view = store.view()
+        outcomes = self.__outcomes.setdefault(names, np.zeros(3, dtype=np.int64))
+        for start in range(first_game, len(store), ResultExporter.BLOCK_SIZE):
+            end = min(start + ResultExporter.BLOCK_SIZE, len(store))
+            scores1, scores2 = view.scores[names[0]][start:end], view.scores[names[1]][start:end]
+            self.__write_games(names, start, view.permutations[start:end], view.game_lengths[start:end],
+                               scores1, scores2)
+
+            differences = np.frombuffer(scores1, dtype=np.float64) - np.frombuffer(scores2, dtype=np.float64)
+            outcomes += ((differences > 0).sum(), (differences < 0).sum(), (differences == 0).sum())
+        self.__exported_games[names] = len(store)
+
+        self.__write_pairing(ResultExporter.get_summary(simulator, round_number, outcomes.tolist()))
+
+    def __write_games(self, names, first_game, permutations, game_lengths, scores1, scores2):
+        if self.__format == 'columnar':
+            encoded_names = json.dumps(names).encode('utf-8')
+            self.__games.write(BLOCK_HEADER.pack(len(encoded_names), len(permutations)))
+            self.__games.write(encoded_names)
+            self.__games.write(array(GAME_INDEX_TYPECODE, range(first_game, first_game + len(permutations))))
+            for column in (permutations, game_lengths, scores1, scores2):
+                self.__games.write(column)
+            return
+
+        games = range(first_game, first_game + len(permutations))
+        rows = zip(games, permutations.tolist(), game_lengths.tolist(), scores1.tolist(), scores2.tolist())
+        if self.__format == 'csv':
+            # the names are quoted once per block, not once per game
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator='').writerow(names)
+            prefix = buffer.getvalue()
+            self.__games.write("".join(
+                f"{prefix},{game},{permutation},{length},{score1!r},{score2!r}\n"
+                for game, permutation, length, score1, score2 in rows
+            ))
+        else:
+            # the scores of the games are finite, so their repr is valid JSON
+            prefix = f'{{"player1": {json.dumps(names[0])}, "player2": {json.dumps(names[1])}'
+            self.__games.write("".join(
+                f'{prefix}, "game": {game}, "permutation": {permutation}, "length": {length}, '
+                f'"score1": {score1!r}, "score2": {score2!r}}}\n'
+                for game, permutation, length, score1, score2 in rows
+            ))
+
+    def __write_pairing(self, summary):
+        if self.__format == 'csv':
+            self.__pairings_writer.writerow(summary)
+        else:
+            self.__pairings.write(json.dumps(summary) + "\n")
+
+    """
+    gets the summary of a pairing: the totals, means and variances of the scores of both players, the number of
+    games won by each player and drawn, and the winner of a tie-break (see GameSimulator.get_tiebreak)
+    :param outcomes: the number of games won by the first player, won by the second player and drawn
+    """
+    @staticmethod
+    def get_summary(simulator, round_number, outcomes):
+        names = simulator.get_result_store().get_names()
+        ledger = simulator.get_ledger()
+        tiebreak = simulator.get_tiebreak()
+
+        return {
+            'round': round_number,
+            'player1': names[0],
+            'player2': names[1],
+            'games': len(simulator.get_result_store()),
+            'total1': ledger.get_total(names[0]),
+            'total2': ledger.get_total(names[1]),
+            'mean1': ledger.get_mean(names[0]),
+            'mean2': ledger.get_mean(names[1]),
+            'variance1': ledger.get_variance(names[0]),
+            'variance2': ledger.get_variance(names[1]),
+            'wins1': outcomes[0],
+            'wins2': outcomes[1],
+            'draws': outcomes[2],
+            'tiebreak': None if tiebreak is None else tiebreak[0]
+        }
+
+    def close(self):
+        for file in (self.__games, self.__pairings):
+            if file is not None:
+                file.close()
+        self.__games = None
+        self.__pairings = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+"""
+Reads the blocks of games of a file in the columnar format
+"""
+def read_columnar(path):
+    with open(path, 'rb') as file:
+        if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"'{path}' is not a columnar results file")
+
+        while True:
+            header = file.read(BLOCK_HEADER.size)
+            if len(header) < BLOCK_HEADER.size:
+                return
+            names_size, num_games = BLOCK_HEADER.unpack(header)
+            names = json.loads(file.read(names_size).decode('utf-8'))
+
+            columns = []
+            for typecode in (GAME_INDEX_TYPECODE, ResultStore.PERMUTATION_TYPECODE, ResultStore.GAME_LENGTH_TYPECODE,
+                             ResultStore.SCORE_TYPECODE, ResultStore.SCORE_TYPECODE):
+                column = array(typecode)
+                column.frombytes(file.read(num_games * column.itemsize))
+                columns.append(column)
+            yield ResultBlock(names, *columns)
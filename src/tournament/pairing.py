@@ -0,0 +1,246 @@
+import os
+
+from tqdm import tqdm
+
+from games.instrumentation import Instrumentation
+from games.trace import TraceRecorder
+from tournament.stopping import create_sequential_test
+
+
+"""
+Plays all the games of a single pairing and returns the simulator holding the results
+:param game_settings: the tournament settings (see main.py)
+:param player1: the first player of the pairing
+:param player2: the second player of the pairing
+:param show_progress: shows a progress bar while the iterations are running
+"""
+def play_pairing(game_settings, player1, player2, show_progress=True):
+    simulator = play_iterations(game_settings, player1, player2, game_settings['num_iterations'], show_progress)
+    resolve_draw(game_settings, simulator)
+    return simulator
+
+
+"""
+Plays a fixed number of iterations of a pairing, without breaking draws
+:param num_iterations: the number of iterations to play
+:param first_iteration: the index of the first iteration (e.g. the start of a shard). Together with the seed of the
+                        tournament, it determines the seeds of the games
+"""
+def play_iterations(game_settings, player1, player2, num_iterations, show_progress=True, first_iteration=0):
+    # a pairing that was interrupted continues from its last checkpoint (see Checkpoint)
+    checkpoint = game_settings.get('checkpoint')
+    resumed = None if checkpoint is None else checkpoint.resume_pairing(game_settings, player1, player2)
+    if resumed is None:
+        simulator = create_simulator(game_settings, player1, player2, first_iteration)
+        # the sequential test stops the pairing as soon as the players are separated
+        test = create_sequential_test(game_settings, player1, player2)
+        played = 0
+    else:
+        simulator, test, played = resumed
+
+    recorder = start_trace(game_settings, simulator)
+    if test is not None:
+        simulator.add_listener(test)
+
+    # Run initial iterations with progress bar
+    batch_size = game_settings.get('batch_size', 1)
+    with tqdm(total=num_iterations, initial=played, desc="Running iterations", disable=not show_progress) as progress:
+        while played < num_iterations and (test is None or not test.is_decided()):
+            batch = min(batch_size, num_iterations - played)
+            run_game_batch(simulator, game_settings['seat_permutation'], batch)
+            played += batch
+            progress.update(batch)
+            if checkpoint is not None:
+                checkpoint.update_pairing(game_settings, player1, player2, simulator, test, played)
+
+    if test is not None:
+        simulator.remove_listener(test)
+    stop_trace(simulator, recorder)
+    return simulator
+
+
+"""
+Creates the simulator of a pairing, configured with the tournament settings
+:param first_iteration: the index of the first iteration that the simulator will play
+"""
+def create_simulator(game_settings, player1, player2, first_iteration=0):
+    simulator = game_settings['game']([player1, player2])
+    simulator.get_result_store().set_spill(game_settings.get('spill_threshold'), game_settings.get('spill_dir'))
+    simulator.set_seed(game_settings.get('seed'), get_pairing_stream(player1, player2),
+                       first_iteration * get_games_per_iteration(game_settings))
+
+    if game_settings.get('latency'):
+        simulator.set_instrumentation(Instrumentation())
+    simulator.set_time_control(game_settings.get('time_control'))
+
+    # the seats are changed once per iteration, so a shard starts from the seats the previous iterations left
+    if game_settings['seat_permutation']:
+        simulator.set_permutation(first_iteration)
+
+    return simulator
+
+
+"""
+The rules of the extra games played while a pairing is a draw:
+    - replay: more iterations, exactly like the regular ones
+    - seat-swap: iterations of two games with swapped seats, even without seat permutation
+    - armageddon: single games where a drawn game is won by the player in the last seat
+"""
+DRAW_RULES = ['replay', 'seat-swap', 'armageddon']
+
+
+"""
+Plays extra games while the pairing is a draw, up to the maximum number of extra games of the settings. When the
+pairing is still a draw after them, the winner is decided by a tie-break on the results (see get_tiebreak_winner)
+and registered in the simulator. Pairings that are draws in every statistic stay draws
+"""
+def resolve_draw(game_settings, simulator):
+    # a pairing that played more games since its last tie-break (see AdaptiveScheduler) is decided again
+    simulator.clear_tiebreak()
+    if not check_draw(simulator):
+        return
+
+    rule = game_settings.get('draw_rule', 'replay')
+    max_games = game_settings.get('max_draw_games')
+    store = simulator.get_result_store()
+    last_game = None if max_games is None else len(store) + max_games
+    recorder = start_trace(game_settings, simulator)
+
+    winner = None
+    while winner is None and check_draw(simulator) and (last_game is None or len(store) < last_game):
+        if rule == 'armageddon':
+            winner = play_armageddon(simulator, game_settings['seat_permutation'])
+        else:
+            run_game_iteration(simulator, rule == 'seat-swap' or game_settings['seat_permutation'])
+
+    stop_trace(simulator, recorder)
+
+    if winner is not None:
+        simulator.set_tiebreak(winner, 'armageddon')
+    elif check_draw(simulator):
+        tiebreak = get_tiebreak_winner(simulator)
+        if tiebreak is not None:
+            simulator.set_tiebreak(*tiebreak)
+
+
+"""
+Plays an armageddon game
+:returns: the name of the player in the last seat if the game was a draw, None otherwise
+"""
+def play_armageddon(simulator, seat_permutation):
+    last_seat = simulator.get_player_positions()[-1].get_name()
+    simulator.run_simulation()
+    if seat_permutation:
+        simulator.change_player_positions()
+
+    result = simulator.get_result_store().get_result(len(simulator.get_result_store()) - 1)
+    return last_seat if len(set(result.values())) == 1 else None
+
+
+"""
+Breaks the draw of a pairing with secondary statistics of its results: the player that won more games, then the
+player with the more consistent scores (the lowest variance)
+:returns: the name of the winner and the statistic that decided it, or None if the players are even in all of them
+"""
+def get_tiebreak_winner(simulator):
+    names = simulator.get_result_store().get_names()
+    if len(names) != 2:
+        return None
+
+    scores = simulator.get_results().scores
+    wins = {name: 0 for name in names}
+    for score1, score2 in zip(scores[names[0]], scores[names[1]]):
+        if score1 > score2:
+            wins[names[0]] += 1
+        elif score2 > score1:
+            wins[names[1]] += 1
+    if wins[names[0]] != wins[names[1]]:
+        return max(names, key=lambda name: wins[name]), 'games won'
+
+    ledger = simulator.get_ledger()
+    variances = {name: ledger.get_variance(name) for name in names}
+    if variances[names[0]] != variances[names[1]]:
+        return min(names, key=lambda name: variances[name]), 'score variance'
+
+    return None
+
+
+"""
+Starts recording the games of a simulator, if a trace directory is configured. Each call records to its own file,
+named after the players and the index of the next game, so that shards never write to the same file
+:returns: the recorder or None
+"""
+def start_trace(game_settings, simulator):
+    if game_settings.get('trace') is None:
+        return None
+
+    names = "-vs-".join(player.get_name() for player in simulator.get_players())
+    os.makedirs(game_settings['trace'], exist_ok=True)
+    recorder = TraceRecorder(os.path.join(game_settings['trace'], f"{names}.{simulator.get_game_index()}.trace"))
+    simulator.add_listener(recorder)
+    return recorder
+
+
+def stop_trace(simulator, recorder):
+    if recorder is not None:
+        simulator.remove_listener(recorder)
+        recorder.close()
+
+
+"""
+The name of the random stream of a pairing
+"""
+def get_pairing_stream(player1, player2):
+    return player1.get_name(), player2.get_name()
+
+
+"""
+The number of games played in each iteration
+"""
+def get_games_per_iteration(game_settings):
+    return 2 if game_settings['seat_permutation'] else 1
+
+
+def run_game_iteration(simulator, seat_permutation):
+    simulator.run_simulation()
+    if seat_permutation:
+        simulator.change_player_positions()
+        simulator.run_simulation()
+
+
+"""
+Plays iterations of a pairing in batches of the batch size of the settings (see run_game_batch)
+"""
+def play_batch(game_settings, simulator, num_iterations):
+    batch_size = game_settings.get('batch_size', 1)
+    for first_iteration in range(0, num_iterations, batch_size):
+        run_game_batch(simulator, game_settings['seat_permutation'], min(batch_size, num_iterations - first_iteration))
+
+
+"""
+Plays several iterations at once, with the same seats as calling run_game_iteration for each of them
+(see GameSimulator.run_simulations)
+"""
+def run_game_batch(simulator, seat_permutation, num_iterations):
+    if num_iterations <= 1:
+        for _ in range(num_iterations):
+            run_game_iteration(simulator, seat_permutation)
+        return
+
+    permutations = []
+    for _ in range(num_iterations):
+        permutations.append(simulator.get_permutation_index())
+        if seat_permutation:
+            simulator.change_player_positions()
+            permutations.append(simulator.get_permutation_index())
+    simulator.run_simulations(permutations)
+
+
+def check_draw(simulator):
+    # the ledger keeps the running scores, so this check does not depend on the number of games played
+    ledger = simulator.get_ledger()
+    # Assuming there are only two players in each game
+    player_scores = [ledger.get_total(name) for name in ledger.get_names()]
+    if len(player_scores) == 2 and player_scores[0] == player_scores[1]:
+        return True  # It's a draw
+    return False  # Not a draw
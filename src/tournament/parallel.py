@@ -0,0 +1,178 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from games.player_host import RemotePlayer, create_remote_player
+from tournament.pairing import create_simulator, get_games_per_iteration, get_pairing_stream, play_batch, \
+    play_iterations, play_pairing, resolve_draw, start_trace, stop_trace
+
+
+"""
+Plays every pairing of a round and yields the resulting simulators in the same order as the pairings.
+When more than one worker is configured, the pairings are spread over a pool of processes. Each worker
+builds its own simulator and player instances, so the players of the parent process are never shared.
+The iterations of a pairing can also be split in shards, so that a single slow pairing is played by
+several workers at once. The shards are merged back into one simulator before breaking draws.
+:param game_settings: the tournament settings (see main.py)
+:param pairings: list of (player1, player2) tuples
+"""
+def play_pairings(game_settings, pairings):
+    if game_settings.get('workers', 1) <= 1:
+        for player1, player2 in pairings:
+            print(f"Simulation: {player1.get_name()} VS {player2.get_name()}")
+            yield play_pairing(game_settings, player1, player2)
+        return
+
+    worker_settings = get_worker_settings(game_settings)
+    # a pairing that stops early needs all its games in the same sequential test, so it is never sharded
+    shards = 1 if game_settings.get('early_stopping') is not None else game_settings.get('shards', 1)
+    shard_sizes = get_shard_sizes(game_settings['num_iterations'], shards)
+
+    with ProcessPoolExecutor(max_workers=game_settings['workers']) as executor:
+        # all the shards of all the pairings are submitted at once, so that the pool is never idle
+        futures = [
+            [
+                executor.submit(play_shard_worker, worker_settings, get_player_spec(player1),
+                                get_player_spec(player2), first_iteration, num_iterations, random.getrandbits(64))
+                for first_iteration, num_iterations in shard_sizes
+            ]
+            for player1, player2 in pairings
+        ]
+        for (player1, player2), shard_futures in zip(pairings, futures):
+            simulator = shard_futures[0].result()
+            for future in shard_futures[1:]:
+                simulator.merge_results(future.result())
+
+            # draws can only be detected once all shards are merged
+            resolve_draw(game_settings, simulator)
+
+            print(f"Simulation: {player1.get_name()} VS {player2.get_name()}")
+            yield simulator
+
+
+"""
+Plays batches of iterations of pairings that were already started (e.g. the batches of AdaptiveScheduler) and adds
+their games to the simulators of the pairings. With a pool of workers, all the shards of all the batches are played at
+once, each from the game and the seats where the simulator of its pairing stopped, so the games are the same as the
+ones played in this process
+:param batches: list of (simulator, number of iterations) tuples, with a different simulator in each batch
+:param executor: the pool of worker processes (None to play the batches in this process)
+"""
+def play_batches(game_settings, batches, executor=None):
+    if executor is None:
+        for simulator, num_iterations in batches:
+            play_batch(game_settings, simulator, num_iterations)
+        return
+
+    worker_settings = get_worker_settings(game_settings)
+    games_per_iteration = get_games_per_iteration(game_settings)
+    futures = []
+    for simulator, num_iterations in batches:
+        player1, player2 = simulator.get_players()
+        first_game, permutation = simulator.get_game_index(), simulator.get_permutation_index()
+        futures.append([
+            executor.submit(play_batch_worker, worker_settings, get_player_spec(player1), get_player_spec(player2),
+                            first_game + first_iteration * games_per_iteration,
+                            permutation + (first_iteration if game_settings['seat_permutation'] else 0),
+                            shard_iterations, random.getrandbits(64))
+            for first_iteration, shard_iterations in get_shard_sizes(num_iterations, game_settings.get('shards', 1))
+        ])
+
+    for (simulator, _), shard_futures in zip(batches, futures):
+        for future in shard_futures:
+            shard = future.result()
+            simulator.merge_results(shard)
+            # the next games of the pairing start from the seats where the last shard stopped
+            simulator.set_permutation(shard.get_permutation_index())
+
+
+"""
+Splits the iterations of a pairing into (nearly) equal shards
+:param num_iterations: the total number of iterations
+:param shards: the number of shards
+:returns: list of (first iteration, number of iterations) tuples
+"""
+def get_shard_sizes(num_iterations, shards):
+    shards = max(1, min(shards, num_iterations))
+    sizes = []
+    first_iteration = 0
+    for i in range(shards):
+        size = num_iterations // shards + (1 if i < num_iterations % shards else 0)
+        sizes.append((first_iteration, size))
+        first_iteration += size
+    return sizes
+
+
+"""
+The settings sent to the workers. Player instances and the checkpoint stay in the parent process.
+"""
+def get_worker_settings(game_settings):
+    return {key: value for key, value in game_settings.items() if key not in ('players', 'checkpoint')}
+
+
+"""
+A player is rebuilt inside a worker from its name and the name of its class
+"""
+def get_player_spec(player):
+    return player.get_name(), player.__class__.__name__
+
+
+"""
+Builds a player from the registry of available player types
+:param settings: the tournament settings. When player_host is set, the player runs in its own process
+                 (see games.player_host)
+"""
+def build_player(game_type, spec, settings=None):
+    # imported here so that the registry is only built when a worker needs it
+    from constants import get_player_type
+
+    name, type_name = spec
+    player_class = get_player_type(game_type, type_name)
+    if player_class is None:
+        raise ValueError(f"Player type '{type_name}' is not available for game '{game_type}'.")
+    if settings is not None and settings.get('player_host'):
+        return create_remote_player(name, game_type, type_name, settings.get('player_python'))
+    return player_class(name)
+
+
+"""
+Plays a shard of a pairing inside a worker process
+:param first_iteration: the index of the first iteration of the shard
+:param seed: seed of the shard when the tournament is not seeded. Forked workers inherit the random state of the
+             parent, so every shard reseeds it to get its own stream
+"""
+def play_shard_worker(worker_settings, spec1, spec2, first_iteration, num_iterations, seed):
+    random.seed(seed)
+    player1 = build_player(worker_settings['game_type'], spec1, worker_settings)
+    player2 = build_player(worker_settings['game_type'], spec2, worker_settings)
+    simulator = play_iterations(worker_settings, player1, player2, num_iterations, show_progress=False,
+                                first_iteration=first_iteration)
+
+    # the hosts of the players of the shard are not needed anymore
+    for player in (player1, player2):
+        if isinstance(player, RemotePlayer):
+            player.close()
+    return simulator
+
+
+"""
+Plays a batch of iterations of a pairing inside a worker process
+:param first_game: the index of the first game of the batch in the pairing
+:param permutation: the seat permutation of the first game of the batch (see GameSimulator.set_permutation)
+:param seed: seed of the batch when the tournament is not seeded (see play_shard_worker)
+"""
+def play_batch_worker(worker_settings, spec1, spec2, first_game, permutation, num_iterations, seed):
+    random.seed(seed)
+    player1 = build_player(worker_settings['game_type'], spec1, worker_settings)
+    player2 = build_player(worker_settings['game_type'], spec2, worker_settings)
+    simulator = create_simulator(worker_settings, player1, player2)
+    simulator.set_seed(worker_settings.get('seed'), get_pairing_stream(player1, player2), first_game)
+    simulator.set_permutation(permutation)
+
+    recorder = start_trace(worker_settings, simulator)
+    play_batch(worker_settings, simulator, num_iterations)
+    stop_trace(simulator, recorder)
+
+    for player in (player1, player2):
+        if isinstance(player, RemotePlayer):
+            player.close()
+    return simulator
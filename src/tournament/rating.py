@@ -0,0 +1,239 @@
+from abc import ABC, abstractmethod
+from math import log, pi, sqrt
+
+import numpy as np
+
+
+class RatingSystem(ABC):
+    """
+    rates the players from the outcomes of their games (1 for a win, 0.5 for a draw and 0 for a loss). the ratings are
+    updated incrementally: each time the results of a pairing are added, only the games that were not rated yet are
+    read from its result store
+    """
+
+    def __init__(self):
+        """
+        the number of games of each pairing that were already rated, by the names of its players
+        """
+        self.__rated_games = {}
+
+    """
+    rates the games of a pairing that were not rated yet
+    :param simulator: the simulator of a pairing of 2 players
+    """
+    def add_results(self, simulator):
+        store = simulator.get_result_store()
+        names = tuple(store.get_names())
+        if len(names) != 2:
+            raise ValueError("Ratings only support pairings of 2 players")
+
+        first_game = self.__rated_games.get(names, 0)
+        if first_game >= len(store):
+            return
+
+        scores = store.view().scores
+        self.add_games(names[0], names[1],
+                       np.frombuffer(scores[names[0]], dtype=np.float64)[first_game:],
+                       np.frombuffer(scores[names[1]], dtype=np.float64)[first_game:])
+        self.__rated_games[names] = len(store)
+
+    """
+    rates a sequence of games between two players
+    :param scores1: array with the score of the first player in each game
+    :param scores2: array with the score of the second player in each game
+    """
+    @abstractmethod
+    def add_games(self, name1, name2, scores1, scores2):
+        pass
+
+    """
+    ends a rating period (a round of the tournament). the games of a period are rated as they are added, this only
+    updates what depends on the time between periods
+    """
+    def end_period(self):
+        pass
+
+    """
+    gets the rating of each player and its standard error (None when the rating system has no uncertainty)
+    :returns: dictionary of (rating, standard error) tuples by player name
+    """
+    @abstractmethod
+    def get_ratings(self) -> dict:
+        pass
+
+    """
+    gets the outcome of each game for the first player
+    """
+    @staticmethod
+    def get_outcomes(scores1, scores2):
+        return 0.5 + 0.5 * np.sign(scores1 - scores2)
+
+
+class EloRating(RatingSystem):
+    """
+    elo ratings, updated after every game
+    """
+
+    """
+    :param k: the maximum change of a rating in a single game
+    :param initial: the rating of a new player
+    """
+    def __init__(self, k: float = 16, initial: float = 1500):
+        super().__init__()
+        self.__k = k
+        self.__initial = initial
+        self.__ratings = {}
+
+    def add_games(self, name1, name2, scores1, scores2):
+        rating1 = self.__ratings.get(name1, self.__initial)
+        rating2 = self.__ratings.get(name2, self.__initial)
+        for outcome in RatingSystem.get_outcomes(scores1, scores2).tolist():
+            expected = 1 / (1 + 10 ** ((rating2 - rating1) / 400))
+            change = self.__k * (outcome - expected)
+            rating1 += change
+            rating2 -= change
+        self.__ratings[name1] = rating1
+        self.__ratings[name2] = rating2
+
+    def get_ratings(self) -> dict:
+        return {name: (rating, None) for name, rating in self.__ratings.items()}
+
+
+class GlickoRating(RatingSystem):
+    """
+    glicko ratings. the rating deviation of a player is the standard error of its rating: it shrinks with each game
+    (the games are rated one at a time) and grows by c ** 2 (in variance) at the end of each rating period, a round of
+    the tournament, up to the deviation of a new player. without that growth, the deviations would shrink until the
+    ratings no longer move
+    """
+
+    Q = log(10) / 400
+
+    """
+    :param initial: the rating of a new player
+    :param initial_deviation: the rating deviation of a new player
+    :param c: the growth of the rating deviations in each rating period. the default takes a deviation of 50 back to
+              350 after 100 periods
+    """
+    def __init__(self, initial: float = 1500, initial_deviation: float = 350, c: float = 34.6):
+        super().__init__()
+        self.__initial = initial
+        self.__initial_deviation = initial_deviation
+        self.__c = c
+        self.__ratings = {}
+        self.__deviations = {}
+
+    @staticmethod
+    def __g(deviation):
+        return 1 / sqrt(1 + 3 * GlickoRating.Q ** 2 * deviation ** 2 / pi ** 2)
+
+    def __update(self, rating, deviation, opponent_rating, opponent_deviation, outcome):
+        g = GlickoRating.__g(opponent_deviation)
+        expected = 1 / (1 + 10 ** (-g * (rating - opponent_rating) / 400))
+        precision = 1 / deviation ** 2 + GlickoRating.Q ** 2 * g ** 2 * expected * (1 - expected)
+        return rating + GlickoRating.Q / precision * g * (outcome - expected), sqrt(1 / precision)
+
+    def add_games(self, name1, name2, scores1, scores2):
+        rating1 = self.__ratings.get(name1, self.__initial)
+        rating2 = self.__ratings.get(name2, self.__initial)
+        deviation1 = self.__deviations.get(name1, self.__initial_deviation)
+        deviation2 = self.__deviations.get(name2, self.__initial_deviation)
+        for outcome in RatingSystem.get_outcomes(scores1, scores2).tolist():
+            (rating1, deviation1), (rating2, deviation2) = (
+                self.__update(rating1, deviation1, rating2, deviation2, outcome),
+                self.__update(rating2, deviation2, rating1, deviation1, 1 - outcome)
+            )
+        self.__ratings[name1], self.__deviations[name1] = rating1, deviation1
+        self.__ratings[name2], self.__deviations[name2] = rating2, deviation2
+
+    def end_period(self):
+        for name, deviation in self.__deviations.items():
+            self.__deviations[name] = min(sqrt(deviation ** 2 + self.__c ** 2), self.__initial_deviation)
+
+    def get_ratings(self) -> dict:
+        return {name: (rating, self.__deviations[name]) for name, rating in self.__ratings.items()}
+
+
+class BradleyTerryRating(RatingSystem):
+    """
+    bradley-terry model fitted by maximum likelihood on all the games played so far (a draw counts as half a win for
+    each player). the games are only aggregated into a matrix of wins, so adding results is a vectorized count and
+    the fit only depends on the number of players. the ratings are in the elo scale
+    """
+
+    SCALE = 400 / log(10)
+
+    """
+    :param initial: the rating of an average player
+    :param prior: weight of a gaussian prior on the strengths, so that players that won (or lost) all their games
+                  get finite ratings
+    """
+    def __init__(self, initial: float = 1500, prior: float = 1e-2):
+        super().__init__()
+        self.__initial = initial
+        self.__prior = prior
+        self.__names = []
+        self.__wins = np.zeros((0, 0))
+        self.__ratings = None
+
+    def __get_index(self, name):
+        if name not in self.__names:
+            self.__names.append(name)
+            self.__wins = np.pad(self.__wins, ((0, 1), (0, 1)))
+        return self.__names.index(name)
+
+    def add_games(self, name1, name2, scores1, scores2):
+        index1, index2 = self.__get_index(name1), self.__get_index(name2)
+        wins = RatingSystem.get_outcomes(scores1, scores2).sum()
+        self.__wins[index1, index2] += wins
+        self.__wins[index2, index1] += len(scores1) - wins
+        self.__ratings = None
+
+    """
+    fits the strengths with newton's method
+    :returns: the strengths, centered on zero, and their covariance matrix (in natural log units)
+    """
+    def fit(self, max_iterations: int = 100, tolerance: float = 1e-10):
+        num_players = len(self.__names)
+        games = self.__wins + self.__wins.T
+        strengths = np.zeros(num_players)
+        prior = self.__prior * np.eye(num_players)
+
+        for _ in range(max_iterations):
+            probabilities = 1 / (1 + np.exp(strengths[None, :] - strengths[:, None]))
+            gradient = self.__wins.sum(axis=1) - (games * probabilities).sum(axis=1) - self.__prior * strengths
+            weights = games * probabilities * probabilities.T
+            information = np.diag(weights.sum(axis=1)) - weights + prior
+            step = np.linalg.solve(information, gradient)
+            strengths += step
+            if np.abs(step).max() < tolerance:
+                break
+
+        probabilities = 1 / (1 + np.exp(strengths[None, :] - strengths[:, None]))
+        weights = games * probabilities * probabilities.T
+        covariance = np.linalg.inv(np.diag(weights.sum(axis=1)) - weights + prior)
+
+        # only the differences between strengths are identified, so they are reported relative to their mean
+        centering = np.eye(num_players) - 1 / num_players
+        return strengths - strengths.mean(), centering @ covariance @ centering
+
+    def get_ratings(self) -> dict:
+        if self.__ratings is None:
+            strengths, covariance = self.fit()
+            errors = np.sqrt(np.maximum(np.diag(covariance), 0))
+            self.__ratings = {
+                name: (self.__initial + BradleyTerryRating.SCALE * float(strengths[index]),
+                       BradleyTerryRating.SCALE * float(errors[index]))
+                for index, name in enumerate(self.__names)
+            }
+        return dict(self.__ratings)
+
+
+"""
+The available rating systems
+"""
+RATING_SYSTEMS = {
+    "elo": EloRating,
+    "glicko": GlickoRating,
+    "bradley-terry": BradleyTerryRating
+}
@@ -0,0 +1,166 @@
+from concurrent.futures import ProcessPoolExecutor
+from math import sqrt
+
+from tournament.cache import MatchupCache
+from tournament.pairing import create_simulator, get_games_per_iteration, resolve_draw, start_trace, stop_trace
+from tournament.parallel import play_batches
+from tournament.stopping import get_critical_value
+
+
+"""
+The ways to schedule the games of a round: every iteration of every pairing, or adaptive batches (see AdaptiveScheduler)
+"""
+SCHEDULES = ['fixed', 'adaptive']
+
+
+class AdaptiveScheduler:
+    """
+    schedules the games of an elimination round as a ranking problem. instead of giving the same number of games to
+    every pairing, it plays small batches on the pairings that can still change which player is eliminated, and stops
+    the round once the lowest-scoring player is separated from all the others at the configured confidence (or the
+    budget of the round runs out).
+    the score of a player is the sum of its mean score per game in each of its pairings, so pairings with different
+    numbers of games weigh the same
+    """
+
+    """
+    :param game_settings: the tournament settings (see main.py)
+    :param cache: the cache with the simulators of the pairings, which keep playing in the following rounds
+    """
+    def __init__(self, game_settings, cache: MatchupCache):
+        self.__game_settings = game_settings
+        self.__cache = cache
+        self.__critical_value = get_critical_value(game_settings['confidence'])
+
+        """
+        the number of iterations of each batch, and the minimum number of iterations of every pairing
+        """
+        self.__batch_iterations = game_settings['batch_iterations']
+        self.__min_iterations = game_settings['min_iterations']
+
+        """
+        the maximum number of iterations played in a round (None for the number of iterations of a fixed round)
+        """
+        self.__round_budget = game_settings.get('round_budget')
+
+    def __get_simulator(self, player1, player2):
+        key = MatchupCache.get_key(self.__game_settings, player1, player2)
+        simulator = self.__cache.get(key)
+        if simulator is None:
+            simulator = create_simulator(self.__game_settings, player1, player2)
+            self.__cache.put(key, simulator)
+        return simulator
+
+    """
+    gets the estimated score of each player and its variance
+    :param simulators: the simulator of each pairing
+    """
+    @staticmethod
+    def get_estimates(players, simulators):
+        means = {player: 0.0 for player in players}
+        variances = {player: 0.0 for player in players}
+        for simulator in simulators:
+            ledger = simulator.get_ledger()
+            for player in simulator.get_players():
+                name = player.get_name()
+                count = ledger.get_count(name)
+                if count == 0:
+                    continue
+                owner = next(p for p in players if p.get_name() == name)
+                means[owner] += ledger.get_mean(name)
+                variances[owner] += ledger.get_variance(name) / count
+        return means, variances
+
+    """
+    gets the players that can not be separated (yet) from the lowest-scoring one, including itself
+    """
+    def get_candidates(self, players, simulators):
+        means, variances = AdaptiveScheduler.get_estimates(players, simulators)
+        lowest = min(players, key=lambda player: means[player])
+        return [
+            player for player in players
+            if player is lowest or
+            means[player] - means[lowest] <= self.__critical_value * sqrt(variances[player] + variances[lowest])
+        ]
+
+    """
+    Plays an elimination round and yields the simulator of each pairing, in the same order as the pairings. with
+    more than one worker, each step plays a batch on as many pairings as there are workers, in a pool of processes
+    (see parallel.play_batches). with a checkpoint, the pairings are saved as they play (see Checkpoint.update_round)
+    :param pairings: list of (player1, player2) tuples
+    """
+    def play_round(self, pairings):
+        players = list(dict.fromkeys(player for pairing in pairings for player in pairing))
+        keys = [MatchupCache.get_key(self.__game_settings, player1, player2) for player1, player2 in pairings]
+        simulators = [self.__get_simulator(player1, player2) for player1, player2 in pairings]
+        workers = self.__game_settings.get('workers', 1)
+        checkpoint = self.__game_settings.get('checkpoint')
+
+        games_per_iteration = get_games_per_iteration(self.__game_settings)
+        budget = self.__round_budget
+        if budget is None:
+            budget = self.__game_settings['num_iterations'] * len(pairings)
+        # a resumed round only plays the rest of its budget
+        played = 0 if checkpoint is None else checkpoint.get_round_played()
+        budget -= played
+
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        # the games played by the workers are traced by the workers
+        recorders = [None if executor is not None else start_trace(self.__game_settings, simulator)
+                     for simulator in simulators]
+        try:
+            def play(batches):
+                nonlocal budget, played
+                play_batches(self.__game_settings, batches, executor)
+                iterations = sum(num_iterations for _, num_iterations in batches)
+                budget -= iterations
+                played += iterations
+                if checkpoint is not None:
+                    checkpoint.update_round(list(zip(keys, simulators)), played)
+
+            # every pairing plays its minimum number of iterations first
+            minimum = []
+            for simulator in simulators:
+                missing = self.__min_iterations - len(simulator.get_result_store()) // games_per_iteration
+                if missing > 0:
+                    minimum.append((simulator, missing))
+            for first in range(0, len(minimum), workers):
+                play(minimum[first:first + workers])
+
+            while budget > 0:
+                candidates = self.get_candidates(players, simulators)
+                if len(candidates) <= 1:
+                    break
+
+                # the next batches go to the most uncertain pairings that involve a candidate
+                relevant = [
+                    simulator for simulator, (player1, player2) in zip(simulators, pairings)
+                    if player1 in candidates or player2 in candidates
+                ]
+                relevant.sort(key=AdaptiveScheduler.get_uncertainty, reverse=True)
+                batches = []
+                for simulator in relevant[:workers]:
+                    batch = min(self.__batch_iterations, budget - sum(size for _, size in batches))
+                    if batch > 0:
+                        batches.append((simulator, batch))
+                play(batches)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            for simulator, recorder in zip(simulators, recorders):
+                stop_trace(simulator, recorder)
+
+        for (player1, player2), simulator in zip(pairings, simulators):
+            resolve_draw(self.__game_settings, simulator)
+            print(f"Simulation: {player1.get_name()} VS {player2.get_name()}")
+            yield simulator
+
+    """
+    the variance of the mean score per game of a pairing
+    """
+    @staticmethod
+    def get_uncertainty(simulator):
+        ledger = simulator.get_ledger()
+        name = ledger.get_names()[0]
+        count = ledger.get_count(name)
+        return ledger.get_variance(name) / count if count > 0 else float('inf')
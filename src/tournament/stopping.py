@@ -0,0 +1,172 @@
+from abc import ABC, abstractmethod
+from math import log, sqrt
+from statistics import NormalDist
+
+from games.game_listener import GameListener
+
+
+"""
+Gets the two-sided critical value of the normal distribution for a confidence level (e.g. 1.96 for 0.95)
+"""
+def get_critical_value(confidence: float):
+    return NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+
+
+class SequentialTest(GameListener, ABC):
+    """
+    a sequential test that follows the games of a pairing (as a listener of its simulator) and tells when the two
+    players are separated at the configured confidence level, so the pairing can stop early
+    """
+
+    """
+    :param names: the names of the two players
+    :param confidence: the confidence level of the test (e.g. 0.95)
+    :param min_games: the minimum number of games before the test can stop a pairing
+    """
+    def __init__(self, names: list, confidence: float, min_games: int):
+        if len(names) != 2:
+            raise ValueError("Sequential tests only support pairings of 2 players")
+        self.__names = names
+        self.__confidence = confidence
+        self.__min_games = min_games
+        self.__num_games = 0
+
+    def event_game_end(self, simulator, game_index: int, result: dict, game_length: int):
+        self.__num_games += 1
+        self.update(result[self.__names[0]], result[self.__names[1]])
+
+    """
+    registers the scores of both players in a game
+    """
+    @abstractmethod
+    def update(self, score1, score2):
+        pass
+
+    """
+    checks if the players are separated
+    """
+    @abstractmethod
+    def is_separated(self) -> bool:
+        pass
+
+    def is_decided(self) -> bool:
+        return self.__num_games >= self.__min_games and self.is_separated()
+
+    def get_confidence(self):
+        return self.__confidence
+
+    def get_num_games(self):
+        return self.__num_games
+
+
+class ConfidenceIntervalTest(SequentialTest):
+    """
+    stops when the confidence interval of the mean difference of scores per game no longer contains zero
+    """
+
+    def __init__(self, names: list, confidence: float, min_games: int):
+        super().__init__(names, confidence, min_games)
+        self.__critical_value = get_critical_value(confidence)
+
+        """
+        running sums of the difference of scores
+        """
+        self.__count = 0
+        self.__sum = 0
+        self.__squares = 0
+
+    def update(self, score1, score2):
+        difference = score1 - score2
+        self.__count += 1
+        self.__sum += difference
+        self.__squares += difference * difference
+
+    def get_interval(self):
+        if self.__count < 2:
+            return float('-inf'), float('inf')
+        mean = self.__sum / self.__count
+        variance = max(0, (self.__squares - self.__count * mean * mean) / (self.__count - 1))
+        half_width = self.__critical_value * sqrt(variance / self.__count)
+        return mean - half_width, mean + half_width
+
+    def is_separated(self) -> bool:
+        low, high = self.get_interval()
+        return low > 0 or high < 0
+
+
+class SprtTest(SequentialTest):
+    """
+    sequential probability ratio test on the decisive games: the hypothesis that the first player wins a decisive
+    game with probability 0.5 + delta against the hypothesis that it wins with probability 0.5 - delta.
+    drawn games carry no information and are ignored
+    """
+
+    def __init__(self, names: list, confidence: float, min_games: int, delta: float = 0.05):
+        super().__init__(names, confidence, min_games)
+        if not 0 < delta < 0.5:
+            raise ValueError("The delta of the SPRT must be between 0 and 0.5")
+
+        """
+        the log-likelihood ratio added by each win (and subtracted by each loss)
+        """
+        self.__step = log((0.5 + delta) / (0.5 - delta))
+
+        """
+        the bound of the log-likelihood ratio (both error rates are 1 - confidence)
+        """
+        error = 1 - confidence
+        self.__bound = log((1 - error) / error)
+
+        self.__wins = 0
+        self.__losses = 0
+
+    def update(self, score1, score2):
+        if score1 > score2:
+            self.__wins += 1
+        elif score2 > score1:
+            self.__losses += 1
+
+    def get_llr(self):
+        return (self.__wins - self.__losses) * self.__step
+
+    def is_separated(self) -> bool:
+        return abs(self.get_llr()) >= self.__bound
+
+
+"""
+The available sequential tests
+"""
+SEQUENTIAL_TESTS = {
+    "ci": ConfidenceIntervalTest,
+    "sprt": SprtTest
+}
+
+
+"""
+Creates the sequential test of a pairing, or None if early stopping is disabled
+:param game_settings: the tournament settings (see main.py)
+"""
+def create_sequential_test(game_settings, player1, player2):
+    test_type = game_settings.get('early_stopping')
+    if test_type is None:
+        return None
+
+    names = [player1.get_name(), player2.get_name()]
+    min_games = game_settings.get('min_iterations', 0) * (2 if game_settings['seat_permutation'] else 1)
+    if test_type == "sprt":
+        return SprtTest(names, game_settings['confidence'], min_games, game_settings['sprt_delta'])
+    return SEQUENTIAL_TESTS[test_type](names, game_settings['confidence'], min_games)
+
+
+"""
+Projects the total score of a player in a pairing to the planned number of games, so that pairings that stopped early
+weigh the same in the leaderboard as the ones that were played until the end
+:returns: the projected score and its variance
+"""
+def get_projected_score(simulator, name, planned_games):
+    ledger = simulator.get_ledger()
+    count = ledger.get_count(name)
+    if count == 0:
+        return 0, 0
+    games = max(planned_games, count)
+    return ledger.get_mean(name) * games, games * games * ledger.get_variance(name) / count